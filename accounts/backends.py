@@ -0,0 +1,31 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+
+UserModel = get_user_model()
+
+
+class ProfileBackend(ModelBackend):
+    """
+    ModelBackend loading the session user together with their UserProfile,
+    in one joined query instead of one each: every view starts from
+    request.user.userprofile. A user without a profile gets
+    UserProfile.DoesNotExist from it without another query.
+    """
+
+    def users(self):
+        return UserModel._default_manager.select_related('userprofile')
+
+    def get_user(self, user_id):
+        try:
+            user = self.users().get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+    async def aget_user(self, user_id):
+        try:
+            user = await self.users().aget(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
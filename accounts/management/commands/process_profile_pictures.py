@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.models import UserProfile
+from accounts.pictures import process_next
+
+
+class Command(BaseCommand):
+    help = 'Render queued profile pictures as resized WebP and JPEG variants'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help='Seconds between checks for new pictures when idle')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit once no pictures are queued')
+
+    def handle(self, *args, **options):
+        self.stdout.write('Profile picture worker started')
+        while True:
+            profile = process_next()
+            if profile is None:
+                if options['once']:
+                    return
+                time.sleep(options['poll_interval'])
+                continue
+
+            if profile.picture_status == UserProfile.PICTURE_READY:
+                self.stdout.write(f'Picture of profile {profile.id} ready')
+            else:
+                self.stdout.write(self.style.ERROR(f'Picture of profile {profile.id} failed'))
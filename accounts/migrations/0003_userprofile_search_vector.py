@@ -0,0 +1,70 @@
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+# search_vector is owned by the database. The profile trigger rebuilds it
+# from the profile and its auth_user row whenever the profile is written;
+# the auth_user trigger touches the profile when a name, username or email
+# changes, which fires the profile trigger. Names are weighted highest, and
+# the words of the email's local part are indexed on their own so "jones"
+# finds bob.jones@example.com.
+CREATE_TRIGGERS = """
+CREATE FUNCTION accounts_userprofile_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        coalesce((
+            SELECT
+                setweight(to_tsvector('english', coalesce(u.first_name, '') || ' ' || coalesce(u.last_name, '')), 'A') ||
+                setweight(to_tsvector('english', coalesce(u.username, '')), 'A') ||
+                setweight(to_tsvector('english', coalesce(u.email, '') || ' ' || translate(split_part(coalesce(u.email, ''), '@', 1), '._-+', '    ')), 'B')
+            FROM auth_user u
+            WHERE u.id = NEW.user_id
+        ), ''::tsvector) ||
+        setweight(to_tsvector('english', coalesce(NEW.location, '')), 'C') ||
+        setweight(to_tsvector('english', coalesce(NEW.bio, '')), 'D');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER accounts_userprofile_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF user_id, bio, location, search_vector ON accounts_userprofile
+    FOR EACH ROW EXECUTE FUNCTION accounts_userprofile_search_vector_update();
+
+CREATE FUNCTION accounts_user_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    UPDATE accounts_userprofile SET search_vector = NULL WHERE user_id = NEW.id;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER accounts_user_search_vector_trigger
+    AFTER UPDATE OF username, first_name, last_name, email ON auth_user
+    FOR EACH ROW
+    WHEN ((OLD.username, OLD.first_name, OLD.last_name, OLD.email)
+          IS DISTINCT FROM (NEW.username, NEW.first_name, NEW.last_name, NEW.email))
+    EXECUTE FUNCTION accounts_user_search_vector_update();
+"""
+
+DROP_TRIGGERS = """
+DROP TRIGGER IF EXISTS accounts_user_search_vector_trigger ON auth_user;
+DROP FUNCTION IF EXISTS accounts_user_search_vector_update();
+DROP TRIGGER IF EXISTS accounts_userprofile_search_vector_trigger ON accounts_userprofile;
+DROP FUNCTION IF EXISTS accounts_userprofile_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_userprofile_email_notifications_userprofile_location_and_more'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(CREATE_TRIGGERS, DROP_TRIGGERS),
+    ]
@@ -0,0 +1,47 @@
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+# Profiles updated per statement. Each chunk commits on its own, so sign-ups
+# and profile edits only ever wait for one chunk's row locks, not for a
+# single transaction over the whole accounts_userprofile table.
+CHUNK_SIZE = 5000
+
+
+def backfill_search_vector(apps, schema_editor):
+    """
+    Touch existing rows so the trigger from 0003 computes their vectors.
+    """
+    UserProfile = apps.get_model('accounts', 'UserProfile')
+    pending = UserProfile.objects.filter(search_vector__isnull=True)
+
+    last_id = 0
+    while True:
+        ids = list(
+            pending.filter(id__gt=last_id)
+            .order_by('id')
+            .values_list('id', flat=True)[:CHUNK_SIZE]
+        )
+        if not ids:
+            break
+        UserProfile.objects.filter(id__in=ids).update(search_vector=None)
+        last_id = ids[-1]
+
+
+class Migration(migrations.Migration):
+
+    # Chunks commit separately and CREATE INDEX CONCURRENTLY can't run
+    # inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('accounts', '0003_userprofile_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_search_vector, migrations.RunPython.noop),
+        AddIndexConcurrently(
+            model_name='userprofile',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='profile_search_vector_idx'),
+        ),
+    ]
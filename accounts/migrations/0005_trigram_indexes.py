@@ -0,0 +1,32 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+# pg_trgm backs search-as-you-type (accounts/search.py autocomplete()).
+# It is a trusted extension, so the database owner can create it without
+# superuser rights on Postgres 13+. auth_user belongs to Django, so its
+# username index is plain SQL rather than a model index. Like the task and
+# project title indexes it is on UPPER(), which is what icontains compiles to.
+CREATE_USERNAME_INDEX = """
+CREATE INDEX CONCURRENTLY IF NOT EXISTS auth_user_username_trgm_idx
+    ON auth_user USING gin (upper(username) gin_trgm_ops);
+"""
+
+DROP_USERNAME_INDEX = """
+DROP INDEX CONCURRENTLY IF EXISTS auth_user_username_trgm_idx;
+"""
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('accounts', '0004_userprofile_search_backfill'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunSQL(CREATE_USERNAME_INDEX, DROP_USERNAME_INDEX),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def queue_existing_pictures(apps, schema_editor):
+    # Pictures uploaded before variants existed get them from the worker too
+    UserProfile = apps.get_model('accounts', 'UserProfile')
+    UserProfile.objects.exclude(profile_picture='').exclude(profile_picture__isnull=True).update(picture_status='pending')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_trigram_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='picture_digest',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='picture_status',
+            field=models.CharField(blank=True, choices=[('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(condition=models.Q(('picture_status', 'pending')), fields=['id'], name='profile_picture_pending_idx'),
+        ),
+        migrations.RunPython(queue_existing_pictures, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,5 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.contrib.auth.models import User
 from django.db.models.signals import post_save
@@ -9,9 +11,23 @@ class UserProfile(models.Model):
         ('dark', 'Dark')
     ]
 
+    PICTURE_PENDING = 'pending'
+    PICTURE_READY = 'ready'
+    PICTURE_FAILED = 'failed'
+    PICTURE_STATUS_CHOICES = [
+        (PICTURE_PENDING, 'Pending'),
+        (PICTURE_READY, 'Ready'),
+        (PICTURE_FAILED, 'Failed'),
+    ]
+
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     bio = models.TextField(max_length=200, blank=True)
     profile_picture = models.ImageField(upload_to='profile_pictures/', blank=True, null=True)
+    # Resized copies of the picture, made in the background by
+    # `process_profile_pictures` (see accounts/pictures.py) and named after
+    # the sha256 of the upload
+    picture_status = models.CharField(max_length=10, choices=PICTURE_STATUS_CHOICES, blank=True)
+    picture_digest = models.CharField(max_length=64, blank=True)
     phone = models.CharField(max_length=20, blank=True)
     location = models.CharField(max_length=100, blank=True)
 
@@ -23,9 +39,60 @@ class UserProfile(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Name, username, email, location and bio as one weighted document,
+    # written by database triggers on this table and auth_user (see
+    # migrations/0003_userprofile_search_vector.py and accounts/search.py)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='profile_search_vector_idx'),
+            # Picture worker queue
+            models.Index(fields=['id'], condition=models.Q(picture_status='pending'), name='profile_picture_pending_idx'),
+        ]
+
     def __str__(self):
         return f"{self.user.username}'s Profile"
 
+    @property
+    def has_picture(self):
+        """A picture is set and can be shown (it could be decoded or not yet tried)"""
+        return bool(self.profile_picture) and self.picture_status != self.PICTURE_FAILED
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored picture so save() can tell a new upload
+        loaded = dict(zip(field_names, values))
+        if 'profile_picture' in loaded:
+            instance._loaded_picture = loaded['profile_picture'] or ''
+        return instance
+
+    def picture_changed(self):
+        loaded = getattr(self, '_loaded_picture', None)
+        if loaded is None:
+            # New, or loaded without the picture column
+            return self._state.adding and bool(self.profile_picture)
+        return (self.profile_picture.name or '') != loaded
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if self.picture_changed():
+            # Queue the new upload for the picture worker; the upload itself
+            # is shown until it is done
+            self.picture_status = self.PICTURE_PENDING if self.profile_picture else ''
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'picture_status'}
+        elif not self._state.adding and update_fields is None:
+            # The picture columns are written by the worker; a full save of
+            # an instance loaded earlier must not write stale values back
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in ('picture_status', 'picture_digest')
+            ]
+        super().save(*args, **kwargs)
+        self._loaded_picture = self.profile_picture.name or ''
+
 
 
 #AUTO CREATE PROFILE FOR USERS
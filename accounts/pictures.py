@@ -0,0 +1,175 @@
+"""
+Profile picture variants.
+
+Uploads are stored as they come and queued (UserProfile.picture_status
+'pending'). The `process_profile_pictures` command claims queued profiles
+and renders each picture as square VARIANTS, in WebP and JPEG, re-encoded
+so no EXIF data (GPS position, camera, ...) is carried over, and rotated
+upright first.
+
+Variant files are named after the sha256 of the upload, so a name always
+has the same content: picture_view() serves them with far-future immutable
+cache headers. The {% profile_picture %} tag (templatetags/profile_pictures.py)
+lists them in a srcset for the browser to pick the smallest sufficient one;
+until a picture has been processed it shows the original upload.
+"""
+import hashlib
+import io
+import logging
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.urls import reverse
+from PIL import Image, ImageOps
+
+from dashboard.cache import bump_version_on_commit
+from .models import UserProfile
+
+
+logger = logging.getLogger(__name__)
+
+# Square sizes in pixels: avatar for the sidebar and search results, card
+# for the profile page, full for anything larger. Each is about twice the
+# size it is displayed at, for high density screens.
+VARIANTS = {
+    'avatar': 96,
+    'card': 256,
+    'full': 768,
+}
+
+# Extension: (Pillow format, content type, save options)
+FORMATS = {
+    'webp': ('WEBP', 'image/webp', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', 'image/jpeg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+VARIANT_DIR = 'profile_pictures/variants'
+
+# Background JPEG and WebP get for transparent pictures
+BACKGROUND = (255, 255, 255)
+
+
+class PictureError(Exception):
+    pass
+
+
+def variant_name(digest, variant, extension):
+    """Storage name of a variant file"""
+    return f'{VARIANT_DIR}/{digest[:2]}/{digest}-{variant}.{extension}'
+
+
+def variant_url(digest, variant, extension):
+    return reverse('accounts:picture', kwargs={'digest': digest, 'variant': variant, 'extension': extension})
+
+
+def variant_names(digest):
+    return [variant_name(digest, variant, extension) for variant in VARIANTS for extension in FORMATS]
+
+
+def flatten(image):
+    """RGB copy of `image`, transparent parts on BACKGROUND"""
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, BACKGROUND)
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def render_variants(data):
+    """
+    Store the variants of the picture in `data` (bytes) and return its
+    digest. Raises PictureError if it isn't an image Pillow can read.
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    if all(default_storage.exists(name) for name in variant_names(digest)):
+        # Uploaded before, by this user or another one
+        return digest
+
+    largest = max(VARIANTS.values())
+    try:
+        image = Image.open(io.BytesIO(data))
+        # JPEGs are decoded at a fraction of their size when that still
+        # covers the largest variant, which is much faster for phone photos
+        image.draft('RGB', (largest, largest))
+        image = flatten(ImageOps.exif_transpose(image))
+    except (OSError, ValueError, Image.DecompressionBombError) as error:
+        raise PictureError(f'Not a readable image: {error}') from error
+
+    for variant, size in VARIANTS.items():
+        # Cropped to a centered square, the way the templates show it
+        resized = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+        for extension, (image_format, content_type, options) in FORMATS.items():
+            name = variant_name(digest, variant, extension)
+            if default_storage.exists(name):
+                continue
+            buffer = io.BytesIO()
+            # No exif= argument: the metadata is left behind
+            resized.save(buffer, image_format, **options)
+            default_storage.save(name, ContentFile(buffer.getvalue()))
+    return digest
+
+
+def delete_variants(digest):
+    """Delete the variants of `digest` unless another profile still shows them"""
+    if UserProfile.objects.filter(picture_digest=digest).exists():
+        return
+    for name in variant_names(digest):
+        default_storage.delete(name)
+
+
+def process_next():
+    """
+    Process the oldest queued picture. Returns its profile, or None if none
+    is queued. The row stays locked meanwhile, so other workers skip it and
+    a worker that dies leaves it queued.
+    """
+    with transaction.atomic():
+        profile = (
+            UserProfile.objects.select_for_update(skip_locked=True)
+            .filter(picture_status=UserProfile.PICTURE_PENDING)
+            .order_by('id')
+            .first()
+        )
+        if profile is None:
+            return None
+
+        previous = profile.picture_digest
+        try:
+            if not profile.profile_picture:
+                raise PictureError('No picture')
+            with profile.profile_picture.open('rb') as picture_file:
+                data = picture_file.read()
+            profile.picture_digest = render_variants(data)
+            profile.picture_status = UserProfile.PICTURE_READY
+        except (PictureError, OSError) as error:
+            logger.warning('Profile picture of profile %s failed: %s', profile.id, error)
+            profile.picture_digest = ''
+            profile.picture_status = UserProfile.PICTURE_FAILED
+        UserProfile.objects.filter(id=profile.id).update(
+            picture_status=profile.picture_status,
+            picture_digest=profile.picture_digest,
+        )
+        # No post_save for update(): retire the cached sidebar here
+        bump_version_on_commit(profile.id)
+        if previous and previous != profile.picture_digest:
+            # Only once the new digest is saved: a rollback keeps using them
+            transaction.on_commit(lambda: delete_variants(previous))
+    return profile
+
+
+def picture_sources(profile):
+    """
+    {extension: [(url, width), ...]} of the processed variants of
+    `profile`'s picture, smallest first; empty if there are none yet
+    """
+    if profile.picture_status != UserProfile.PICTURE_READY or not profile.picture_digest:
+        return {}
+    return {
+        extension: [
+            (variant_url(profile.picture_digest, variant, extension), size)
+            for variant, size in sorted(VARIANTS.items(), key=lambda item: item[1])
+        ]
+        for extension in FORMATS
+    }
@@ -0,0 +1,344 @@
+"""
+Full-text search over tasks, projects and people.
+
+Every searchable model has a stored `search_vector` column kept current by
+database triggers (see the *_search_vector migrations) and covered by a GIN
+index, so matching is an index lookup instead of a scan of LIKE '%...%'
+filters.
+
+Results are grouped by kind, ranked with ts_rank, highlighted with
+ts_headline and paginated with a keyset on (rank, id). Group sizes are
+counted only up to COUNT_CAP, so a broad query costs the same as a narrow
+one and is shown as "1000+".
+
+autocomplete() backs search-as-you-type: substring and fuzzy word matches on
+task titles, project titles and usernames, served by pg_trgm GIN indexes,
+in a single UNION query whose result is cached per user for a few seconds.
+"""
+import hashlib
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank, TrigramWordSimilarity
+from django.core import signing
+from django.db.models import Case, F, FloatField, IntegerField, Q, Value, When
+from django.db.models.functions import Cast, Upper
+from django.urls import reverse
+from django.utils.html import escape
+from django.utils.http import urlencode
+from django.utils.safestring import mark_safe
+
+from dashboard import cache as user_cache
+from projects.models import visible_projects
+from tasks.models import Task
+from .models import UserProfile
+
+
+# Must match the configuration used by the triggers
+SEARCH_CONFIG = 'english'
+
+COUNT_CAP = 1000
+GROUP_SIZE = 5
+PAGE_SIZE = 20
+
+CURSOR_SALT = 'accounts.search.cursor'
+
+# ts_headline markers. Control characters can't come out of escape(), so
+# the snippet can be escaped first and the markers swapped for <mark> after.
+START_SEL = '\x02'
+STOP_SEL = '\x03'
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def parse_query(text):
+    """SearchQuery for user input: quoted phrases, OR and -excluded words"""
+    return SearchQuery(text, config=SEARCH_CONFIG, search_type='websearch')
+
+
+def search_filter(queryset, text):
+    """Narrow a Task, Project or UserProfile queryset to rows matching `text`"""
+    return queryset.filter(search_vector=parse_query(text))
+
+
+def highlight(snippet):
+    """ts_headline output as safe HTML with matches wrapped in <mark>"""
+    if not snippet:
+        return ''
+    html = escape(snippet).replace(START_SEL, '<mark>').replace(STOP_SEL, '</mark>')
+    return mark_safe(html)
+
+
+def headline(field_name, query, whole=False):
+    options = {'start_sel': START_SEL, 'stop_sel': STOP_SEL}
+    if whole:
+        options['highlight_all'] = True
+    else:
+        options.update(max_words=30, min_words=10, max_fragments=2)
+    return SearchHeadline(field_name, query, config=SEARCH_CONFIG, **options)
+
+
+# Kinds
+
+def searchable_tasks(user_profile):
+    return Task.objects.filter(user=user_profile).select_related('project')
+
+
+def searchable_projects(user_profile):
+    return visible_projects(user_profile)
+
+
+def searchable_people(user_profile):
+    people = UserProfile.objects.select_related('user')
+    if user_profile is not None:
+        people = people.exclude(id=user_profile.id)
+    return people
+
+
+class SearchKind:
+    """
+    One group of results.
+
+    queryset  -- function(user_profile) returning the rows this user may find
+    headlines -- {attribute: (field, whole field?)} snippets to highlight
+    public    -- searchable without being logged in
+    """
+
+    def __init__(self, name, label, queryset, headlines, public=False):
+        self.name = name
+        self.label = label
+        self.queryset = queryset
+        self.headlines = headlines
+        self.public = public
+
+    def matches(self, user_profile, query):
+        return self.queryset(user_profile).filter(search_vector=query)
+
+    def ranked(self, user_profile, query):
+        # Cast to double precision so the rank read back into Python
+        # compares exactly equal in the keyset filter of the next page
+        rank = Cast(SearchRank(F('search_vector'), query), FloatField())
+        return self.matches(user_profile, query).annotate(rank=rank).order_by('-rank', '-id')
+
+
+SEARCH_KINDS = {
+    'tasks': SearchKind('tasks', 'Tasks', searchable_tasks, {
+        'title_highlight': ('title', True),
+        'description_highlight': ('description', False),
+    }),
+    'projects': SearchKind('projects', 'Projects', searchable_projects, {
+        'title_highlight': ('title', True),
+        'description_highlight': ('description', False),
+    }),
+    'people': SearchKind('people', 'People', searchable_people, {
+        'bio_highlight': ('bio', False),
+    }, public=True),
+}
+
+
+# Cursors
+
+def encode_cursor(kind, text, rank, row_id):
+    return signing.dumps({'k': kind, 'q': text, 'r': rank, 'id': row_id}, salt=CURSOR_SALT, compress=True)
+
+
+def decode_cursor(cursor, kind, text):
+    """
+    (rank, id) from a cursor. Raises InvalidCursor if it was tampered with or
+    belongs to another kind or query.
+    """
+    try:
+        data = signing.loads(cursor, salt=CURSOR_SALT)
+        if data['k'] != kind or data['q'] != text:
+            raise InvalidCursor('Cursor belongs to a different search')
+        return float(data['r']), int(data['id'])
+    except (signing.BadSignature, KeyError, TypeError, ValueError) as exc:
+        raise InvalidCursor('Invalid cursor') from exc
+
+
+# Results
+
+@dataclass
+class ResultGroup:
+    kind: str
+    label: str
+    results: list = field(default_factory=list)
+    count: int = 0
+    # More than COUNT_CAP matches; `count` is then COUNT_CAP
+    capped: bool = False
+    next_cursor: str = None
+
+    @property
+    def display_count(self):
+        return f"{self.count}+" if self.capped else str(self.count)
+
+
+@dataclass
+class SearchResults:
+    query: str
+    groups: list = field(default_factory=list)
+
+    @property
+    def total_count(self):
+        return sum(group.count for group in self.groups)
+
+    @property
+    def capped(self):
+        return any(group.capped for group in self.groups)
+
+    @property
+    def display_count(self):
+        return f"{self.total_count}+" if self.capped else str(self.total_count)
+
+
+def capped_count(queryset, cap=COUNT_CAP):
+    """(count, capped): counts at most cap + 1 matching rows"""
+    count = queryset.order_by().values('id')[:cap + 1].count()
+    if count > cap:
+        return cap, True
+    return count, False
+
+
+def search_kind(kind, user_profile, text, cursor=None, page_size=PAGE_SIZE):
+    """One page of ranked, highlighted results of a single kind"""
+    entry = SEARCH_KINDS[kind]
+    query = parse_query(text)
+    rows = entry.ranked(user_profile, query)
+
+    if cursor:
+        rank, row_id = decode_cursor(cursor, kind, text)
+        rows = rows.filter(Q(rank__lt=rank) | Q(rank=rank, id__lt=row_id))
+
+    rows = rows.annotate(**{
+        name: headline(field_name, query, whole)
+        for name, (field_name, whole) in entry.headlines.items()
+    })
+    # One extra row tells us whether there is a next page
+    page = list(rows[:page_size + 1])
+    for row in page:
+        for name in entry.headlines:
+            setattr(row, name, highlight(getattr(row, name)))
+
+    group = ResultGroup(kind=kind, label=entry.label)
+    group.count, group.capped = capped_count(entry.matches(user_profile, query))
+    if len(page) > page_size:
+        page = page[:page_size]
+        group.next_cursor = encode_cursor(kind, text, page[-1].rank, page[-1].id)
+    group.results = page
+    return group
+
+
+def search(user_profile, text, kind=None, cursor=None):
+    """
+    Search everything `user_profile` can see (None for anonymous visitors,
+    who can only find people).
+
+    Without `kind`, returns the best GROUP_SIZE results of every kind; with
+    it, one PAGE_SIZE page of that kind starting after `cursor`.
+    """
+    kinds = [
+        name for name, entry in SEARCH_KINDS.items()
+        if user_profile is not None or entry.public
+    ]
+    results = SearchResults(query=text)
+    if kind in kinds:
+        results.groups.append(search_kind(kind, user_profile, text, cursor))
+    else:
+        for name in kinds:
+            results.groups.append(search_kind(name, user_profile, text, page_size=GROUP_SIZE))
+    return results
+
+
+# Autocomplete
+
+AUTOCOMPLETE_LIMIT = 5
+AUTOCOMPLETE_MIN_LENGTH = 2
+AUTOCOMPLETE_MAX_LENGTH = 100
+AUTOCOMPLETE_CACHE_TIMEOUT = getattr(settings, 'SEARCH_AUTOCOMPLETE_CACHE_TIMEOUT', 30)
+
+SUGGESTION_KINDS = ['task', 'project', 'person']
+
+
+def normalize_prefix(text):
+    """Lowercased, whitespace-collapsed input, or '' if too short to match"""
+    text = ' '.join((text or '').split()).lower()[:AUTOCOMPLETE_MAX_LENGTH]
+    return text if len(text) >= AUTOCOMPLETE_MIN_LENGTH else ''
+
+
+def suggestion_rows(queryset, kind, field_name, text, limit=AUTOCOMPLETE_LIMIT):
+    """
+    Best `limit` rows of `queryset` whose `field_name` contains `text` or has a
+    word similar to it. Titles starting with the text rank first, then closer
+    fuzzy matches.
+
+    icontains compiles to UPPER(field) LIKE ..., so both conditions are on
+    UPPER(field), the expression the gin_trgm_ops indexes are built on.
+    """
+    matches = Q(**{f'{field_name}__icontains': text}) | Q(match_text__trigram_word_similar=text)
+    return (
+        queryset.alias(match_text=Upper(field_name))
+        .filter(matches)
+        .annotate(
+            kind=Value(kind),
+            label=F(field_name),
+            prefix=Case(
+                When(**{f'{field_name}__istartswith': text}, then=Value(0)),
+                default=Value(1),
+                output_field=IntegerField(),
+            ),
+            score=Cast(TrigramWordSimilarity(text, field_name), FloatField()),
+        )
+        .order_by('prefix', '-score', 'label', 'id')
+        .values_list('kind', 'id', 'label', 'prefix', 'score')[:limit]
+    )
+
+
+def suggestion_url(kind, row_id, label):
+    if kind == 'task':
+        return reverse('tasks:task_detail', args=[row_id])
+    if kind == 'project':
+        return reverse('projects:project_detail', args=[row_id])
+    return f"{reverse('accounts:search')}?{urlencode({'query': label, 'kind': 'people'})}"
+
+
+def find_suggestions(user, user_profile, text):
+    people = User.objects.filter(is_active=True).exclude(id=user.id)
+    queries = [suggestion_rows(people, 'person', 'username', text)]
+    if user_profile is not None:
+        queries = [
+            suggestion_rows(searchable_tasks(user_profile).select_related(None), 'task', 'title', text),
+            suggestion_rows(searchable_projects(user_profile), 'project', 'title', text),
+        ] + queries
+
+    # One round trip for all kinds
+    rows = queries[0].union(*queries[1:], all=True)
+    rows = sorted(rows, key=lambda row: (SUGGESTION_KINDS.index(row[0]), row[3], -row[4], row[2]))
+    return [
+        {'kind': kind, 'id': row_id, 'label': label, 'url': suggestion_url(kind, row_id, label)}
+        for kind, row_id, label, prefix, score in rows
+    ]
+
+
+def autocomplete(user, user_profile, text):
+    """
+    Suggestions for the header search box: [{kind, id, label, url}, ...].
+    Cached per user for AUTOCOMPLETE_CACHE_TIMEOUT seconds, and dropped
+    early when one of the user's tasks or projects changes.
+    """
+    text = normalize_prefix(text)
+    if not text:
+        return []
+    if user_profile is None:
+        return find_suggestions(user, None, text)
+
+    digest = hashlib.md5(text.encode()).hexdigest()
+    return user_cache.get_or_compute(
+        'autocomplete',
+        user_profile.id,
+        lambda: find_suggestions(user, user_profile, text),
+        parts=[digest],
+        timeout=AUTOCOMPLETE_CACHE_TIMEOUT,
+    )
@@ -0,0 +1,38 @@
+from django import template
+from django.utils.html import format_html, format_html_join
+
+from ..pictures import picture_sources
+
+register = template.Library()
+
+
+@register.simple_tag
+def profile_picture(profile, size, css_class='', alt='Profile picture'):
+    """
+    Picture of `profile` displayed at `size` CSS pixels square. Once its
+    variants are ready, a <picture> offering them as WebP and JPEG srcsets,
+    so the browser downloads the smallest one sharp at its pixel density;
+    until then the original upload.
+    Usage: {% profile_picture user.userprofile 40 "w-10 h-10 rounded-xl" %}
+    """
+    sources = picture_sources(profile)
+    if not sources:
+        return format_html(
+            '<img class="{}" src="{}" alt="{}" width="{}" height="{}">',
+            css_class, profile.profile_picture.url, alt, size, size,
+        )
+
+    def srcset(extension):
+        return format_html_join(', ', '{} {}w', sources[extension])
+
+    # Smallest JPEG at least twice the displayed size, for browsers without
+    # srcset support
+    fallback = next((url for url, width in sources['jpg'] if width >= size * 2), sources['jpg'][-1][0])
+    return format_html(
+        '<picture>'
+        '<source type="image/webp" srcset="{}" sizes="{}px">'
+        '<img class="{}" src="{}" srcset="{}" sizes="{}px" alt="{}" width="{}" height="{}" decoding="async">'
+        '</picture>',
+        srcset('webp'), size,
+        css_class, fallback, srcset('jpg'), size, alt, size, size,
+    )
@@ -1,3 +1,197 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
 
-# Create your tests here.
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from dashboard.testing import QueryScalingTestCase
+from .backends import ProfileBackend
+from .models import UserProfile
+from .pictures import FORMATS, VARIANTS, process_next, variant_name, variant_url
+
+
+RED = (220, 30, 30)
+BLUE = (30, 30, 220)
+
+
+def photo(width=1200, height=800, orientation=None):
+    """
+    JPEG bytes with EXIF data, like a phone photo: red top half, blue
+    bottom half
+    """
+    exif = Image.Exif()
+    exif[0x010f] = 'PhoneMaker'  # Make
+    if orientation:
+        exif[0x0112] = orientation
+    image = Image.new('RGB', (width, height), RED)
+    image.paste(BLUE, (0, height // 2, width, height))
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', exif=exif)
+    return buffer.getvalue()
+
+
+class AccountQueryTests(QueryScalingTestCase):
+    def test_search(self):
+        self.assertConstantQueries(lambda seed: reverse('accounts:search') + '?query=task')
+
+    def test_search_one_kind(self):
+        for kind in ['tasks', 'projects', 'people']:
+            with self.subTest(kind):
+                self.assertConstantQueries(lambda seed: reverse('accounts:search') + f'?query=task&kind={kind}')
+
+    def test_profile(self):
+        self.assertConstantQueries(lambda seed: reverse('accounts:profile'))
+
+
+class ProfileBackendTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='joined')
+        self.profile_id = self.user.userprofile.id
+
+    def test_profile_loaded_with_user(self):
+        with self.assertNumQueries(1):
+            user = ProfileBackend().get_user(self.user.id)
+            self.assertEqual(user.userprofile.id, self.profile_id)
+
+    async def test_profile_loaded_with_user_async(self):
+        user = await ProfileBackend().aget_user(self.user.id)
+        # Fetching it now would raise SynchronousOnlyOperation
+        self.assertEqual(user.userprofile.id, self.profile_id)
+
+    def test_model_backend_session(self):
+        # A session started before ProfileBackend was listed
+        session = self.client.session
+        session[SESSION_KEY] = str(self.user.pk)
+        session[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+        session[HASH_SESSION_KEY] = self.user.get_session_auth_hash()
+        session.save()
+
+        response = self.client.get(reverse('accounts:profile'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.wsgi_request.user, self.user)
+
+    def test_without_profile(self):
+        # Logging in saves the profile too, so it goes afterwards
+        self.client.force_login(self.user)
+        UserProfile.objects.filter(user=self.user).delete()
+        user = ProfileBackend().get_user(self.user.id)
+        with self.assertNumQueries(0), self.assertRaises(UserProfile.DoesNotExist):
+            user.userprofile
+
+        self.assertRedirects(
+            self.client.get(reverse('projects:project_list')), reverse('accounts:profile'), fetch_redirect_response=False,
+        )
+        self.assertEqual(self.client.get(reverse('tasks:task_bulk')).status_code, 405)
+        self.assertEqual(self.client.get(reverse('api:task_collection')).status_code, 403)
+
+
+class ProfilePictureTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create(username='pictured')
+        self.client.force_login(self.user)
+
+    def upload(self, data, name='photo.jpg'):
+        self.client.post(reverse('accounts:profile'), {
+            'profile_picture': SimpleUploadedFile(name, data, content_type='image/jpeg'),
+        })
+        return UserProfile.objects.get(user=self.user)
+
+    def test_upload_is_queued_and_processed(self):
+        profile = self.upload(photo(orientation=6))
+        self.assertEqual(profile.picture_status, UserProfile.PICTURE_PENDING)
+
+        process_next()
+        profile.refresh_from_db()
+        self.assertEqual(profile.picture_status, UserProfile.PICTURE_READY)
+        self.assertIsNone(process_next())
+
+        for variant, size in VARIANTS.items():
+            for extension in FORMATS:
+                with default_storage.open(variant_name(profile.picture_digest, variant, extension)) as variant_file:
+                    image = Image.open(variant_file)
+                    self.assertEqual(image.size, (size, size))
+                    self.assertNotIn('exif', image.info)
+
+    def test_rotated_upright(self):
+        # Orientation 6: shown turned a quarter clockwise, so the red top
+        # half ends up on the right
+        profile = self.upload(photo(width=600, height=900, orientation=6))
+        process_next()
+        profile.refresh_from_db()
+        with default_storage.open(variant_name(profile.picture_digest, 'full', 'jpg')) as variant_file:
+            image = Image.open(variant_file)
+            left, right = image.getpixel((100, 384)), image.getpixel((668, 384))
+        self.assertGreater(left[2], left[0])
+        self.assertGreater(right[0], right[2])
+
+    def test_variant_cached_forever(self):
+        profile = self.upload(photo())
+        process_next()
+        profile.refresh_from_db()
+
+        response = self.client.get(variant_url(profile.picture_digest, 'avatar', 'webp'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/webp')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('max-age=31536000', response['Cache-Control'])
+        self.assertEqual(self.client.get(variant_url('0' * 64, 'avatar', 'webp')).status_code, 404)
+
+    def test_pages_use_variants(self):
+        profile = self.upload(photo())
+        response = self.client.get(reverse('accounts:profile'))
+        self.assertContains(response, profile.profile_picture.url)
+
+        # Retires the cached sidebar
+        with self.captureOnCommitCallbacks(execute=True):
+            process_next()
+        profile.refresh_from_db()
+        response = self.client.get(reverse('accounts:profile'))
+        self.assertNotContains(response, profile.profile_picture.url)
+        self.assertContains(response, variant_url(profile.picture_digest, 'avatar', 'webp') + ' 96w')
+
+    def test_unreadable_upload(self):
+        profile = self.upload(b'not an image')
+        with self.assertLogs('accounts.pictures', 'WARNING'):
+            process_next()
+        profile.refresh_from_db()
+        self.assertEqual(profile.picture_status, UserProfile.PICTURE_FAILED)
+        self.assertFalse(profile.has_picture)
+
+    def test_replaced_picture(self):
+        first = self.upload(photo())
+        process_next()
+        first.refresh_from_db()
+
+        second = self.upload(photo(width=900))
+        self.assertEqual(second.picture_status, UserProfile.PICTURE_PENDING)
+        with self.captureOnCommitCallbacks() as callbacks:
+            process_next()
+        second.refresh_from_db()
+        self.assertNotEqual(second.picture_digest, first.picture_digest)
+        # Not before the new digest is committed
+        self.assertTrue(default_storage.exists(variant_name(first.picture_digest, 'avatar', 'jpg')))
+        for callback in callbacks:
+            callback()
+        self.assertFalse(default_storage.exists(variant_name(first.picture_digest, 'avatar', 'jpg')))
+
+    def test_full_save_keeps_worker_state(self):
+        profile = self.upload(photo())
+        stale = UserProfile.objects.get(id=profile.id)
+        process_next()
+        stale.bio = 'Updated'
+        stale.save()
+        profile.refresh_from_db()
+        self.assertEqual(profile.picture_status, UserProfile.PICTURE_READY)
+        self.assertEqual(profile.bio, 'Updated')
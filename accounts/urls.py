@@ -1,4 +1,4 @@
-from django.urls import path
+from django.urls import path, re_path
 from . import views
 
 app_name = 'accounts'
@@ -6,10 +6,13 @@ app_name = 'accounts'
 urlpatterns = [
     path('', views.home_view, name='home'),  # Temporary home page
     path('search/', views.search_view, name='search'),  # Search functionality
+    path('search/autocomplete/', views.autocomplete_view, name='autocomplete'),  # For AJAX
     path('login/', views.login_view, name='login'),
     path('logout/', views.logout_view, name='logout'),
     path('signup/', views.signup_view, name='signup'),
     path('profile/', views.profile_view, name='profile'),
     path('change-password/', views.change_password_view, name='change_password'),
     path('check-username/', views.check_username, name='check_username'),  # For AJAX
+    re_path(r'^pictures/(?P<digest>[0-9a-f]{64})-(?P<variant>[a-z]+)\.(?P<extension>[a-z]+)$',
+            views.picture_view, name='picture'),  # Profile picture variants
 ]
\ No newline at end of file
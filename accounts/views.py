@@ -5,11 +5,16 @@ from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.contrib.auth.models import User
-from django.http import JsonResponse
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, JsonResponse
+from django.utils.cache import patch_cache_control
 from django.views.decorators.http import require_http_methods
+from . import pictures
 from .models import UserProfile
 from .forms import SearchForm, LoginForm
-from django.db.models import Q
+from .search import InvalidCursor, autocomplete, search
+from dashboard.budgets import query_budget
 
 
 def home_view(request):
@@ -17,62 +22,51 @@ def home_view(request):
     return render(request, 'accounts/home.html')
 
 
+@query_budget(queries=12, time=200)
 def search_view(request):
     """
-    Handle search functionality across the application
-    This is server-side logic that processes search queries
+    Full-text search across people, and for logged in users their tasks and
+    projects. Without ?kind= shows the top results of every group; with it,
+    pages through one group using ?cursor=.
     """
-    # Initialize variables``
     query = None
-    results = []
+    results = None
     form = SearchForm()
 
-    # Check if this is a search request (GET or POST)
     if request.method == 'GET' and 'query' in request.GET:
-        # Create form with the search data
         form = SearchForm(request.GET)
 
-        # Validate the form
         if form.is_valid():
-            # Get the cleaned search query
             query = form.cleaned_data['query']
 
-            # Search logic - for now we'll search users since you don't have tasks/projects yet
-            # Later you can add: Task.objects.filter(...), Project.objects.filter(...)
+            # Loaded along with the user (accounts/backends.py); None for
+            # anonymous users
+            user_profile = getattr(request.user, 'userprofile', None)
 
-            # Search in User model (first_name, last_name, username, email)
-            user_results = User.objects.filter(
-                Q(first_name__icontains=query) |
-                Q(last_name__icontains=query) |
-                Q(username__icontains=query) |
-                Q(email__icontains=query)
-            ).exclude(id=request.user.id if request.user.is_authenticated else None)
-
-            # Search in UserProfile model (bio, location)
-            profile_results = UserProfile.objects.filter(
-                Q(bio__icontains=query) |
-                Q(location__icontains=query)
-            )
-
-            # Combine results (you can organize this better later)
-            results = {
-                'users': user_results[:5],  # Limit to 5 results
-                'profiles': profile_results[:5],
-                'total_count': user_results.count() + profile_results.count()
-            }
+            kind = request.GET.get('kind')
+            try:
+                results = search(user_profile, query, kind, request.GET.get('cursor'))
+            except InvalidCursor:
+                results = search(user_profile, query, kind)
 
-    # Render the search results page
     context = {
         'form': form,
         'query': query,
         'results': results,
+        'active_kind': request.GET.get('kind') if results and len(results.groups) == 1 else None,
         'active_page': 'search'
     }
 
     return render(request, 'accounts/search_results.html', context)
 
 
-
+@login_required
+def autocomplete_view(request):
+    """Search-as-you-type suggestions for the header search box (AJAX)"""
+    query = request.GET.get('q', '')
+    user_profile = getattr(request.user, 'userprofile', None)
+    suggestions = autocomplete(request.user, user_profile, query)
+    return JsonResponse({'query': query, 'results': suggestions})
 
 
 def login_view(request):
@@ -195,6 +189,7 @@ def signup_view(request):
     return render(request, 'accounts/signup.html', context)
 
 @login_required
+@query_budget(queries=5, time=50)
 def profile_view(request):
     try:
         profile = request.user.userprofile
@@ -258,4 +253,25 @@ def change_password_view(request):
 def check_username(request):
     username = request.GET.get('username', '').strip()
     is_available = not User.objects.filter(username=username).exists() if username else False
-    return JsonResponse({'available': is_available})
\ No newline at end of file
+    return JsonResponse({'available': is_available})
+
+
+@require_http_methods(["GET", "HEAD"])
+def picture_view(request, digest, variant, extension):
+    """
+    A profile picture variant (see accounts/pictures.py). The name is the
+    content hash, so it may be cached forever.
+    """
+    if variant not in pictures.VARIANTS or extension not in pictures.FORMATS:
+        raise Http404('No such picture')
+    try:
+        picture_file = default_storage.open(pictures.variant_name(digest, variant, extension))
+    except FileNotFoundError:
+        raise Http404('No such picture')
+
+    response = FileResponse(picture_file, content_type=pictures.FORMATS[extension][1])
+    patch_cache_control(
+        response, public=True, immutable=True,
+        max_age=getattr(settings, 'PROFILE_PICTURE_CACHE_MAX_AGE', 365 * 24 * 60 * 60),
+    )
+    return response
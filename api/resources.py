@@ -0,0 +1,240 @@
+"""
+Field specs, querysets and validation for the JSON API.
+
+Each resource lists its fields as ApiField entries. A request's `fields=`
+parameter picks a subset, and only the columns (and joins or prefetches)
+those fields need are loaded: the queryset is narrowed with only(),
+select_related() and prefetch_related() to match.
+
+Values from request bodies are checked with the same cleaning functions as
+the task importer, so the API and imports accept the same formats.
+"""
+from datetime import datetime
+
+from django.db.models import Prefetch
+from django.urls import reverse
+
+from accounts.models import UserProfile
+from projects.models import Project, visible_projects
+from tasks.bulk import BulkActionError, clean_project
+from tasks.importer import (
+    DESCRIPTION_MAX_LENGTH, PROJECT_TITLE_MAX_LENGTH, TITLE_MAX_LENGTH,
+    RowError, clean_bool, clean_date, clean_priority, clean_text,
+)
+from tasks.models import Task
+from tasks.pagination import SortMode
+
+
+class InvalidFields(Exception):
+    pass
+
+
+class ValidationFailed(Exception):
+    """Invalid request body; `errors` maps field names to messages"""
+
+    def __init__(self, errors):
+        super().__init__('Invalid data')
+        self.errors = errors
+
+
+class ApiField:
+    """
+    One field of a resource.
+
+    columns  -- model fields only() must load for it
+    get      -- function(instance) returning the value; defaults to the
+                attribute of the same name
+    related  -- select_related() paths it needs
+    prefetch -- function() returning the Prefetch it needs
+    """
+
+    def __init__(self, columns=None, get=None, related=(), prefetch=None):
+        self.columns = columns
+        self.get = get
+        self.related = related
+        self.prefetch = prefetch
+
+
+class Resource:
+    def __init__(self, name, fields, default_fields):
+        self.name = name
+        self.fields = fields
+        self.default_fields = default_fields
+
+    def parse_fields(self, param):
+        """Field names from a `fields=` parameter, the defaults if empty"""
+        if not param:
+            return list(self.default_fields)
+        names = [name.strip() for name in param.split(',') if name.strip()]
+        unknown = [name for name in names if name not in self.fields]
+        if unknown:
+            raise InvalidFields(
+                f"Unknown field(s) {', '.join(unknown)}; choose from {', '.join(self.fields)}"
+            )
+        # id always comes along, so results can be told apart
+        return list(dict.fromkeys(['id'] + names))
+
+    def narrow(self, queryset, names, extra_columns=()):
+        """`queryset` loading only what the fields in `names` need"""
+        columns = set(extra_columns)
+        related = set()
+        prefetches = []
+        for name in names:
+            api_field = self.fields[name]
+            columns.update(api_field.columns if api_field.columns is not None else [name])
+            related.update(api_field.related)
+            if api_field.prefetch:
+                prefetches.append(api_field.prefetch())
+
+        queryset = queryset.select_related(*related) if related else queryset.select_related(None)
+        queryset = queryset.only(*columns)
+        if prefetches:
+            queryset = queryset.prefetch_related(*prefetches)
+        return queryset
+
+    def serialize(self, instance, names):
+        data = {}
+        for name in names:
+            api_field = self.fields[name]
+            data[name] = api_field.get(instance) if api_field.get else getattr(instance, name)
+        return data
+
+
+# Tasks
+
+def task_project(task):
+    if task.project_id is None:
+        return None
+    return {'id': task.project_id, 'title': task.project.title}
+
+
+TASKS = Resource('tasks', {
+    'id': ApiField(),
+    'url': ApiField(['id'], lambda task: reverse('api:task_detail', args=[task.id])),
+    'title': ApiField(),
+    'description': ApiField(),
+    'priority': ApiField(),
+    'completed': ApiField(),
+    'completed_at': ApiField(),
+    'due_date': ApiField(),
+    'project': ApiField(['project_id', 'project__title'], task_project, related=['project']),
+    'created_at': ApiField(),
+    'updated_at': ApiField(),
+}, default_fields=[
+    'id', 'url', 'title', 'description', 'priority', 'completed', 'completed_at', 'due_date',
+    'project', 'created_at', 'updated_at',
+])
+
+
+def tasks_for(user_profile):
+    return Task.objects.filter(user=user_profile)
+
+
+def clean_task_data(data, user_profile, partial=False):
+    """
+    Model values from a task request body. With `partial` (PATCH) only the
+    fields present are checked and returned.
+    """
+    if not isinstance(data, dict):
+        raise ValidationFailed({'': 'Expected a JSON object'})
+
+    cleaners = {
+        'title': lambda: clean_text(data, 'title', TITLE_MAX_LENGTH, required=True),
+        'description': lambda: clean_text(data, 'description', DESCRIPTION_MAX_LENGTH),
+        'priority': lambda: clean_priority(data, 'priority'),
+        'due_date': lambda: clean_date(data, 'due_date'),
+        'completed': lambda: clean_bool(data, 'completed'),
+        'project_id': lambda: clean_project(data.get('project_id'), user_profile),
+    }
+    values = {}
+    errors = {}
+    for name, clean in cleaners.items():
+        if partial and name not in data:
+            continue
+        try:
+            values[name] = clean()
+        except RowError as exc:
+            errors[name] = exc.message
+        except BulkActionError as exc:
+            errors[name] = str(exc)
+    if errors:
+        raise ValidationFailed(errors)
+    return values
+
+
+def apply_task_data(task, values):
+    completed = values.pop('completed', None)
+    for name, value in values.items():
+        setattr(task, name, value)
+    if completed is not None:
+        task.set_completed(completed)
+
+
+# Projects
+
+def member_usernames(project):
+    return [member.user.username for member in project.members.all()]
+
+
+def member_prefetch():
+    return Prefetch('members', queryset=UserProfile.objects.select_related('user').only('id', 'user__username'))
+
+
+PROJECTS = Resource('projects', {
+    'id': ApiField(),
+    'url': ApiField(['id'], lambda project: reverse('api:project_detail', args=[project.id])),
+    'title': ApiField(),
+    'description': ApiField(),
+    'color': ApiField(),
+    'completed': ApiField(),
+    'task_count': ApiField(),
+    'completed_task_count': ApiField(),
+    'progress': ApiField(['task_count', 'completed_task_count']),
+    'owner': ApiField(['user__user__username'], lambda project: project.user.user.username, related=['user__user']),
+    'members': ApiField([], member_usernames, prefetch=member_prefetch),
+    'created_at': ApiField(),
+    'updated_at': ApiField(),
+}, default_fields=[
+    'id', 'url', 'title', 'description', 'color', 'completed', 'task_count', 'completed_task_count',
+    'progress', 'owner', 'created_at', 'updated_at',
+])
+
+PROJECT_DESCRIPTION_MAX_LENGTH = Project._meta.get_field('description').max_length
+
+# Projects list newest first, id breaking ties
+PROJECT_SORT = SortMode('Newest First', 'created_at', descending=True, value_type=datetime)
+
+
+def projects_for(user_profile):
+    """Projects the user owns or is a member of"""
+    return visible_projects(user_profile)
+
+
+def clean_project_data(data, partial=False):
+    if not isinstance(data, dict):
+        raise ValidationFailed({'': 'Expected a JSON object'})
+
+    def clean_color():
+        color = clean_text(data, 'color', Project._meta.get_field('color').max_length)
+        if color and color not in dict(Project.COLOR_CHOICES):
+            raise RowError('color', f"Choose from {', '.join(dict(Project.COLOR_CHOICES))}")
+        return color
+
+    cleaners = {
+        'title': lambda: clean_text(data, 'title', PROJECT_TITLE_MAX_LENGTH, required=True),
+        'description': lambda: clean_text(data, 'description', PROJECT_DESCRIPTION_MAX_LENGTH),
+        'color': clean_color,
+        'completed': lambda: clean_bool(data, 'completed'),
+    }
+    values = {}
+    errors = {}
+    for name, clean in cleaners.items():
+        if partial and name not in data:
+            continue
+        try:
+            values[name] = clean()
+        except RowError as exc:
+            errors[name] = exc.message
+    if errors:
+        raise ValidationFailed(errors)
+    return values
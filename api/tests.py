@@ -0,0 +1,146 @@
+import json
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from projects.models import Project
+from tasks.models import Task
+
+
+class ApiTestCase(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create(username='owner').userprofile
+        self.member = User.objects.create(username='member').userprofile
+        self.project = Project.objects.create(user=self.owner, title='Shared')
+        self.project.members.add(self.member)
+        self.task = Task.objects.create(user=self.owner, project=self.project, title='Task')
+        self.client.force_login(self.owner.user)
+
+    def login(self, profile):
+        self.client.force_login(profile.user)
+
+    def send(self, method, url, data=None):
+        return getattr(self.client, method)(url, json.dumps(data), content_type='application/json')
+
+
+class ConditionalTests(ApiTestCase):
+    def assertFresh(self, url, etag):
+        """A GET with `etag` is answered with 304"""
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def assertChanged(self, url, etag):
+        """A GET with `etag` gets a new response and tag, which is returned"""
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        return response['ETag']
+
+    def test_not_modified(self):
+        url = reverse('api:task_collection')
+        response = self.client.get(url)
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+        # Session, user and the two aggregates of data_state()
+        with self.assertNumQueries(4):
+            self.assertFresh(url, response['ETag'])
+        # Another URL, another representation
+        self.assertChanged(url + '?fields=title', response['ETag'])
+
+    def test_task_changes(self):
+        url = reverse('api:task_collection')
+        etag = self.client.get(url)['ETag']
+        self.task.title = 'Renamed'
+        self.task.save()
+        etag = self.assertChanged(url, etag)
+        # Bulk writes bypass save() but stamp updated_at too
+        self.send('post', reverse('tasks:task_bulk'), {'action': 'complete', 'ids': [self.task.id]})
+        etag = self.assertChanged(url, etag)
+        self.task.delete()
+        self.assertChanged(url, etag)
+
+    def test_shared_project_counters(self):
+        # The member sees the owner's task counts change
+        self.login(self.member)
+        url = reverse('api:project_collection')
+        etag = self.client.get(url)['ETag']
+        self.assertFresh(url, etag)
+
+        Task.objects.create(user=self.owner, project=self.project, title='Another', completed=True)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data'][0]['progress'], 50)
+
+    def test_members(self):
+        url = reverse('api:project_detail', args=[self.project.id]) + '?fields=members'
+        etag = self.client.get(url)['ETag']
+        other = User.objects.create(username='other').userprofile
+        self.project.members.add(other)
+        etag = self.assertChanged(url, etag)
+        other.projects.clear()
+        etag = self.assertChanged(url, etag)
+        self.member.user.username = 'renamed'
+        self.member.user.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.json()['data']['members'], ['renamed'])
+
+
+class FieldsTests(ApiTestCase):
+    def test_sparse_fieldsets(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('api:task_collection'), {'fields': 'title,project'})
+        self.assertEqual(response.json()['data'], [
+            {'id': self.task.id, 'title': 'Task', 'project': {'id': self.project.id, 'title': 'Shared'}},
+        ])
+        # Only the columns asked for are selected
+        select = queries[-1]['sql']
+        self.assertIn('"tasks_task"."title"', select)
+        self.assertNotIn('"tasks_task"."description"', select)
+
+    def test_unknown_field(self):
+        response = self.client.get(reverse('api:project_collection'), {'fields': 'title,secret'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('secret', response.json()['error'])
+
+    def test_project_fields(self):
+        response = self.client.get(reverse('api:project_detail', args=[self.project.id]),
+                                   {'fields': 'owner,members,progress'})
+        self.assertEqual(response.json()['data'], {
+            'id': self.project.id, 'owner': 'owner', 'members': ['member'], 'progress': 0,
+        })
+
+
+class WriteTests(ApiTestCase):
+    def test_tasks(self):
+        response = self.send('post', reverse('api:task_collection'), {'title': 'New', 'priority': 'high'})
+        self.assertEqual(response.status_code, 201)
+        url = response.json()['data']['url']
+
+        response = self.send('patch', url, {'completed': True, 'project_id': self.project.id})
+        self.assertEqual(response.json()['data']['completed'], True)
+        self.project.refresh_from_db()
+        self.assertEqual((self.project.task_count, self.project.completed_task_count), (2, 1))
+
+        response = self.send('put', url, {'priority': 'urgent'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.json()['fields']), {'title', 'priority'})
+
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_project_owner_only(self):
+        self.login(self.member)
+        url = reverse('api:project_detail', args=[self.project.id])
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(self.send('patch', url, {'title': 'Mine'}).status_code, 403)
+        self.assertEqual(self.client.delete(url).status_code, 403)
+
+    def test_authentication(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse('api:task_collection')).status_code, 401)
+        self.login(self.owner)
+        response = self.client.put(reverse('api:task_collection'))
+        self.assertEqual(response.status_code, 405)
+        self.assertEqual(response['Allow'], 'GET, HEAD, POST')
@@ -0,0 +1,11 @@
+from django.urls import path
+from . import views
+
+app_name = 'api'
+
+urlpatterns = [
+    path('v1/tasks/', views.task_collection, name='task_collection'),
+    path('v1/tasks/<int:task_id>/', views.task_detail, name='task_detail'),
+    path('v1/projects/', views.project_collection, name='project_collection'),
+    path('v1/projects/<int:project_id>/', views.project_detail, name='project_detail'),
+]
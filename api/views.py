@@ -0,0 +1,304 @@
+"""
+Versioned JSON API for tasks and projects (/api/v1/).
+
+Authentication is the regular session login; writes need the CSRF token like
+any other form post.
+
+Every GET response carries a strong ETag derived from the database state the
+API serves (data_state()) plus the exact URL requested. A matching
+If-None-Match is answered with 304 before any task or project is loaded or
+serialized, so polling clients cost a session lookup and two aggregate
+queries while nothing changes. The tag doesn't depend on the cache, so every
+worker and host agrees on it.
+
+Collections are keyset-paginated (?cursor=, ?page_size=) and accept
+`fields=` sparse fieldsets, which also narrow the columns selected.
+"""
+import hashlib
+import json
+from functools import wraps
+
+from django.core import signing
+from django.db.models import Count, Max
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.http import condition
+
+from accounts.models import UserProfile
+from dashboard.budgets import query_budget
+from projects.models import Project
+from tasks.models import Task
+from tasks.pagination import InvalidCursor, SORT_MODES, clean_page_size, clean_sort, paginate_tasks
+from tasks.views import filter_tasks
+from .resources import (
+    PROJECT_SORT, PROJECTS, TASKS, InvalidFields, ValidationFailed,
+    apply_task_data, clean_project_data, clean_task_data, projects_for, tasks_for,
+)
+
+
+API_VERSION = 'v1'
+
+PROJECT_CURSOR_SALT = 'api.projects.cursor'
+
+
+def error_response(message, status, **extra):
+    return JsonResponse({'error': message, **extra}, status=status)
+
+
+def api_view(methods):
+    """
+    Session-authenticated JSON endpoint: 401/403 instead of the login
+    redirect, 405 for other methods. The view gets the user's profile.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                response = error_response('Method not allowed', 405)
+                response['Allow'] = ', '.join(methods)
+                return response
+            if not request.user.is_authenticated:
+                return error_response('Authentication required', 401)
+            try:
+                user_profile = request.user.userprofile
+            except UserProfile.DoesNotExist:
+                return error_response('Please complete your profile first', 403)
+            return view(request, user_profile, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def data_state(user_profile):
+    """
+    Count and latest updated_at of everything the API can show the user:
+    their tasks, the projects they can see, and those projects' owners and
+    members. Every write that changes a response moves one of them: task
+    saves, bulk updates and imports stamp the tasks, task counter and
+    membership changes stamp the project (projects/counters.py,
+    projects/signals.py), and a username change saves the profile. Deletes
+    lower a count.
+    """
+    tasks = tasks_for(user_profile).order_by().aggregate(count=Count('id'), latest=Max('updated_at'))
+    projects = projects_for(user_profile).order_by().aggregate(
+        count=Count('id', distinct=True),
+        latest=Max('updated_at'),
+        owners=Max('user__updated_at'),
+        members=Max('members__updated_at'),
+    )
+    return [tasks['count'], tasks['latest'], *projects.values()]
+
+
+def data_etag(request, *args, **kwargs):
+    """
+    ETag for any GET of the API: the state of the user's data and the full
+    URL. The response body is a function of both, so the tag is strong.
+    """
+    # Already loaded along with the user
+    user_profile = getattr(request.user, 'userprofile', None)
+    if user_profile is None:
+        return None
+    state = [str(value) for value in data_state(user_profile)]
+    key = '|'.join([API_VERSION, str(user_profile.id), *state, request.get_full_path()])
+    return hashlib.sha256(key.encode()).hexdigest()[:32]
+
+
+def conditional(view):
+    """Answer matching If-None-Match with 304 before `view` runs"""
+    view = condition(etag_func=data_etag)(view)
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        if request.method in ('GET', 'HEAD'):
+            # Per user, and always revalidated
+            response['Cache-Control'] = 'private, no-cache'
+            response['Vary'] = 'Cookie'
+        return response
+    return wrapper
+
+
+def parse_body(request):
+    try:
+        return json.loads(request.body or b'{}')
+    except ValueError:
+        raise ValidationFailed({'': 'Request body must be JSON'})
+
+
+def detail_response(resource, instance, names, status=200):
+    return JsonResponse({'data': resource.serialize(instance, names)}, status=status)
+
+
+def page_response(request, resource, rows, names, next_cursor):
+    links = {}
+    if next_cursor:
+        params = request.GET.copy()
+        params['cursor'] = next_cursor
+        links['next'] = f"{request.path}?{params.urlencode()}"
+    return JsonResponse({
+        'data': [resource.serialize(row, names) for row in rows],
+        'next_cursor': next_cursor,
+        'links': links,
+    })
+
+
+# Tasks
+
+@api_view(['GET', 'HEAD', 'POST'])
+@conditional
+@query_budget(queries=6, time=100)
+def task_collection(request, user_profile):
+    if request.method == 'POST':
+        return create_task(request, user_profile)
+
+    try:
+        names = TASKS.parse_fields(request.GET.get('fields'))
+    except InvalidFields as exc:
+        return error_response(str(exc), 400)
+
+    # Same filters (status, priority, project_id, search) and sort modes as
+    # the task list page
+    sort = clean_sort(request.GET.get('sort'))
+    mode = SORT_MODES[sort]
+    sort_columns = [] if mode.expression is not None else [mode.key]
+    tasks = TASKS.narrow(filter_tasks(request.GET, user_profile), names, sort_columns)
+    try:
+        page, next_cursor = paginate_tasks(
+            tasks, sort, request.GET.get('cursor'), clean_page_size(request.GET.get('page_size'))
+        )
+    except InvalidCursor as exc:
+        return error_response(str(exc), 400)
+    return page_response(request, TASKS, page, names, next_cursor)
+
+
+def create_task(request, user_profile):
+    try:
+        values = clean_task_data(parse_body(request), user_profile)
+    except ValidationFailed as exc:
+        return error_response('Invalid data', 400, fields=exc.errors)
+
+    task = Task(user=user_profile)
+    apply_task_data(task, values)
+    task.save()
+    return detail_response(TASKS, task, TASKS.default_fields, status=201)
+
+
+@api_view(['GET', 'HEAD', 'PUT', 'PATCH', 'DELETE'])
+@conditional
+@query_budget(queries=6, time=50)
+def task_detail(request, user_profile, task_id):
+    if request.method in ('GET', 'HEAD'):
+        try:
+            names = TASKS.parse_fields(request.GET.get('fields'))
+        except InvalidFields as exc:
+            return error_response(str(exc), 400)
+        task = TASKS.narrow(tasks_for(user_profile), names).filter(id=task_id).first()
+        if task is None:
+            return error_response('Task not found', 404)
+        return detail_response(TASKS, task, names)
+
+    task = tasks_for(user_profile).filter(id=task_id).first()
+    if task is None:
+        return error_response('Task not found', 404)
+
+    if request.method == 'DELETE':
+        task.delete()
+        return HttpResponse(status=204)
+
+    try:
+        values = clean_task_data(parse_body(request), user_profile, partial=request.method == 'PATCH')
+    except ValidationFailed as exc:
+        return error_response('Invalid data', 400, fields=exc.errors)
+    apply_task_data(task, values)
+    task.save()
+    return detail_response(TASKS, task, TASKS.default_fields)
+
+
+# Projects
+
+def encode_project_cursor(project):
+    value = PROJECT_SORT.dump_value(project.created_at)
+    return signing.dumps({'v': value, 'id': project.id}, salt=PROJECT_CURSOR_SALT, compress=True)
+
+
+def decode_project_cursor(cursor):
+    try:
+        data = signing.loads(cursor, salt=PROJECT_CURSOR_SALT)
+        return PROJECT_SORT.load_value(data['v']), int(data['id'])
+    except (signing.BadSignature, KeyError, TypeError, ValueError) as exc:
+        raise InvalidCursor('Invalid cursor') from exc
+
+
+@api_view(['GET', 'HEAD', 'POST'])
+@conditional
+@query_budget(queries=6, time=100)
+def project_collection(request, user_profile):
+    if request.method == 'POST':
+        return create_project(request, user_profile)
+
+    try:
+        names = PROJECTS.parse_fields(request.GET.get('fields'))
+    except InvalidFields as exc:
+        return error_response(str(exc), 400)
+
+    projects = PROJECTS.narrow(projects_for(user_profile), names, [PROJECT_SORT.key])
+    projects = projects.order_by(*PROJECT_SORT.ordering())
+    cursor = request.GET.get('cursor')
+    if cursor:
+        try:
+            value, project_id = decode_project_cursor(cursor)
+        except InvalidCursor as exc:
+            return error_response(str(exc), 400)
+        projects = projects.filter(PROJECT_SORT.after(value, project_id))
+
+    page_size = clean_page_size(request.GET.get('page_size'))
+    # One extra row tells us whether there is a next page
+    page = list(projects[:page_size + 1])
+    next_cursor = None
+    if len(page) > page_size:
+        page = page[:page_size]
+        next_cursor = encode_project_cursor(page[-1])
+    return page_response(request, PROJECTS, page, names, next_cursor)
+
+
+def create_project(request, user_profile):
+    try:
+        values = clean_project_data(parse_body(request))
+    except ValidationFailed as exc:
+        return error_response('Invalid data', 400, fields=exc.errors)
+
+    project = Project.objects.create(user=user_profile, **values)
+    return detail_response(PROJECTS, project, PROJECTS.default_fields, status=201)
+
+
+@api_view(['GET', 'HEAD', 'PUT', 'PATCH', 'DELETE'])
+@conditional
+@query_budget(queries=6, time=50)
+def project_detail(request, user_profile, project_id):
+    if request.method in ('GET', 'HEAD'):
+        try:
+            names = PROJECTS.parse_fields(request.GET.get('fields'))
+        except InvalidFields as exc:
+            return error_response(str(exc), 400)
+        project = PROJECTS.narrow(projects_for(user_profile), names).filter(id=project_id).first()
+        if project is None:
+            return error_response('Project not found', 404)
+        return detail_response(PROJECTS, project, names)
+
+    # Members can read a project; only its owner can change it
+    project = projects_for(user_profile).filter(id=project_id).first()
+    if project is None:
+        return error_response('Project not found', 404)
+    if project.user_id != user_profile.id:
+        return error_response('Only the project owner can change it', 403)
+
+    if request.method == 'DELETE':
+        project.delete()
+        return HttpResponse(status=204)
+
+    try:
+        values = clean_project_data(parse_body(request), partial=request.method == 'PATCH')
+    except ValidationFailed as exc:
+        return error_response('Invalid data', 400, fields=exc.errors)
+    for name, value in values.items():
+        setattr(project, name, value)
+    project.save()
+    return detail_response(PROJECTS, project, PROJECTS.default_fields)
@@ -0,0 +1,138 @@
+import mimetypes
+import os
+from functools import lru_cache
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed, SuspiciousFileOperation
+from django.http import FileResponse, HttpResponseNotModified
+from django.middleware.gzip import GZipMiddleware
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+
+# Content-Encoding: suffix of the precompressed copy (see storage.py), best first
+ENCODINGS = {
+    'br': '.br',
+    'gzip': '.gz',
+}
+
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+# Content types worth compressing; the rest (pictures, PDFs, archives) are
+# compressed already
+COMPRESSIBLE_TYPES = {
+    'application/javascript', 'application/json', 'application/xml', 'image/svg+xml',
+    'text/css', 'text/csv', 'text/html', 'text/javascript', 'text/plain', 'text/xml',
+}
+
+
+@lru_cache(maxsize=64)
+def encoding_qualities(header):
+    """{coding: q-value} of an Accept-Encoding header, e.g. 'gzip;q=0.5, br'"""
+    qualities = {}
+    for coding in header.split(','):
+        name, *params = coding.split(';')
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name.strip():
+            qualities[name.strip().lower()] = quality
+    return qualities
+
+
+def accepts(request, encoding):
+    """Whether the request accepts `encoding`; q=0 refuses it"""
+    qualities = encoding_qualities(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    return qualities.get(encoding, qualities.get('*', 0)) > 0
+
+
+class StaticFilesMiddleware:
+    """
+    Serves the files collected into STATIC_ROOT (see storage.py) when DEBUG
+    is off, picking their precompressed copy the browser accepts. Hashed
+    names never change content, so they are cached for a year without
+    revalidation; other names for STATIC_MAX_AGE seconds.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if settings.DEBUG or not settings.STATIC_ROOT or not settings.STATIC_URL.startswith('/'):
+            # The development server serves static files itself, and a CDN
+            # or other host needs no help
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        self.prefix = settings.STATIC_URL
+        self.max_age = getattr(settings, 'STATIC_MAX_AGE', 60 * 60)
+        self.hashed_names = set(getattr(staticfiles_storage, 'hashed_files', {}).values())
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return self.serve(request) or self.get_response(request)
+
+    async def __acall__(self, request):
+        return self.serve(request) or await self.get_response(request)
+
+    def serve(self, request):
+        """Response for a static file, or None to handle the request as usual"""
+        if request.method not in ('GET', 'HEAD') or not request.path.startswith(self.prefix):
+            return None
+        name = request.path.removeprefix(self.prefix)
+        try:
+            path = safe_join(settings.STATIC_ROOT, name)
+        except SuspiciousFileOperation:
+            return None
+        if not os.path.isfile(path):
+            return None
+
+        variants = [(encoding, path + suffix) for encoding, suffix in ENCODINGS.items() if os.path.isfile(path + suffix)]
+        encoding, served = next(
+            ((encoding, variant) for encoding, variant in variants if accepts(request, encoding)),
+            (None, path),
+        )
+        modified = os.stat(served).st_mtime
+        if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), modified):
+            response = HttpResponseNotModified()
+        else:
+            content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+            response = FileResponse(open(served, 'rb'), content_type=content_type)
+            if encoding:
+                response.headers['Content-Encoding'] = encoding
+            response.headers['Last-Modified'] = http_date(modified)
+
+        if variants:
+            patch_vary_headers(response, ['Accept-Encoding'])
+        if name in self.hashed_names:
+            patch_cache_control(response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+        else:
+            patch_cache_control(response, public=True, max_age=self.max_age)
+        return response
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware for the dynamic responses worth it: HTML pages, JSON and
+    exports. Event streams (live/) are left alone, compression would hold
+    back each event until enough of them fill a block.
+    """
+
+    def process_response(self, request, response):
+        content_type = response.get('Content-Type', '').split(';')[0].strip()
+        if content_type not in COMPRESSIBLE_TYPES:
+            return response
+        return super().process_response(request, response)
@@ -0,0 +1,196 @@
+"""
+A conservative JavaScript minifier.
+
+It removes what the static/js sources carry for their readers: comments,
+indentation, blank lines and spaces between tokens, plus console.log() and
+console.debug() calls (console.error and console.warn stay, they report real
+failures). Nothing is renamed or reordered, and line breaks are kept, so
+automatic semicolon insertion works as it did in the source and errors in
+the browser still point at a recognizable line.
+
+Strings, template literals and regular expression literals are copied as
+they are. Whether a `/` starts a regular expression or divides is decided
+from the token before it, the way the sources are written; a `/` after `)`
+or `]` is taken as division.
+"""
+import re
+
+
+IDENTIFIER = re.compile(r'[A-Za-z0-9_$]+')
+WHITESPACE = re.compile(r'\s+')
+
+# console.<method>( calls dropped, arguments and all
+DROPPED_CONSOLE = re.compile(r'console\s*\.\s*(?:log|debug)\s*\(')
+
+# Keywords a regular expression literal can follow
+REGEX_KEYWORDS = {
+    'await', 'case', 'delete', 'do', 'else', 'in', 'instanceof', 'new',
+    'of', 'return', 'throw', 'typeof', 'void', 'yield',
+}
+
+OPENING = {'(': ')', '[': ']', '{': '}'}
+
+
+class _Minifier:
+    def __init__(self, source):
+        self.source = source
+        self.position = 0
+        self.out = []
+        # Last character and identifier written, for telling regular
+        # expressions from division
+        self.last = ''
+        self.word = ''
+
+    def write(self, text, significant=True):
+        if significant and self.out and self.out[-1] == ' ' and not self.space_needed(text[0]):
+            self.out.pop()
+        self.out.append(text)
+        if significant:
+            self.last = text[-1]
+            self.word = text if IDENTIFIER.fullmatch(text) else ''
+
+    def space_needed(self, next_char):
+        """Whether a space between the last character and `next_char` matters"""
+        if IDENTIFIER.match(self.last) and IDENTIFIER.match(next_char):
+            return True
+        if next_char == '.' and self.word[:1].isdigit():
+            # 1 .toString()
+            return True
+        # a + +b, a - -b, and no // or /* out of a division and a regex
+        return (self.last + next_char) in ('++', '--', '+-', '-+', '//', '/*', '*/')
+
+    def regex_allowed(self):
+        if not self.last:
+            return True
+        if self.word:
+            return self.word in REGEX_KEYWORDS
+        return self.last not in ')]' and not IDENTIFIER.match(self.last)
+
+    def whitespace(self, text):
+        if not self.out or self.out[-1] == '\n':
+            return
+        if '\n' in text:
+            while self.out and self.out[-1] == ' ':
+                self.out.pop()
+            if self.out and self.out[-1] != '\n':
+                self.write('\n', significant=False)
+        elif self.out[-1] != ' ':
+            self.write(' ', significant=False)
+
+    def code(self, closing=None):
+        """
+        Copy code until the `closing` bracket that ends it (consumed) or the
+        end of the source
+        """
+        source = self.source
+        expected = []
+        while self.position < len(source):
+            char = source[self.position]
+            if char == closing and not expected:
+                self.position += 1
+                return
+            if char in OPENING:
+                expected.append(OPENING[char])
+            elif expected and char == expected[-1]:
+                expected.pop()
+
+            if char.isspace():
+                match = WHITESPACE.match(source, self.position)
+                self.whitespace(match.group())
+                self.position = match.end()
+            elif char in '\'"':
+                self.string(char)
+            elif char == '`':
+                self.template()
+            elif char == '/' and source.startswith('//', self.position):
+                end = source.find('\n', self.position)
+                self.position = len(source) if end == -1 else end
+            elif char == '/' and source.startswith('/*', self.position):
+                end = source.find('*/', self.position + 2)
+                end = len(source) if end == -1 else end + 2
+                self.whitespace('\n' if '\n' in source[self.position:end] else ' ')
+                self.position = end
+            elif char == '/' and self.regex_allowed():
+                self.regex()
+            elif IDENTIFIER.match(char):
+                self.identifier()
+            else:
+                self.write(char)
+                self.position += 1
+
+    def identifier(self):
+        match = IDENTIFIER.match(self.source, self.position)
+        call = DROPPED_CONSOLE.match(self.source, self.position)
+        if call and self.last != '.':
+            # Skip the arguments with a throwaway output
+            out, self.out = self.out, []
+            self.position = call.end()
+            self.code(closing=')')
+            self.out = out
+            self.write('void')
+            self.write(' ', significant=False)
+            self.write('0')
+            return
+        self.write(match.group())
+        self.position = match.end()
+
+    def string(self, quote):
+        source = self.source
+        end = self.position + 1
+        while end < len(source) and source[end] != quote:
+            end += 2 if source[end] == '\\' else 1
+        self.write(source[self.position:end + 1])
+        self.position = end + 1
+
+    def template(self):
+        source = self.source
+        self.write('`')
+        self.position += 1
+        start = self.position
+        while self.position < len(source):
+            char = source[self.position]
+            if char == '\\':
+                self.position += 2
+            elif char == '`':
+                self.position += 1
+                self.write(source[start:self.position])
+                return
+            elif source.startswith('${', self.position):
+                self.write(source[start:self.position + 2])
+                self.position += 2
+                self.code(closing='}')
+                self.write('}')
+                start = self.position
+            else:
+                self.position += 1
+        self.write(source[start:])
+
+    def regex(self):
+        source = self.source
+        end = self.position + 1
+        in_class = False
+        while end < len(source) and source[end] != '\n':
+            char = source[end]
+            if char == '\\':
+                end += 2
+                continue
+            if char == '[':
+                in_class = True
+            elif char == ']':
+                in_class = False
+            elif char == '/' and not in_class:
+                break
+            end += 1
+        flags = IDENTIFIER.match(source, end + 1)
+        end = flags.end() if flags else end + 1
+        self.write(source[self.position:end])
+        self.position = end
+
+    def minify(self):
+        self.code()
+        return ''.join(self.out).strip() + '\n'
+
+
+def minify_js(source):
+    """`source` (str) minified"""
+    return _Minifier(source).minify()
@@ -0,0 +1,132 @@
+"""
+The production static files pipeline, run by `python manage.py collectstatic`.
+
+After the files are collected into STATIC_ROOT, PipelineStorage:
+
+1. minifies the JavaScript listed in STATIC_BUNDLES (see minify.py) and
+   concatenates each bundle into BUNDLE_DIR/<name>.js
+2. copies every file under a name with a hash of its content, the way
+   ManifestStaticFilesStorage does, and records the names in
+   staticfiles.json; hashes are taken after minifying
+3. writes a gzip (.gz) and, when the brotli package is installed, a Brotli
+   (.br) compressed copy next to each compressible file
+
+{% static %} and {% javascript %} (templatetags/assets.py) then link the
+hashed names, whose content never changes, and StaticFilesMiddleware serves
+them with far-future immutable cache headers and the smallest encoding the
+browser accepts. Until collectstatic has run (development, tests) the names
+are left as they are.
+"""
+import gzip
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+
+from .minify import minify_js
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+
+BUNDLE_DIR = 'js/bundles'
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.json', '.map', '.svg', '.txt', '.html', '.xml', '.ico')
+
+# Smaller files gain less than the extra request headers cost
+MIN_COMPRESS_SIZE = 256
+
+
+def bundles():
+    """{name: [source path, ...]} of STATIC_BUNDLES"""
+    return getattr(settings, 'STATIC_BUNDLES', {})
+
+
+def bundle_path(name):
+    return f'{BUNDLE_DIR}/{name}.js'
+
+
+def bundle_files(name):
+    """
+    Static paths to include for bundle `name`: the bundle itself once
+    collected, else its sources
+    """
+    try:
+        sources = bundles()[name]
+    except KeyError:
+        raise ImproperlyConfigured(f"No bundle '{name}' in STATIC_BUNDLES") from None
+    path = bundle_path(name)
+    if not settings.DEBUG and path in getattr(staticfiles_storage, 'hashed_files', {}):
+        return [path]
+    return list(sources)
+
+
+def compress(data):
+    """{encoding suffix: compressed data} of the encodings worth serving"""
+    variants = {'.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(data, quality=11)
+    # Not worth it unless it saves a few percent
+    return {suffix: variant for suffix, variant in variants.items() if len(variant) < len(data) * 0.95}
+
+
+class PipelineStorage(ManifestStaticFilesStorage):
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # Not collected: development, tests, or a file added since
+            return name
+
+    def replace(self, name, content):
+        if self.exists(name):
+            self.delete(name)
+        self._save(name, ContentFile(content))
+
+    def read_source(self, paths, path):
+        try:
+            storage, source_path = paths[path]
+        except KeyError:
+            raise ImproperlyConfigured(f"Static file '{path}' of STATIC_BUNDLES wasn't collected") from None
+        with storage.open(source_path) as source_file:
+            return source_file.read().decode('utf-8')
+
+    def build_bundles(self, paths):
+        """Minify the bundle sources in place and write the bundles"""
+        minified = {}
+        for sources in bundles().values():
+            for path in sources:
+                if path not in minified:
+                    minified[path] = minify_js(self.read_source(paths, path))
+        for path, content in minified.items():
+            self.replace(path, content.encode('utf-8'))
+            # Hashed from the minified copy, not the source
+            paths[path] = (self, path)
+        for name, sources in bundles().items():
+            path = bundle_path(name)
+            # ; in case a file ends in an expression without one
+            self.replace(path, ';\n'.join(minified[source] for source in sources).encode('utf-8'))
+            paths[path] = (self, path)
+
+    def compress_files(self, names):
+        for name in names:
+            if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+                continue
+            with self.open(name) as stored_file:
+                data = stored_file.read()
+            if len(data) < MIN_COMPRESS_SIZE:
+                continue
+            for suffix, variant in compress(data).items():
+                self.replace(name + suffix, variant)
+
+    def post_process(self, paths, dry_run=False, **options):
+        if dry_run:
+            yield from super().post_process(paths, dry_run, **options)
+            return
+        paths = dict(paths)
+        self.build_bundles(paths)
+        yield from super().post_process(paths, dry_run, **options)
+        self.compress_files([*paths, *self.hashed_files.values()])
@@ -0,0 +1,23 @@
+from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html_join
+
+from ..storage import bundle_files
+
+register = template.Library()
+
+
+@register.simple_tag
+def javascript(name, **attributes):
+    """
+    <script> tags of the STATIC_BUNDLES bundle `name`: the minified bundle
+    once collected, its sources one by one until then. Keyword arguments
+    become attributes, with underscores as dashes.
+    Usage: {% javascript 'live' data_live_url=live_url %}
+    """
+    attributes = format_html_join(
+        '', ' {}="{}"', ((key.replace('_', '-'), value) for key, value in attributes.items()),
+    )
+    return format_html_join(
+        '\n', '<script src="{}"{}></script>', ((static(path), attributes) for path in bundle_files(name)),
+    )
@@ -0,0 +1,154 @@
+import gzip
+import json
+import shutil
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.http import HttpResponse, StreamingHttpResponse
+from django.template import Context, Template
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from .middleware import CompressionMiddleware, accepts
+from .minify import minify_js
+from .storage import bundle_path
+
+
+class MinifyTests(SimpleTestCase):
+    def test_comments_and_indentation(self):
+        source = (
+            '// Setup\n'
+            'function add(a, b) {\n'
+            '    /* the sum */\n'
+            '    return a + b;\n'
+            '}\n'
+            '\n'
+            'const total = add(1, 2);\n'
+        )
+        self.assertEqual(minify_js(source), 'function add(a,b){\nreturn a+b;\n}\nconst total=add(1,2);\n')
+
+    def test_literals_kept(self):
+        source = (
+            "const url = 'http://example.com/a  b'; // not a comment in the string\n"
+            'const label = `Due ${ format(date, "d/m") } // ${count}`;\n'
+            'const pattern = /\\/\\*[ /]+/g.test(text) / 2;\n'
+        )
+        self.assertEqual(minify_js(source), (
+            "const url='http://example.com/a  b';\n"
+            'const label=`Due ${format(date,"d/m")} // ${count}`;\n'
+            'const pattern=/\\/\\*[ /]+/g.test(text)/2;\n'
+        ))
+
+    def test_console_log_dropped(self):
+        source = (
+            "console.log('Loaded', `${count} tasks`, items.map(item => item.id));\n"
+            'if (failed) console.error(error);\n'
+            'logger.console.log(1);\n'
+        )
+        self.assertEqual(minify_js(source), 'void 0;\nif(failed)console.error(error);\nlogger.console.log(1);\n')
+
+    def test_tokens_kept_apart(self):
+        self.assertEqual(minify_js('let x = a + +b - -c;\nreturn 1 .toFixed(2);'), 'let x=a+ +b- -c;\nreturn 1 .toFixed(2);\n')
+
+
+class PipelineTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        static_root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, static_root)
+        cls.enterClassContext(override_settings(STATIC_ROOT=static_root))
+        call_command('collectstatic', interactive=False, verbosity=0)
+        with open(f'{static_root}/staticfiles.json', encoding='utf-8') as manifest:
+            cls.hashed = json.load(manifest)['paths']
+
+    def test_bundles_collected(self):
+        bundle = self.hashed[bundle_path('project_detail')]
+        response = self.client.get(f'/static/{bundle}')
+        content = b''.join(response.streaming_content).decode()
+        self.assertNotIn('console.log', content)
+        # Both sources, minified
+        self.assertIn('function initializeProjectToggle(){\nconst toggleButtons=', content)
+        self.assertIn('function initializeTaskToggle(root=document){\nconst toggleButtons=', content)
+
+    def test_javascript_tag(self):
+        template = Template("{% load assets %}{% javascript 'live' data_live_url='/live/' %}")
+        self.assertHTMLEqual(
+            template.render(Context()),
+            f'<script src="/static/{self.hashed[bundle_path("live")]}" data-live-url="/live/"></script>',
+        )
+
+    def test_hashed_names_immutable(self):
+        response = self.client.get(f"/static/{self.hashed['js/tasks.js']}", HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/javascript')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('max-age=31536000', response['Cache-Control'])
+        self.assertIn(b'function initializeFilters()', gzip.decompress(b''.join(response.streaming_content)))
+
+    def test_refused_encoding(self):
+        response = self.client.get(f"/static/{self.hashed['js/tasks.js']}", HTTP_ACCEPT_ENCODING='gzip;q=0, deflate')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Content-Encoding', response)
+
+    def test_accepts(self):
+        for header, gzip_accepted, br_accepted in [
+            ('', False, False),
+            ('gzip, deflate, br', True, True),
+            ('GZIP;q=0.5,brotli', True, False),
+            ('gzip;q=0, br;q=0.0', False, False),
+            ('br ; q=1.0, gzip; q=0.000', False, True),
+            ('*', True, True),
+            ('*;q=0.1, gzip;q=0', False, True),
+        ]:
+            with self.subTest(header):
+                request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=header)
+                self.assertEqual(accepts(request, 'gzip'), gzip_accepted)
+                self.assertEqual(accepts(request, 'br'), br_accepted)
+
+    @override_settings(STATIC_MAX_AGE=600)
+    def test_plain_names_revalidated(self):
+        response = self.client.get('/static/js/tasks.js')
+        self.assertNotIn('Content-Encoding', response)
+        self.assertEqual(response['Cache-Control'], 'public, max-age=600')
+
+        response = self.client.get('/static/js/tasks.js', HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_outside_static_root(self):
+        self.assertEqual(self.client.get('/static/../manage.py').status_code, 404)
+        self.assertEqual(self.client.get('/static/js/missing.js').status_code, 404)
+
+    @override_settings(DEBUG=True)
+    def test_sources_with_debug(self):
+        template = Template("{% load assets %}{% javascript 'project_detail' %}")
+        self.assertHTMLEqual(
+            template.render(Context()),
+            '<script src="/static/js/projects.js"></script><script src="/static/js/tasks.js"></script>',
+        )
+
+
+class CompressionTests(TestCase):
+    def test_pages_compressed(self):
+        user = User.objects.create(username='compressed')
+        self.client.force_login(user)
+        response = self.client.get(reverse('tasks:task_list'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn(b'</html>', gzip.decompress(response.content))
+
+    def test_event_streams_not_compressed(self):
+        request = RequestFactory().get('/live/', HTTP_ACCEPT_ENCODING='gzip')
+        middleware = CompressionMiddleware(
+            lambda request: StreamingHttpResponse(iter(['data: {}\n\n']), content_type='text/event-stream'),
+        )
+        response = middleware(request)
+        self.assertNotIn('Content-Encoding', response)
+        self.assertEqual(b''.join(response.streaming_content), b'data: {}\n\n')
+
+    def test_binary_not_compressed(self):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+        middleware = CompressionMiddleware(lambda request: HttpResponse(b'\x89PNG' * 100, content_type='image/png'))
+        self.assertNotIn('Content-Encoding', middleware(request))
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import DashboardWidget, UserStats
+from .models import DashboardWidget, UserStats, DailyTaskStats, ReportJob
 
 @admin.register(DashboardWidget)
 class DashboardWidgetAdmin(admin.ModelAdmin):
@@ -15,3 +15,17 @@ class UserStatsAdmin(admin.ModelAdmin):
     list_filter = ['last_updated']
     search_fields = ['user__username']
     readonly_fields = ['last_updated']
+
+@admin.register(DailyTaskStats)
+class DailyTaskStatsAdmin(admin.ModelAdmin):
+    list_display = ['user', 'date', 'created', 'completed', 'reopened']
+    list_filter = ['date']
+    search_fields = ['user__user__username']
+    readonly_fields = ['user', 'date', 'created', 'completed', 'reopened']
+
+@admin.register(ReportJob)
+class ReportJobAdmin(admin.ModelAdmin):
+    list_display = ['user', 'report_type', 'format', 'start', 'end', 'status', 'size', 'created_at', 'finished_at']
+    list_filter = ['status', 'report_type', 'format', 'created_at']
+    search_fields = ['user__user__username']
+    readonly_fields = ['request_key', 'digest', 'size', 'error', 'created_at', 'started_at', 'heartbeat_at', 'finished_at']
@@ -0,0 +1,147 @@
+"""
+Per-view latency benchmark over every named URL of the project.
+
+url_targets() walks the URLconf and fills in path parameters (task_id,
+project_id, job_id) with objects of the benchmarking user, skipping views
+it can't build a URL for. run_benchmark() requests each URL through the
+test client, after a few warm-up requests, and reports latency percentiles
+and query counts per view:
+
+    {
+        "tasks:task_list": {
+            "url": "/tasks/", "status": 200, "requests": 50,
+            "p50_ms": 12.1, "p95_ms": 15.3, "p99_ms": 21.0, "mean_ms": 12.6,
+            "queries": 7, "sql_ms": 3.2
+        },
+        ...
+    }
+
+Requests go through the whole middleware stack in-process, without a
+server or network, so numbers are comparable between builds on the same
+machine and data (see the `seed` command), not with production.
+"""
+import statistics
+from dataclasses import dataclass
+from fnmatch import fnmatch
+from time import perf_counter
+
+from django.core.cache import cache
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+
+from projects.models import Project
+from tasks.models import Task
+from .budgets import count_queries
+from .models import ReportJob
+
+
+# Views not worth timing or unsafe to request repeatedly
+EXCLUDED = ['admin:*', 'accounts:logout']
+
+PERCENTILES = [50, 95, 99]
+
+
+@dataclass
+class Target:
+    view_name: str
+    url: str
+
+
+def named_patterns(patterns, namespace=None):
+    """(view name, [path parameter names]) of every named URL pattern"""
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            inner = namespace
+            if pattern.namespace:
+                inner = f'{namespace}:{pattern.namespace}' if namespace else pattern.namespace
+            yield from named_patterns(pattern.url_patterns, inner)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            view_name = f'{namespace}:{pattern.name}' if namespace else pattern.name
+            yield view_name, list(pattern.pattern.regex.groupindex)
+
+
+def parameter_values(user_profile):
+    """Values for the path parameters used in the URLconf, None if missing"""
+    return {
+        'task_id': Task.objects.filter(user=user_profile).order_by('-created_at').values_list('id', flat=True).first(),
+        'project_id': Project.objects.filter(user=user_profile).order_by('-created_at').values_list('id', flat=True).first(),
+        'job_id': ReportJob.objects.filter(user=user_profile).order_by('-id').values_list('id', flat=True).first(),
+    }
+
+
+def url_targets(user_profile, include=None, exclude=EXCLUDED):
+    """
+    ([Target, ...], {view name: reason skipped}) for the views matching the
+    `include` patterns (default: all) and none of the `exclude` ones
+    """
+    values = parameter_values(user_profile)
+    targets = {}
+    skipped = {}
+    for view_name, parameters in named_patterns(get_resolver().url_patterns):
+        if view_name in targets:
+            # Included under more than one prefix
+            continue
+        if include and not any(fnmatch(view_name, pattern) for pattern in include):
+            continue
+        if any(fnmatch(view_name, pattern) for pattern in exclude):
+            continue
+        missing = [name for name in parameters if values.get(name) is None]
+        if missing:
+            skipped[view_name] = f"no value for {', '.join(missing)}"
+            continue
+        targets[view_name] = Target(view_name, reverse(view_name, kwargs={name: values[name] for name in parameters}))
+    return list(targets.values()), skipped
+
+
+def percentile(values, percent):
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method='inclusive')[percent - 1]
+
+
+def timed_request(client, url):
+    """(response, seconds, QueryStats) of one GET, including streamed content"""
+    with count_queries() as stats:
+        started = perf_counter()
+        response = client.get(url)
+        if response.streaming:
+            for chunk in response.streaming_content:
+                pass
+        elapsed = perf_counter() - started
+    # QueryBudgetMiddleware counts the request itself when it is installed
+    return response, elapsed, getattr(response.wsgi_request, 'query_stats', stats)
+
+
+def benchmark_target(client, target, requests, warmup, cold=False):
+    for number in range(warmup):
+        timed_request(client, target.url)
+
+    latencies = []
+    query_counts = []
+    sql_times = []
+    status = None
+    for number in range(requests):
+        if cold:
+            cache.clear()
+        response, elapsed, stats = timed_request(client, target.url)
+        status = response.status_code
+        latencies.append(elapsed * 1000)
+        query_counts.append(stats.count)
+        sql_times.append(stats.time)
+
+    result = {'url': target.url, 'status': status, 'requests': requests}
+    for percent in PERCENTILES:
+        result[f'p{percent}_ms'] = round(percentile(latencies, percent), 2)
+    result['mean_ms'] = round(statistics.fmean(latencies), 2)
+    result['queries'] = round(statistics.median(query_counts))
+    result['sql_ms'] = round(statistics.median(sql_times), 2)
+    return result
+
+
+def run_benchmark(client, targets, requests=20, warmup=2, cold=False, progress=None):
+    """{view name: results} for each Target, requested as the client's user"""
+    results = {}
+    for target in targets:
+        results[target.view_name] = benchmark_target(client, target, requests, warmup, cold)
+        if progress:
+            progress(target.view_name, results[target.view_name])
+    return results
@@ -0,0 +1,204 @@
+"""
+Per-view SQL query budgets.
+
+A view declares the most queries, and optionally the most SQL time, it may
+spend on one request; by default only for reads (GET and HEAD), as writes
+also pay for the counters and rollups kept by signal handlers:
+
+    @login_required
+    @query_budget(queries=6, time=100)
+    def project_list_view(request):
+        ...
+
+QueryBudgetMiddleware counts every query run while a request is handled,
+including those of worker threads started by async views (see
+dashboard.concurrency), and leaves the count on `request.query_stats`. A
+request over its view's budget is handled according to QUERY_BUDGET_MODE:
+
+off    -- don't count anything
+log    -- log a warning (the default, also with DEBUG)
+raise  -- raise QueryBudgetExceeded for too many queries (the default under
+          the test runner, see dashboard.testing.BudgetTestRunner). Going
+          over the SQL time is only logged: it depends on the machine, a
+          cold cache or a paused debugger, not just the code.
+
+Budgets are fixed numbers on purpose: a page whose query count grows with
+the data shown goes over its budget as soon as there is enough data.
+"""
+import logging
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+
+logger = logging.getLogger(__name__)
+
+MODES = ['off', 'log', 'raise']
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class QueryBudget:
+    queries: int
+    # Milliseconds of SQL, None for no limit
+    time: float = None
+    # Request methods the budget applies to
+    methods: tuple = ('GET', 'HEAD')
+
+
+@dataclass
+class QueryStats:
+    """Queries run for one request"""
+    # Milliseconds per query; appended to from several threads
+    durations: list = field(default_factory=list)
+    # (sql, milliseconds) of each query, when recording them
+    queries: list = None
+
+    @property
+    def count(self):
+        return len(self.durations)
+
+    @property
+    def time(self):
+        return sum(self.durations)
+
+    def over(self, budget):
+        """Descriptions of how these stats go over `budget`, if they do"""
+        problems = []
+        if self.count > budget.queries:
+            problems.append(f'{self.count} queries (budget {budget.queries})')
+        if budget.time is not None and self.time > budget.time:
+            problems.append(f'{self.time:.1f}ms of SQL (budget {budget.time}ms)')
+        return problems
+
+
+def query_budget(queries, time=None, methods=('GET', 'HEAD')):
+    """Decorator declaring a view's QueryBudget"""
+    budget = QueryBudget(queries, time, tuple(methods))
+
+    def decorator(view):
+        view.query_budget = budget
+        return view
+    return decorator
+
+
+def get_query_budget(view):
+    """The view's QueryBudget, or None. Also found through functools.wraps"""
+    return getattr(view, 'query_budget', None)
+
+
+# Stats of the request being handled, copied into the threads of
+# sync_to_async() along with the rest of the context
+current_stats = ContextVar('query_stats', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    stats = current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = (perf_counter() - start) * 1000
+        stats.durations.append(duration)
+        if stats.queries is not None:
+            stats.queries.append((sql, duration))
+
+
+def install_recorder(sender, connection, **kwargs):
+    # Connections are per thread and created lazily; every one of them gets
+    # the recorder, which does nothing outside of count_queries(). First in
+    # line, as connection.execute_wrapper() removes the last one on exit.
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+connection_created.connect(install_recorder)
+
+
+class count_queries:
+    """
+    Context manager counting the queries run inside it, in this thread and
+    the threads it hands work to:
+
+        with count_queries() as stats:
+            ...
+        stats.count
+    """
+
+    def __init__(self, record_sql=False):
+        self.stats = QueryStats(queries=[] if record_sql else None)
+
+    def __enter__(self):
+        # This thread's connections may predate this module
+        for connection in connections.all(initialized_only=True):
+            install_recorder(None, connection)
+        self.token = current_stats.set(self.stats)
+        return self.stats
+
+    def __exit__(self, *exc_info):
+        current_stats.reset(self.token)
+
+
+def get_mode():
+    mode = getattr(settings, 'QUERY_BUDGET_MODE', None) or 'log'
+    if mode not in MODES:
+        raise ImproperlyConfigured(f'QUERY_BUDGET_MODE must be one of {", ".join(MODES)}')
+    return mode
+
+
+def check_budget(request, stats):
+    match = request.resolver_match
+    budget = get_query_budget(match.func) if match else None
+    if budget is None or request.method not in budget.methods:
+        return
+    problems = stats.over(budget)
+    if not problems:
+        return
+    message = f"{match.view_name} ({request.path}) went over its query budget: {', '.join(problems)}"
+    if get_mode() == 'raise' and stats.count > budget.queries:
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
+
+
+class QueryBudgetMiddleware:
+    """Counts each request's queries and checks them against its view's budget"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if get_mode() == 'off':
+            return self.get_response(request)
+        with count_queries() as stats:
+            request.query_stats = stats
+            response = self.get_response(request)
+        check_budget(request, stats)
+        return response
+
+    async def __acall__(self, request):
+        if get_mode() == 'off':
+            return await self.get_response(request)
+        with count_queries() as stats:
+            request.query_stats = stats
+            response = await self.get_response(request)
+        check_budget(request, stats)
+        return response
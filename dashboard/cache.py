@@ -0,0 +1,220 @@
+"""
+Versioned per-user cache for dashboard page contexts.
+
+Every user has a data version stored in the cache. Cached contexts are keyed
+by (name, user, version, extra key parts), so bumping the version when one of
+the user's tasks or projects changes makes all of that user's entries
+unreachable without touching anybody else's. Old entries simply age out
+through the backend's TTL and MAX_ENTRIES culling (see CACHES in settings).
+The backend has to be shared by every worker process, or a bump only
+reaches the process that made the change.
+
+get_or_compute() adds single-flight protection: when a key is cold, only one
+caller computes it while the others wait briefly for the result.
+aget_or_compute() is the same for async views.
+"""
+import asyncio
+import threading
+import time
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+
+CACHE_ALIAS = getattr(settings, 'DASHBOARD_CACHE_ALIAS', 'default')
+CACHE_TIMEOUT = getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 300)
+
+# How long a computing caller holds the lock, and how long others wait for
+# it before giving up and computing themselves
+LOCK_TIMEOUT = 30
+LOCK_WAIT = 5
+LOCK_POLL_INTERVAL = 0.05
+
+# Distinguishes "cached None" from "not cached"
+MISSING = object()
+
+# Per-process hit/miss counters, see cache_stats()
+_stats = {'hits': 0, 'misses': 0, 'waits': 0}
+_stats_lock = threading.Lock()
+
+# Serialises threads of this process computing the same key
+_key_locks = {}
+_key_locks_lock = threading.Lock()
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def cache_stats():
+    """Hit/miss counters for this process"""
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_rate'] = round(stats['hits'] / lookups * 100, 1) if lookups else 0
+    return stats
+
+
+def reset_cache_stats():
+    with _stats_lock:
+        for name in _stats:
+            _stats[name] = 0
+
+
+# Versions
+
+def version_key(user_id):
+    return f"dashboard:version:{user_id}"
+
+
+def new_version():
+    # Random rather than a counter, so a version lost to eviction can never
+    # come back and match entries cached under it earlier
+    return uuid.uuid4().hex[:12]
+
+
+def get_version(user_id):
+    cache = get_cache()
+    version = cache.get(version_key(user_id))
+    if version is None:
+        cache.add(version_key(user_id), new_version(), timeout=None)
+        version = cache.get(version_key(user_id))
+    return version
+
+
+def bump_version(*user_ids):
+    """Invalidate every cached entry of the given users"""
+    cache = get_cache()
+    cache.set_many({version_key(user_id): new_version() for user_id in user_ids if user_id}, timeout=None)
+
+
+def bump_version_on_commit(*user_ids):
+    """
+    Bump once the current transaction commits, so no request can cache data
+    read before the change under the new version.
+    """
+    transaction.on_commit(lambda: bump_version(*user_ids))
+
+
+# Lookups
+
+def make_key(name, user_id, version, parts=()):
+    return ':'.join(['dashboard', name, str(user_id), version] + [str(part) for part in parts])
+
+
+def _process_lock(key):
+    with _key_locks_lock:
+        lock = _key_locks.get(key)
+        if lock is None:
+            lock = _key_locks[key] = threading.Lock()
+        return lock
+
+
+def _release_process_lock(key, lock):
+    lock.release()
+    with _key_locks_lock:
+        if _key_locks.get(key) is lock and not lock.locked():
+            del _key_locks[key]
+
+
+def get_or_compute(name, user_id, compute, parts=(), timeout=None):
+    """
+    Return the cached value for (name, user, current version, parts),
+    computing and storing it with compute() on a miss.
+    """
+    cache = get_cache()
+    if timeout is None:
+        timeout = CACHE_TIMEOUT
+    key = make_key(name, user_id, get_version(user_id), parts)
+
+    value = cache.get(key, MISSING)
+    if value is not MISSING:
+        _count('hits')
+        return value
+
+    # Threads of this process queue up here; other processes coordinate
+    # through a lock entry in the shared cache
+    lock = _process_lock(key)
+    lock.acquire()
+    try:
+        value = cache.get(key, MISSING)
+        if value is not MISSING:
+            _count('hits')
+            return value
+
+        lock_key = f"{key}:lock"
+        owns_lock = cache.add(lock_key, 1, timeout=LOCK_TIMEOUT)
+        if not owns_lock:
+            value = _wait_for(cache, key)
+            if value is not MISSING:
+                _count('waits')
+                _count('hits')
+                return value
+
+        _count('misses')
+        try:
+            value = compute()
+            cache.set(key, value, timeout=timeout)
+        finally:
+            if owns_lock:
+                cache.delete(lock_key)
+        return value
+    finally:
+        _release_process_lock(key, lock)
+
+
+async def aget_or_compute(name, user_id, compute, parts=(), timeout=None):
+    """
+    get_or_compute() for async views, where compute is a coroutine function.
+    Concurrent misses coordinate through the lock entry in the shared cache
+    only; waiting callers poll without blocking the event loop.
+    """
+    cache = get_cache()
+    if timeout is None:
+        timeout = CACHE_TIMEOUT
+    key = make_key(name, user_id, await sync_to_async(get_version)(user_id), parts)
+
+    value = await cache.aget(key, MISSING)
+    if value is not MISSING:
+        _count('hits')
+        return value
+
+    lock_key = f"{key}:lock"
+    owns_lock = await cache.aadd(lock_key, 1, timeout=LOCK_TIMEOUT)
+    if not owns_lock:
+        deadline = time.monotonic() + LOCK_WAIT
+        while time.monotonic() < deadline:
+            await asyncio.sleep(LOCK_POLL_INTERVAL)
+            value = await cache.aget(key, MISSING)
+            if value is not MISSING:
+                _count('waits')
+                _count('hits')
+                return value
+
+    _count('misses')
+    try:
+        value = await compute()
+        await cache.aset(key, value, timeout=timeout)
+    finally:
+        if owns_lock:
+            await cache.adelete(lock_key)
+    return value
+
+
+def _wait_for(cache, key):
+    """Poll for a value another process is computing"""
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        value = cache.get(key, MISSING)
+        if value is not MISSING:
+            return value
+    return MISSING
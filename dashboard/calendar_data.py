@@ -0,0 +1,319 @@
+"""
+Calendar data: month grids and per-day task aggregates for a month, a
+quarter or a year.
+
+Per-day counts (total, completed, by priority) come from one query grouped
+by due date, so a year costs the same single query as a month. Task rows are
+only loaded for the month grid, and then at most PREVIEW_TASKS per day, in
+one window query; today's tasks are all loaded since the page lists them.
+
+Grids come from month_weeks(), which is memoized and uses its own
+calendar.Calendar instead of calendar.setfirstweekday(): that changes
+module-global state every other thread of the process reads.
+"""
+import calendar
+from dataclasses import dataclass, field
+from datetime import MAXYEAR, MINYEAR, date
+from functools import lru_cache
+
+from django.db.models import Case, Count, F, Q, Value, When, Window
+from django.db.models.functions import RowNumber
+from django.urls import reverse
+
+from tasks.models import PRIORITY_RANK, Task
+
+
+# Sunday first, US style
+FIRST_WEEKDAY = calendar.SUNDAY
+
+# Tasks shown in a day cell, the rest are summed up as "+N more"
+PREVIEW_TASKS = 3
+
+# Row limit standing for "all of them"
+NO_LIMIT = 2 ** 31 - 1
+
+# Months covered by each range
+RANGE_MONTHS = {
+    'month': 1,
+    'quarter': 3,
+    'year': 12,
+}
+
+# Task columns the calendar displays
+TASK_COLUMNS = ['id', 'title', 'description', 'priority', 'completed', 'due_date']
+
+
+@lru_cache(maxsize=1024)
+def month_weeks(year, month, firstweekday=FIRST_WEEKDAY):
+    """Weeks of a month as tuples of day numbers, 0 for days outside it"""
+    weeks = calendar.Calendar(firstweekday).monthdayscalendar(year, month)
+    return tuple(tuple(week) for week in weeks)
+
+
+def weekday_names(firstweekday=FIRST_WEEKDAY):
+    return [calendar.day_abbr[(firstweekday + offset) % 7] for offset in range(7)]
+
+
+def shift_month(year, month, offset):
+    """(year, month) `offset` months away"""
+    index = year * 12 + month - 1 + offset
+    return index // 12, index % 12 + 1
+
+
+def month_last_day(year, month):
+    return date(year, month, calendar.monthrange(year, month)[1])
+
+
+def clean_month(params, today):
+    """(year, month) from ?year=&month=, today's month if missing or invalid"""
+    try:
+        year = int(params.get('year', today.year))
+        month = int(params.get('month', today.month))
+    except (TypeError, ValueError):
+        return today.year, today.month
+    # Keep a month on either side, for the navigation links
+    if not (MINYEAR < year < MAXYEAR and 1 <= month <= 12):
+        return today.year, today.month
+    return year, month
+
+
+def range_months(range_name, year, month):
+    """
+    [(year, month), ...] of a range: the month itself, its quarter or its
+    year
+    """
+    count = RANGE_MONTHS[range_name]
+    if range_name == 'quarter':
+        month = (month - 1) // 3 * 3 + 1
+    elif range_name == 'year':
+        month = 1
+    return [shift_month(year, month, offset) for offset in range(count)]
+
+
+# Aggregates
+
+@dataclass(frozen=True)
+class DayCounts:
+    total: int = 0
+    completed: int = 0
+    high: int = 0
+    medium: int = 0
+    low: int = 0
+
+    @property
+    def open(self):
+        return self.total - self.completed
+
+    def as_dict(self):
+        return {
+            'total': self.total,
+            'completed': self.completed,
+            'open': self.open,
+            'high': self.high,
+            'medium': self.medium,
+            'low': self.low,
+        }
+
+
+EMPTY_DAY = DayCounts()
+
+
+def day_count_rows(tasks, start, end):
+    """Per due date count rows of `tasks`, for the days from start to end"""
+    return (
+        tasks.filter(due_date__range=[start, end])
+        .order_by()
+        .values('due_date')
+        .annotate(
+            n_total=Count('id'),
+            n_completed=Count('id', filter=Q(completed=True)),
+            n_high=Count('id', filter=Q(priority='high')),
+            n_medium=Count('id', filter=Q(priority='medium')),
+            n_low=Count('id', filter=Q(priority='low')),
+        )
+    )
+
+
+def day_counts(tasks, start, end):
+    """{due date: DayCounts} for the days from start to end that have tasks"""
+    counts = {}
+    for row in day_count_rows(tasks, start, end):
+        day = row.pop('due_date')
+        counts[day] = DayCounts(**{key[2:]: value for key, value in row.items()})
+    return counts
+
+
+def preview_rows(tasks, start, end, today):
+    """
+    `tasks` due from start to end, by day and highest priority first:
+    PREVIEW_TASKS per day, all of them for today
+    """
+    return (
+        tasks.filter(due_date__range=[start, end])
+        .only(*TASK_COLUMNS)
+        .annotate(day_rank=Window(
+            RowNumber(),
+            partition_by=[F('due_date')],
+            order_by=[PRIORITY_RANK.asc(), F('id').asc()],
+        ))
+        # A single condition on the window, since Django can't OR one with
+        # a plain field lookup
+        .filter(day_rank__lte=Case(
+            When(due_date=today, then=Value(NO_LIMIT)),
+            default=Value(PREVIEW_TASKS),
+        ))
+        .order_by('due_date', 'day_rank')
+    )
+
+
+def preview_tasks(tasks, start, end, today):
+    """{due date: [Task, ...]} of preview_rows()"""
+    by_day = {}
+    for task in preview_rows(tasks, start, end, today):
+        by_day.setdefault(task.due_date, []).append(task)
+    return by_day
+
+
+# Calendar
+
+@dataclass
+class CalendarDay:
+    date: date
+    counts: DayCounts = EMPTY_DAY
+    # Highest priority first, PREVIEW_TASKS of them (all for today)
+    tasks: list = field(default_factory=list)
+
+    @property
+    def day(self):
+        return self.date.day
+
+    @property
+    def preview(self):
+        return self.tasks[:PREVIEW_TASKS]
+
+    @property
+    def more(self):
+        """Tasks not in the preview"""
+        return max(self.counts.total - PREVIEW_TASKS, 0)
+
+
+@dataclass
+class CalendarMonth:
+    year: int
+    month: int
+    # Weeks of CalendarDay, None for days outside the month
+    weeks: list
+
+    @property
+    def name(self):
+        return calendar.month_name[self.month]
+
+    def as_dict(self):
+        return {
+            'year': self.year,
+            'month': self.month,
+            'name': self.name,
+            'weeks': [list(week) for week in month_weeks(self.year, self.month)],
+        }
+
+
+@dataclass
+class CalendarData:
+    range_name: str
+    start: date
+    end: date
+    today: date
+    months: list
+    # {due date: DayCounts}, only days with tasks
+    counts: dict
+    # {due date: [Task, ...]}, month ranges only
+    tasks: dict
+    overdue: int = 0
+
+    @property
+    def total(self):
+        return sum(counts.total for counts in self.counts.values())
+
+    @property
+    def completed(self):
+        return sum(counts.completed for counts in self.counts.values())
+
+    @property
+    def today_tasks(self):
+        return self.tasks.get(self.today, [])
+
+    def as_dict(self):
+        first = self.months[0]
+        return {
+            'range': self.range_name,
+            'start': self.start.isoformat(),
+            'end': self.end.isoformat(),
+            'today': self.today.isoformat(),
+            'weekdays': weekday_names(),
+            'months': [month.as_dict() for month in self.months],
+            'previous': dict(zip(['year', 'month'], shift_month(first.year, first.month, -len(self.months)))),
+            'next': dict(zip(['year', 'month'], shift_month(first.year, first.month, len(self.months)))),
+            'totals': {
+                'total': self.total,
+                'completed': self.completed,
+                'overdue': self.overdue,
+            },
+            'days': {day.isoformat(): counts.as_dict() for day, counts in sorted(self.counts.items())},
+            'tasks': {
+                day.isoformat(): [
+                    {
+                        'id': task.id,
+                        'title': task.title,
+                        'description': task.description,
+                        'priority': task.priority,
+                        'priority_display': task.get_priority_display(),
+                        'completed': task.completed,
+                        'url': reverse('tasks:task_detail', args=[task.id]),
+                    }
+                    for task in tasks
+                ]
+                for day, tasks in sorted(self.tasks.items())
+            },
+        }
+
+
+def build_calendar(user_profile, today, year, month, range_name='month'):
+    """
+    CalendarData for the month, quarter or year containing year/month.
+    Three queries: the per-day counts, the overdue count and, for a single
+    month, the task previews.
+    """
+    months = range_months(range_name, year, month)
+    start = date(*months[0], 1)
+    end = month_last_day(*months[-1])
+    tasks = Task.objects.filter(user=user_profile)
+
+    counts = day_counts(tasks, start, end)
+    previews = preview_tasks(tasks, start, end, today) if range_name == 'month' else {}
+    # Served by the partial index on open tasks
+    overdue = tasks.filter(completed=False, due_date__lt=today).count()
+
+    calendar_months = []
+    for month_year, month_number in months:
+        weeks = []
+        for week in month_weeks(month_year, month_number):
+            cells = []
+            for day_number in week:
+                if not day_number:
+                    cells.append(None)
+                    continue
+                day = date(month_year, month_number, day_number)
+                cells.append(CalendarDay(day, counts.get(day, EMPTY_DAY), previews.get(day, [])))
+            weeks.append(cells)
+        calendar_months.append(CalendarMonth(month_year, month_number, weeks))
+
+    return CalendarData(
+        range_name=range_name,
+        start=start,
+        end=end,
+        today=today,
+        months=calendar_months,
+        counts=counts,
+        tasks=previews,
+        overdue=overdue,
+    )
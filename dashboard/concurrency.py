@@ -0,0 +1,60 @@
+"""
+Concurrent queries for async views.
+
+Django's async ORM methods (aget(), acount(), ...) all run on one shared
+thread with one connection, so gathering them doesn't overlap anything.
+run_concurrently() runs each sync callable in a worker thread of its own
+instead, which Django gives its own database connection: the independent
+queries of a page run side by side, and the page takes about as long as its
+slowest query rather than the sum of them.
+
+Worker threads keep their connection between calls only if CONN_MAX_AGE
+allows it (see DB_CONN_MAX_AGE in settings); otherwise it is closed after
+each call, like at the end of a request.
+"""
+import asyncio
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.db import close_old_connections
+
+from accounts.models import UserProfile
+
+
+def in_worker_connection(function):
+    """`function` wrapped to clean up its thread's connection like a request does"""
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        close_old_connections()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            close_old_connections()
+    return wrapper
+
+
+async def run_concurrently(*functions):
+    """Results of calling each of `functions`, run in parallel threads"""
+    return await asyncio.gather(*[
+        sync_to_async(in_worker_connection(function), thread_sensitive=False)()
+        for function in functions
+    ])
+
+
+async def get_user_profile(request):
+    """The requesting user's UserProfile, or None if they have none"""
+    user = await request.auser()
+    # request.user is cached apart from auser(); share the loaded user so
+    # templates rendered afterwards don't fetch it again
+    request.user = user
+    if User.userprofile.is_cached(user):
+        # Loaded along with the user by accounts.backends.ProfileBackend
+        return getattr(user, 'userprofile', None)
+    try:
+        user_profile = await UserProfile.objects.aget(user=user)
+    except UserProfile.DoesNotExist:
+        return None
+    # Also caches user.userprofile
+    user_profile.user = user
+    return user_profile
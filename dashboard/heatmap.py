@@ -0,0 +1,64 @@
+"""
+Completion heatmap over a year or any other range of days.
+
+Counts come from the DailyTaskStats rollup, which already holds completions
+grouped by day, so a year is one indexed range read of at most 366 rows
+rather than a query per day. The payload is columnar: the first day plus one
+count per day, zeros included, which keeps a year to about a kilobyte.
+
+The dashboard fetches it lazily from the `heatmap` endpoint after the page
+has rendered, and the result is cached per user and data version.
+"""
+from datetime import date, timedelta
+
+from . import rollups
+
+
+# Default range, ending today
+HEATMAP_DAYS = 365
+
+# Longest range one request can ask for
+MAX_HEATMAP_DAYS = 366 * 5
+
+
+class InvalidRange(Exception):
+    pass
+
+
+def heatmap_range(params, today):
+    """
+    (start, end) from ?start=&end= (ISO dates, end defaulting to today) or
+    ?days= (ending today). Raises InvalidRange.
+    """
+    try:
+        end = date.fromisoformat(params['end']) if params.get('end') else today
+        if params.get('start'):
+            start = date.fromisoformat(params['start'])
+        else:
+            start = end - timedelta(days=int(params.get('days') or HEATMAP_DAYS) - 1)
+    except (ValueError, OverflowError):
+        raise InvalidRange('Invalid start, end or days')
+
+    days = (end - start).days + 1
+    if days < 1:
+        raise InvalidRange('start must not be after end')
+    if days > MAX_HEATMAP_DAYS:
+        raise InvalidRange(f'At most {MAX_HEATMAP_DAYS} days')
+    return start, end
+
+
+def completion_heatmap(user_profile, start, end):
+    """
+    {'start', 'end', 'counts', 'total', 'max'}: counts[i] is the number of
+    tasks completed on start + i days
+    """
+    completions = rollups.daily_completions(user_profile, start, end)
+    days = (end - start).days + 1
+    counts = [completions.get(start + timedelta(days=offset), 0) for offset in range(days)]
+    return {
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'counts': counts,
+        'total': sum(counts),
+        'max': max(counts),
+    }
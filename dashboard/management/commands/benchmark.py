@@ -0,0 +1,79 @@
+import json
+import platform
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from django.utils import timezone
+
+from accounts.models import UserProfile
+from dashboard.benchmark import EXCLUDED, run_benchmark, url_targets
+
+
+class Command(BaseCommand):
+    help = 'Time every URL of the project through the test client and report latency percentiles and query counts as JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', required=True, help='Username to request the pages as')
+        parser.add_argument('--requests', type=int, default=20, help='Timed requests per URL (default 20)')
+        parser.add_argument('--warmup', type=int, default=2, help='Untimed requests per URL first (default 2)')
+        parser.add_argument('--cold', action='store_true', help='Clear the cache before every request')
+        parser.add_argument('--include', action='append', default=[],
+                            help="View names to time, shell-style patterns like 'tasks:*' (repeatable). Default: all")
+        parser.add_argument('--exclude', action='append', default=[],
+                            help=f"View names to leave out (repeatable), on top of {', '.join(EXCLUDED)}")
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError('--requests must be at least 1')
+        try:
+            user_profile = UserProfile.objects.select_related('user').get(user__username=options['user'])
+        except UserProfile.DoesNotExist:
+            raise CommandError(f"No profile for user '{options['user']}'")
+
+        if settings.DEBUG:
+            self.stderr.write(self.style.WARNING('DEBUG is on, which slows every query down; set DEBUG=False for real numbers'))
+
+        targets, skipped = url_targets(user_profile, options['include'], EXCLUDED + options['exclude'])
+        for view_name, reason in skipped.items():
+            self.stderr.write(f'  skipping {view_name}: {reason}')
+
+        def progress(view_name, result):
+            self.stderr.write(f"  {view_name}: p50 {result['p50_ms']}ms, {result['queries']} queries")
+
+        # A failing view is reported with its status, not raised
+        client = Client(raise_request_exception=False)
+        client.force_login(user_profile.user)
+        # Report budget overruns instead of failing on them
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'], QUERY_BUDGET_MODE='log'):
+            views = run_benchmark(
+                client,
+                targets,
+                requests=options['requests'],
+                warmup=options['warmup'],
+                cold=options['cold'],
+                progress=progress if options['verbosity'] > 1 else None,
+            )
+
+        report = {
+            'created_at': timezone.now().isoformat(),
+            'user': options['user'],
+            'tasks': user_profile.tasks.count(),
+            'requests': options['requests'],
+            'warmup': options['warmup'],
+            'cold': options['cold'],
+            'debug': settings.DEBUG,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'views': views,
+            'skipped': skipped,
+        }
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output_file:
+                output_file.write(output + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Timed {len(views)} view(s), report written to {options['output']}"))
+        else:
+            self.stdout.write(output)
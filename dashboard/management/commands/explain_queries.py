@@ -0,0 +1,71 @@
+import json
+from datetime import date
+from fnmatch import fnmatch
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from accounts.models import UserProfile
+from dashboard.plans import HOT_QUERIES, busiest_profile, capture_plans, check_plans, load_baselines, save_baselines
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the hot querysets and compare their plans with the stored baselines, failing on regressions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Username to run the queries as. Defaults to the user with the most tasks.')
+        parser.add_argument('--only', action='append', default=[],
+                            help="Query names to check, shell-style patterns like 'calendar.*' (repeatable)")
+        parser.add_argument('--today', type=date.fromisoformat,
+                            help='Date the calendar queries are relative to, YYYY-MM-DD (default today)')
+        parser.add_argument('--seqscan', action='store_true',
+                            help='Leave sequential scans enabled, for plans as the planner picks them on this data')
+        parser.add_argument('--analyze', action='store_true', help='Refresh the table statistics first')
+        parser.add_argument('--update-baseline', action='store_true',
+                            help='Store the captured plans as the new baselines instead of checking them')
+        parser.add_argument('--show', action='store_true', help='Print the captured plans as JSON')
+
+    def handle(self, *args, **options):
+        if options['user']:
+            try:
+                user_profile = UserProfile.objects.get(user__username=options['user'])
+            except UserProfile.DoesNotExist:
+                raise CommandError(f"No profile for user '{options['user']}'")
+        else:
+            user_profile = busiest_profile()
+            if user_profile is None:
+                raise CommandError('No users to run the queries as; fill the database with the seed command first')
+
+        names = None
+        if options['only']:
+            names = [name for name in HOT_QUERIES if any(fnmatch(name, pattern) for pattern in options['only'])]
+
+        plans = capture_plans(
+            user_profile, options['today'] or timezone.localdate(), names,
+            seqscan=options['seqscan'], analyze=options['analyze'],
+        )
+        if options['show']:
+            self.stdout.write(json.dumps(plans, indent=2))
+
+        if options['update_baseline']:
+            save_baselines(plans)
+            self.stdout.write(self.style.SUCCESS(f'Stored {len(plans)} baseline plan(s)'))
+            return
+
+        regressed = 0
+        for check in check_plans(plans, load_baselines()):
+            if check.regressions:
+                regressed += 1
+                self.stdout.write(self.style.ERROR(f'{check.name}: regressed'))
+                for regression in check.regressions:
+                    self.stdout.write(f'  {regression}')
+            elif check.new:
+                self.stdout.write(self.style.WARNING(f'{check.name}: no baseline yet'))
+            elif check.changed:
+                self.stdout.write(self.style.WARNING(f'{check.name}: plan changed'))
+            elif options['verbosity'] > 1:
+                self.stdout.write(f'{check.name}: ok')
+
+        if regressed:
+            raise CommandError(f'{regressed} of {len(plans)} query plan(s) regressed')
+        self.stdout.write(self.style.SUCCESS(f'{len(plans)} query plan(s) checked, no regressions'))
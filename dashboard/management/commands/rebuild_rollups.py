@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from accounts.models import UserProfile
+from dashboard.rollups import rebuild_user_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild per-user daily task rollups and lifetime totals from the task table, reporting any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', action='append', default=[],
+                            help='Username to rebuild (repeatable). Defaults to every user.')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only report drift, do not write anything')
+
+    def handle(self, *args, **options):
+        profiles = UserProfile.objects.select_related('user').order_by('id')
+        if options['user']:
+            profiles = profiles.filter(user__username__in=options['user'])
+
+        drifted = 0
+        for profile in profiles.iterator():
+            drift = rebuild_user_rollups(profile.id, dry_run=options['dry_run'])
+            if not drift:
+                continue
+            drifted += 1
+            self.stdout.write(self.style.WARNING(f"{profile.user.username}: {len(drift)} difference(s)"))
+            for line in drift:
+                self.stdout.write(f"  {line}")
+
+        action = 'found' if options['dry_run'] else 'repaired'
+        self.stdout.write(self.style.SUCCESS(f"Drift {action} for {drifted} user(s)"))
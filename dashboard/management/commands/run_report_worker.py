@@ -0,0 +1,81 @@
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from dashboard import reports, worker
+
+
+class Command(BaseCommand):
+    help = 'Render queued reports in a pool of worker processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int,
+                            default=getattr(settings, 'REPORT_WORKER_PROCESSES', 2),
+                            help='Number of rendering processes')
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help='Seconds between checks for new jobs when idle')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit once no jobs are queued or running')
+
+    def handle(self, *args, **options):
+        self.processes = max(1, options['processes'])
+        self.poll_interval = options['poll_interval']
+        self.once = options['once']
+
+        self.stdout.write(f"Report worker started with {self.processes} process(es)")
+        while not self.run_pool():
+            # A rendering process died (e.g. killed for memory); its jobs
+            # were marked failed, start over with fresh processes
+            self.stdout.write(self.style.WARNING('Restarting the process pool'))
+
+    def run_pool(self):
+        """Process jobs until done (--once); returns False if the pool broke"""
+        context = multiprocessing.get_context('spawn')
+        running = {}
+        last_heartbeat = time.monotonic()
+        with ProcessPoolExecutor(self.processes, mp_context=context, initializer=worker.init_process) as pool:
+            try:
+                while True:
+                    if time.monotonic() - last_heartbeat >= reports.HEARTBEAT_INTERVAL.total_seconds():
+                        reports.heartbeat(list(running.values()))
+                        last_heartbeat = time.monotonic()
+
+                    requeued = reports.requeue_stale_jobs()
+                    if requeued:
+                        self.stdout.write(self.style.WARNING(f"Requeued {requeued} stale job(s)"))
+
+                    # Only claim what the pool can start right away, so other
+                    # workers can pick up the rest
+                    free = self.processes - len(running)
+                    if free:
+                        for job_id in reports.claim_jobs(free):
+                            running[pool.submit(worker.render, job_id)] = job_id
+
+                    if not running:
+                        if self.once:
+                            return True
+                        time.sleep(self.poll_interval)
+                        continue
+
+                    done, _ = wait(running, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        error = future.exception()
+                        self.finish(running.pop(future), error)
+                        if isinstance(error, BrokenProcessPool):
+                            # Every other job of the pool is lost with it
+                            raise error
+            except BrokenProcessPool as error:
+                for job_id in running.values():
+                    self.finish(job_id, error)
+                return False
+
+    def finish(self, job_id, error):
+        if error is None:
+            self.stdout.write(f"Report {job_id} ready")
+        else:
+            reports.mark_failed(job_id, error)
+            self.stdout.write(self.style.ERROR(f"Report {job_id} failed: {error}"))
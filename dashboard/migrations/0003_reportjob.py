@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_trigram_indexes'),
+        ('dashboard', '0002_dailytaskstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('report_type', models.CharField(choices=[('summary', 'Productivity Summary'), ('completion', 'Task Completion Analysis'), ('priority', 'Priority Distribution'), ('projects', 'Project Progress')], max_length=20)),
+                ('format', models.CharField(choices=[('pdf', 'PDF'), ('csv', 'CSV')], max_length=10)),
+                ('start', models.DateField()),
+                ('end', models.DateField()),
+                ('request_key', models.CharField(max_length=64)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Ready'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('digest', models.CharField(blank=True, max_length=64)),
+                ('size', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='report_jobs', to='accounts.userprofile')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['user', '-created_at'], name='reportjob_user_created_idx'), models.Index(fields=['user', 'request_key'], name='reportjob_user_key_idx'), models.Index(condition=models.Q(('status', 'pending')), fields=['created_at'], name='reportjob_pending_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def delete_duplicate_stats(apps, schema_editor):
+    """
+    Drop every row of users that ended up with several. Concurrent writes
+    updated all of them, so none is right; the next change of the user
+    counts their totals from scratch again (or run `rebuild_rollups`).
+    """
+    UserStats = apps.get_model('dashboard', 'UserStats')
+    duplicated = (
+        UserStats.objects.order_by()
+        .values('user_id')
+        .annotate(rows=Count('id'))
+        .filter(rows__gt=1)
+        .values('user_id')
+    )
+    UserStats.objects.filter(user_id__in=duplicated).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_userprofile_picture_variants'),
+        ('dashboard', '0004_reportjob_heartbeat_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicate_stats, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='userstats',
+            name='user',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to='accounts.userprofile'),
+        ),
+    ]
@@ -25,7 +25,9 @@ class DashboardWidget(models.Model):
         return f"{self.user.username} - {self.get_widget_type_display()}"
     
 class UserStats(models.Model):
-    user = models.ForeignKey('accounts.UserProfile', on_delete=models.CASCADE)
+    # One row per user: rollups.bump_user_stats() relies on it to create the
+    # row exactly once
+    user = models.OneToOneField('accounts.UserProfile', on_delete=models.CASCADE)
     total_tasks = models.PositiveIntegerField(default=0)
     completed_tasks = models.PositiveIntegerField(default=0)
     total_projects = models.PositiveBigIntegerField(default=0)
@@ -39,5 +41,96 @@ class UserStats(models.Model):
     
     def __str__(self):
         return f"{self.user.username}'s Stats"
-    
-    
\ No newline at end of file
+
+
+class DailyTaskStats(models.Model):
+    """
+    Per-user, per-day task rollup, kept current by dashboard.signals.
+
+    created   -- tasks created that day that still exist
+    completed -- tasks completed that day that are still completed
+    reopened  -- times a completed task was reopened that day (event count)
+    """
+    user = models.ForeignKey('accounts.UserProfile', on_delete=models.CASCADE, related_name='daily_stats')
+    date = models.DateField()
+    created = models.PositiveIntegerField(default=0)
+    completed = models.PositiveIntegerField(default=0)
+    reopened = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['date']
+        unique_together = ['user', 'date']
+
+    def __str__(self):
+        return f"{self.user} - {self.date}"
+
+
+class ReportJob(models.Model):
+    """
+    A requested report, rendered in the background by the
+    `run_report_worker` management command (see dashboard/reports.py).
+
+    request_key -- hash of (user, type, format, range, data version); equal
+                   keys are the same report and share one job
+    digest      -- sha256 of the rendered file, which is also its name in
+                   the artifact store, so identical files are stored once
+    """
+    REPORT_TYPES = [
+        ('summary', 'Productivity Summary'),
+        ('completion', 'Task Completion Analysis'),
+        ('priority', 'Priority Distribution'),
+        ('projects', 'Project Progress'),
+    ]
+
+    FORMATS = [
+        ('pdf', 'PDF'),
+        ('csv', 'CSV'),
+    ]
+
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Ready'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    user = models.ForeignKey('accounts.UserProfile', on_delete=models.CASCADE, related_name='report_jobs')
+    report_type = models.CharField(max_length=20, choices=REPORT_TYPES)
+    format = models.CharField(max_length=10, choices=FORMATS)
+    start = models.DateField()
+    end = models.DateField()
+    request_key = models.CharField(max_length=64)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    digest = models.CharField(max_length=64, blank=True)
+    size = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    # Refreshed by the worker while the job runs, see reports.heartbeat()
+    heartbeat_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # Recent reports of a user, and reuse of an identical request
+            models.Index(fields=['user', '-created_at'], name='reportjob_user_created_idx'),
+            models.Index(fields=['user', 'request_key'], name='reportjob_user_key_idx'),
+            # Worker queue: oldest pending job first
+            models.Index(fields=['created_at'], condition=models.Q(status='pending'), name='reportjob_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user} - {self.get_report_type_display()} ({self.status})"
+
+    @property
+    def is_ready(self):
+        return self.status == self.STATUS_DONE and bool(self.digest)
+
+    @property
+    def filename(self):
+        return f"{self.report_type}-{self.start.isoformat()}-{self.end.isoformat()}.{self.format}"
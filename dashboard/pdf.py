@@ -0,0 +1,89 @@
+"""
+Minimal text-only PDF writer for generated reports.
+
+Lays out lines of text in the standard Helvetica fonts on A4 pages, which is
+all the reports need, without adding a PDF library dependency.
+"""
+
+PAGE_WIDTH = 595
+PAGE_HEIGHT = 842
+MARGIN = 56
+
+# (font resource, size, leading) per line style
+STYLES = {
+    'title': ('F2', 18, 28),
+    'heading': ('F2', 12, 22),
+    'text': ('F1', 10, 14),
+    'mono': ('F3', 9, 12),
+}
+
+
+def escape_text(text):
+    """Text as a PDF string literal body in the fonts' Latin-1 encoding"""
+    text = str(text).encode('latin-1', 'replace').decode('latin-1')
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def paginate(lines):
+    """Split (style, text) lines into pages that fit between the margins"""
+    pages = [[]]
+    y = PAGE_HEIGHT - MARGIN
+    for style, text in lines:
+        leading = STYLES[style][2]
+        if y - leading < MARGIN and pages[-1]:
+            pages.append([])
+            y = PAGE_HEIGHT - MARGIN
+        y -= leading
+        pages[-1].append((style, text, y))
+    return pages
+
+
+def page_stream(page):
+    parts = []
+    for style, text, y in page:
+        font, size, leading = STYLES[style]
+        parts.append(f"BT /{font} {size} Tf {MARGIN} {y} Td ({escape_text(text)}) Tj ET")
+    return '\n'.join(parts).encode('latin-1')
+
+
+def render_pdf(lines):
+    """
+    PDF document bytes for a list of (style, text) lines, style being one of
+    STYLES.
+    """
+    pages = paginate(lines)
+
+    # Objects 1-5 are fixed: catalog, page tree and the three fonts. Each
+    # page then takes two objects, the page and its content stream.
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once the page objects are numbered
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier /Encoding /WinAnsiEncoding >>",
+    ]
+    page_refs = []
+    for page in pages:
+        stream = page_stream(page)
+        page_number = len(objects) + 1
+        page_refs.append(f"{page_number} 0 R")
+        objects.append((
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 3 0 R /F2 4 0 R /F3 5 0 R >> >> "
+            f"/Contents {page_number + 1} 0 R >>"
+        ).encode('latin-1'))
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(page_refs)}] /Count {len(pages)} >>".encode('latin-1')
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+
+    xref_offset = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        output += b"%010d 00000 n \n" % offset
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset)
+    return bytes(output)
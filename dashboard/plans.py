@@ -0,0 +1,285 @@
+"""
+Query plan regression checks for the hot querysets.
+
+The querysets the busiest views run are registered below with @hot_query,
+built the same way the views build them. capture_plans() runs EXPLAIN
+(FORMAT JSON) for each one and reduces the plan to its shape: node types,
+tables, indexes and sort keys, without the costs and row estimates that
+change with every data set. Shapes are kept as baselines in
+plan_baselines.json, and check_plans() compares against them:
+
+- regressions: a sequential scan of a watched table, a scan of one of its
+  indexes without an index condition (what the planner falls back to when
+  sequential scans are disabled) or a sort the baseline plan didn't need
+- changes: any other difference from the baseline, worth a look but fine
+
+Small tables are read sequentially whatever their indexes, so plans are
+captured with sequential scans disabled unless asked otherwise; that shows
+whether an index can serve each query, at any data size. Run the
+`explain_queries` command against a database filled by the `seed` command,
+with --update-baseline after an intended change, or the test in
+dashboard/tests.py.
+"""
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from django.db import connection, transaction
+from django.db.models import Count
+
+from accounts.models import UserProfile
+from projects.models import Project, visible_projects
+from tasks.models import Task
+from tasks.pagination import DEFAULT_PAGE_SIZE, SORT_MODES, page_query
+from tasks.views import filter_tasks
+from . import calendar_data
+
+
+BASELINE_PATH = Path(__file__).resolve().parent / 'plan_baselines.json'
+
+# Tables that grow with the data; never to be read whole
+WATCHED_TABLES = [Task._meta.db_table, Project._meta.db_table]
+
+SCAN_NODES = ['Index Scan', 'Index Only Scan']
+SORT_NODES = ['Sort', 'Incremental Sort']
+
+# EXPLAIN keys kept in a shape, and their names there
+SHAPE_KEYS = {
+    'Relation Name': 'relation',
+    'Index Name': 'index',
+    'Join Type': 'join',
+    'Sort Key': 'sort_key',
+}
+
+# {name: function(user_profile, today) returning a queryset, or None when
+# the user has nothing to run it on}
+HOT_QUERIES = {}
+
+
+def hot_query(name):
+    def register(function):
+        HOT_QUERIES[name] = function
+        return function
+    return register
+
+
+# The access check of the project pages, the project dropdowns and reports
+
+@hot_query('projects.visible')
+def visible(user_profile, today):
+    return visible_projects(user_profile)
+
+
+@hot_query('projects.detail')
+def project_detail(user_profile, today):
+    project = busiest_project(user_profile)
+    if project is None:
+        return None
+    return visible_projects(user_profile).select_related('user__user').filter(id=project.id)
+
+
+# projects.views.project_detail_view
+
+@hot_query('projects.tasks')
+def project_tasks(user_profile, today):
+    project = busiest_project(user_profile)
+    if project is None:
+        return None
+    return Task.objects.filter(project=project)
+
+
+@hot_query('projects.open_tasks')
+def project_open_tasks(user_profile, today):
+    project = busiest_project(user_profile)
+    if project is None:
+        return None
+    return Task.objects.filter(project=project, completed=False)
+
+
+# dashboard.views.dashboard_context and reports_context
+
+@hot_query('dashboard.recent_tasks')
+def recent_tasks(user_profile, today):
+    return Task.objects.filter(user=user_profile).order_by('-created_at')[:10]
+
+
+@hot_query('dashboard.high_priority')
+def high_priority(user_profile, today):
+    return Task.objects.filter(user=user_profile, priority='high', completed=False).order_by('due_date')[:5]
+
+
+@hot_query('reports.high_priority')
+def reports_high_priority(user_profile, today):
+    return Task.objects.filter(user=user_profile, priority='high', completed=False)
+
+
+# dashboard.calendar_data.build_calendar, this month and this year
+
+@hot_query('calendar.month_counts')
+def calendar_month_counts(user_profile, today):
+    start, end = month_range(today)
+    return calendar_data.day_count_rows(Task.objects.filter(user=user_profile), start, end)
+
+
+@hot_query('calendar.year_counts')
+def calendar_year_counts(user_profile, today):
+    start = today.replace(month=1, day=1)
+    end = today.replace(month=12, day=31)
+    return calendar_data.day_count_rows(Task.objects.filter(user=user_profile), start, end)
+
+
+@hot_query('calendar.previews')
+def calendar_previews(user_profile, today):
+    start, end = month_range(today)
+    return calendar_data.preview_rows(Task.objects.filter(user=user_profile), start, end, today)
+
+
+@hot_query('calendar.overdue')
+def calendar_overdue(user_profile, today):
+    return Task.objects.filter(user=user_profile, completed=False, due_date__lt=today)
+
+
+# tasks.views.task_list_view and task_page_view: the first page of every
+# sort mode, and the overdue filter
+
+for sort in SORT_MODES:
+    hot_query(f'tasks.page.{sort}')(
+        lambda user_profile, today, sort=sort: page_query(filter_tasks({}, user_profile), sort)[:DEFAULT_PAGE_SIZE + 1]
+    )
+
+
+@hot_query('tasks.overdue')
+def overdue_tasks(user_profile, today):
+    return page_query(filter_tasks({'status': 'overdue'}, user_profile))[:DEFAULT_PAGE_SIZE + 1]
+
+
+def month_range(today):
+    start = today.replace(day=1)
+    return start, calendar_data.month_last_day(today.year, today.month)
+
+
+def busiest_project(user_profile):
+    return visible_projects(user_profile).order_by('-task_count', 'id').first()
+
+
+def busiest_profile():
+    """The profile with the most tasks, whose plans are the telling ones"""
+    return UserProfile.objects.annotate(n_tasks=Count('tasks')).order_by('-n_tasks', 'id').first()
+
+
+# Plans
+
+def plan_shape(node):
+    """The shape of an EXPLAIN (FORMAT JSON) plan node and its children"""
+    shape = {'node': node['Node Type']}
+    for key, name in SHAPE_KEYS.items():
+        if key in node:
+            shape[name] = node[key]
+    if node['Node Type'] in SCAN_NODES:
+        shape['index_cond'] = 'Index Cond' in node
+    children = [plan_shape(child) for child in node.get('Plans', [])]
+    if children:
+        shape['children'] = children
+    return shape
+
+
+def walk(shape):
+    yield shape
+    for child in shape.get('children', []):
+        yield from walk(child)
+
+
+def explain(queryset):
+    # Not QuerySet.explain(), which puts EXPLAIN inside the subquery Django
+    # wraps around filters on window functions
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan_shape(plan[0]['Plan'])
+
+
+def capture_plans(user_profile, today, names=None, seqscan=False, analyze=False):
+    """
+    {name: shape} of the hot queries named (default: all), as the given
+    user. `analyze` refreshes the table statistics first.
+    """
+    plans = {}
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            if analyze:
+                cursor.execute('ANALYZE')
+            if not seqscan:
+                # Only until the end of this transaction
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        for name, function in HOT_QUERIES.items():
+            if names is not None and name not in names:
+                continue
+            queryset = function(user_profile, today)
+            if queryset is not None:
+                plans[name] = explain(queryset)
+    return plans
+
+
+# Baselines
+
+def load_baselines(path=BASELINE_PATH):
+    try:
+        with open(path, encoding='utf-8') as baseline_file:
+            return json.load(baseline_file)
+    except FileNotFoundError:
+        return {}
+
+
+def save_baselines(plans, path=BASELINE_PATH):
+    """Store `plans` as baselines, keeping those of other queries"""
+    baselines = load_baselines(path)
+    baselines.update(plans)
+    with open(path, 'w', encoding='utf-8') as baseline_file:
+        json.dump(dict(sorted(baselines.items())), baseline_file, indent=2)
+        baseline_file.write('\n')
+
+
+@dataclass
+class PlanCheck:
+    name: str
+    regressions: list = field(default_factory=list)
+    changed: bool = False
+    # No baseline to compare with yet
+    new: bool = False
+
+
+def reads_watched_table(shape):
+    return any(node.get('relation') in WATCHED_TABLES for node in walk(shape))
+
+
+def plan_regressions(shape, baseline=None):
+    """Descriptions of what makes `shape` slower than it should be"""
+    baseline_sorts = [node.get('sort_key') for node in walk(baseline)] if baseline else None
+    regressions = []
+    for node in walk(shape):
+        relation = node.get('relation')
+        if relation in WATCHED_TABLES and node['node'] == 'Seq Scan':
+            regressions.append(f'sequential scan on {relation}')
+        elif relation in WATCHED_TABLES and node['node'] in SCAN_NODES and not node['index_cond']:
+            regressions.append(f"whole index {node['index']} of {relation} scanned")
+        elif (node['node'] in SORT_NODES and baseline_sorts is not None
+              and node.get('sort_key') not in baseline_sorts and reads_watched_table(node)):
+            regressions.append(f"sort on {', '.join(node.get('sort_key', []))} without an index")
+    return regressions
+
+
+def check_plans(plans, baselines):
+    """[PlanCheck, ...] of `plans` against `baselines`"""
+    checks = []
+    for name, shape in plans.items():
+        baseline = baselines.get(name)
+        checks.append(PlanCheck(
+            name=name,
+            regressions=plan_regressions(shape, baseline),
+            changed=baseline is not None and shape != baseline,
+            new=baseline is None,
+        ))
+    return checks
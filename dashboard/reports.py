@@ -0,0 +1,338 @@
+"""
+Background report generation.
+
+Web requests only record a ReportJob (request_report()). The
+`run_report_worker` management command claims pending jobs and renders them
+in a pool of worker processes (render_job()), so no web worker ever spends
+CPU on rendering.
+
+Rendered files live in a content-addressed artifact store: a file's sha256
+is its name, so identical files are stored once. A request identical to an
+earlier one (same user, type, format, range and data version) reuses that
+job and its file instead of rendering again.
+"""
+import csv
+import hashlib
+import io
+import os
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from projects.models import visible_projects
+from tasks.models import Task
+from . import cache as user_cache
+from .export import RANGE_PRESETS
+from .models import DailyTaskStats, ReportJob
+from .pdf import render_pdf
+from .stats import completed_in_range, day_start, get_task_stats
+
+
+ARTIFACT_ROOT = Path(getattr(settings, 'REPORT_ARTIFACT_ROOT', settings.BASE_DIR / 'report_artifacts'))
+
+# The worker refreshes the heartbeat of its running jobs this often; a job
+# whose heartbeat is older than STALE_AFTER lost its worker and is handed
+# out again. Rendering time doesn't matter, only whether a worker is alive.
+HEARTBEAT_INTERVAL = timedelta(seconds=30)
+STALE_AFTER = timedelta(minutes=2)
+
+CONTENT_TYPES = {
+    'pdf': 'application/pdf',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+RANGE_CHOICES = [
+    ('7', 'Last 7 days'),
+    ('30', 'Last 30 days'),
+    ('90', 'Last 90 days'),
+    ('year', 'This year'),
+]
+
+
+def report_range(range_name, today):
+    """(start, end) for a RANGE_CHOICES key, defaulting to the last 30 days"""
+    if range_name == 'year':
+        return today.replace(month=1, day=1), today
+    days = RANGE_PRESETS.get(range_name, 30)
+    return today - timedelta(days=days - 1), today
+
+
+# Requests
+
+def make_request_key(user_id, report_type, report_format, start, end, version):
+    parts = [str(user_id), report_type, report_format, start.isoformat(), end.isoformat(), version]
+    return hashlib.sha256('|'.join(parts).encode()).hexdigest()
+
+
+def request_report(user_profile, report_type, report_format, start, end):
+    """
+    Queue a report, or return the job of an identical earlier request.
+    Returns (job, created).
+    """
+    # The dashboard cache version changes whenever the user's tasks or
+    # projects do, so it identifies the data a report was rendered from
+    version = user_cache.get_version(user_profile.id)
+    key = make_request_key(user_profile.id, report_type, report_format, start, end, version)
+
+    existing = (
+        ReportJob.objects.filter(user=user_profile, request_key=key)
+        .exclude(status=ReportJob.STATUS_FAILED)
+        .first()
+    )
+    if existing is not None and (not existing.is_ready or artifact_path(existing.digest).exists()):
+        return existing, False
+
+    job = ReportJob.objects.create(
+        user=user_profile,
+        report_type=report_type,
+        format=report_format,
+        start=start,
+        end=end,
+        request_key=key,
+    )
+    return job, True
+
+
+# Artifact store
+
+def artifact_path(digest):
+    return ARTIFACT_ROOT / digest[:2] / digest
+
+
+def store_artifact(content):
+    """Write `content` to the store unless it is already there; returns its digest"""
+    digest = hashlib.sha256(content).hexdigest()
+    path = artifact_path(digest)
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename, so a reader never sees a partial file
+        fd, temp_path = tempfile.mkstemp(dir=path.parent)
+        with os.fdopen(fd, 'wb') as temp_file:
+            temp_file.write(content)
+        os.replace(temp_path, path)
+    return digest
+
+
+def delete_job(job):
+    """Delete a job, and its file unless another job shares it"""
+    digest = job.digest
+    job.delete()
+    if digest and not ReportJob.objects.filter(digest=digest).exists():
+        artifact_path(digest).unlink(missing_ok=True)
+
+
+# Queue
+
+def claim_jobs(limit):
+    """Mark up to `limit` pending jobs as running and return their ids"""
+    with transaction.atomic():
+        ids = list(
+            ReportJob.objects.filter(status=ReportJob.STATUS_PENDING)
+            .order_by('created_at')
+            .select_for_update(skip_locked=True)
+            .values_list('id', flat=True)[:limit]
+        )
+        if ids:
+            now = timezone.now()
+            ReportJob.objects.filter(id__in=ids).update(
+                status=ReportJob.STATUS_RUNNING,
+                started_at=now,
+                heartbeat_at=now,
+            )
+    return ids
+
+
+def heartbeat(job_ids):
+    """Record that the worker running these jobs is still alive"""
+    if job_ids:
+        ReportJob.objects.filter(id__in=job_ids, status=ReportJob.STATUS_RUNNING).update(heartbeat_at=timezone.now())
+
+
+def requeue_stale_jobs():
+    """Hand jobs out again whose worker stopped without finishing them"""
+    cutoff = timezone.now() - STALE_AFTER
+    return ReportJob.objects.filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff),
+        status=ReportJob.STATUS_RUNNING,
+    ).update(status=ReportJob.STATUS_PENDING, started_at=None, heartbeat_at=None)
+
+
+def mark_failed(job_id, error):
+    ReportJob.objects.filter(id=job_id).update(
+        status=ReportJob.STATUS_FAILED,
+        error=str(error)[:1000],
+        finished_at=timezone.now(),
+    )
+
+
+# Report contents. Each builder returns a list of
+# (heading, column names, rows) sections.
+
+def summary_sections(job):
+    tasks = Task.objects.filter(user=job.user)
+    days = (job.end - job.start).days + 1
+    stats = get_task_stats(tasks, today=job.end, history_days=days, user=job.user)
+    created = tasks.filter(
+        created_at__gte=day_start(job.start),
+        created_at__lt=day_start(job.end + timedelta(days=1)),
+    ).count()
+
+    overview = [
+        ('Tasks created in range', created),
+        ('Tasks completed in range', stats.completed_between(job.start, job.end)),
+        ('Total tasks', stats.total),
+        ('Completed tasks', stats.completed),
+        ('Completion rate', f"{stats.completion_rate}%"),
+        ('Overdue tasks', stats.overdue),
+        ('Open high priority tasks', stats.high_open),
+    ]
+    daily = [(day.isoformat(), count) for day, count in stats.daily_series(days)]
+    return [
+        ('Overview', ['Metric', 'Value'], overview),
+        ('Completions per day', ['Date', 'Completed'], daily),
+    ]
+
+
+def completion_sections(job):
+    rows = (
+        DailyTaskStats.objects.filter(user=job.user, date__gte=job.start, date__lte=job.end)
+        .order_by('date')
+        .values_list('date', 'created', 'completed', 'reopened')
+    )
+    rows = [(day.isoformat(), created, completed, reopened) for day, created, completed, reopened in rows]
+    totals = [('Total',) + tuple(sum(row[i] for row in rows) for i in (1, 2, 3))]
+    return [
+        ('Tasks per day', ['Date', 'Created', 'Completed', 'Reopened'], rows + totals),
+    ]
+
+
+def priority_sections(job):
+    tasks = Task.objects.filter(
+        user=job.user,
+        created_at__gte=day_start(job.start),
+        created_at__lt=day_start(job.end + timedelta(days=1)),
+    )
+    counts = {
+        row['priority']: row
+        for row in tasks.order_by().values('priority').annotate(
+            total=Count('id'),
+            done=Count('id', filter=Q(completed=True)),
+        )
+    }
+    rows = []
+    for priority, label in reversed(Task.PRIORITY_CHOICES):
+        row = counts.get(priority, {'total': 0, 'done': 0})
+        rate = round(row['done'] / row['total'] * 100) if row['total'] else 0
+        rows.append((label, row['total'], row['done'], row['total'] - row['done'], f"{rate}%"))
+
+    completed = completed_in_range(Task.objects.filter(user=job.user), job.start, job.end)
+    completed_counts = dict(completed.order_by().values_list('priority').annotate(count=Count('id')))
+    completed_rows = [
+        (label, completed_counts.get(priority, 0))
+        for priority, label in reversed(Task.PRIORITY_CHOICES)
+    ]
+    return [
+        ('Tasks created in range', ['Priority', 'Total', 'Completed', 'Open', 'Completion rate'], rows),
+        ('Tasks completed in range', ['Priority', 'Completed'], completed_rows),
+    ]
+
+
+def project_sections(job):
+    projects = (
+        visible_projects(job.user)
+        .order_by('title')
+        .only('title', 'completed', 'task_count', 'completed_task_count')
+    )
+    rows = [
+        (
+            project.title,
+            project.task_count,
+            project.completed_task_count,
+            f"{project.progress}%",
+            'Completed' if project.completed else 'Active',
+        )
+        for project in projects
+    ]
+    return [
+        ('Projects', ['Project', 'Tasks', 'Completed', 'Progress', 'Status'], rows),
+    ]
+
+
+SECTION_BUILDERS = {
+    'summary': summary_sections,
+    'completion': completion_sections,
+    'priority': priority_sections,
+    'projects': project_sections,
+}
+
+
+# Renderers. Output depends only on the report's data and range, so
+# identical reports produce identical bytes and share one artifact.
+
+def report_title(job):
+    return job.get_report_type_display(), f"{job.start:%b %d, %Y} - {job.end:%b %d, %Y}"
+
+
+def render_csv(job, sections):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    title, subtitle = report_title(job)
+    writer.writerow([title, subtitle])
+    for heading, columns, rows in sections:
+        writer.writerow([])
+        writer.writerow([heading])
+        writer.writerow(columns)
+        writer.writerows(rows)
+    return buffer.getvalue().encode('utf-8')
+
+
+def table_lines(columns, rows):
+    """Fixed-width text table as (style, text) lines"""
+    table = [[str(value) for value in row] for row in [columns] + list(rows)]
+    widths = [min(max(len(row[i]) for row in table), 40) for i in range(len(columns))]
+    lines = []
+    for number, row in enumerate(table):
+        cells = [value[:width].ljust(width) for value, width in zip(row, widths)]
+        lines.append(('mono', '  '.join(cells).rstrip()))
+        if number == 0:
+            lines.append(('mono', '  '.join('-' * width for width in widths)))
+    return lines
+
+
+def render_report_pdf(job, sections):
+    title, subtitle = report_title(job)
+    lines = [('title', title), ('text', subtitle)]
+    for heading, columns, rows in sections:
+        lines.append(('heading', heading))
+        lines.extend(table_lines(columns, rows))
+    return render_pdf(lines)
+
+
+RENDERERS = {
+    'pdf': render_report_pdf,
+    'csv': render_csv,
+}
+
+
+def render_job(job_id):
+    """
+    Build, render and store one claimed job. Runs in a worker process
+    (see dashboard/worker.py); exceptions are recorded by the caller.
+    """
+    job = ReportJob.objects.select_related('user').get(id=job_id)
+    sections = SECTION_BUILDERS[job.report_type](job)
+    content = RENDERERS[job.format](job, sections)
+    digest = store_artifact(content)
+    ReportJob.objects.filter(id=job_id).update(
+        status=ReportJob.STATUS_DONE,
+        digest=digest,
+        size=len(content),
+        error='',
+        finished_at=timezone.now(),
+    )
+    return digest
@@ -0,0 +1,298 @@
+"""
+Incrementally maintained task rollups.
+
+DailyTaskStats holds per-user, per-day created/completed/reopened counts and
+UserStats the lifetime totals. Both are adjusted with F() updates from the
+Task and Project signal handlers in dashboard.signals, inside the same
+transaction as the row change, so charts can read a few dozen small rows
+instead of aggregating the whole task table.
+
+rebuild_user_rollups() recomputes everything from the task table and reports any
+drift; it backs the `rebuild_rollups` management command.
+"""
+from collections import Counter, defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import ExtractWeekDay, Greatest, TruncDate
+from django.utils import timezone
+
+from projects.models import Project
+from tasks.models import Task
+from .models import DailyTaskStats, UserStats
+
+
+# Counters that can be recomputed from the task table. `reopened` is an
+# event count with no trace in the tasks themselves, so a rebuild keeps it.
+REBUILT_FIELDS = ['created', 'completed']
+
+USER_STATS_FIELDS = ['total_tasks', 'completed_tasks', 'total_projects', 'completed_projects']
+
+
+def local_date(value):
+    """Calendar day of a datetime in the current time zone"""
+    return timezone.localdate(value) if value is not None else timezone.localdate()
+
+
+def completion_day(task):
+    """Day a completed task counts as completed on"""
+    return local_date(task.completed_at)
+
+
+# A completed task without completed_at (legacy rows, update() writes) was
+# never counted on any day, so removing its completion changes no day either.
+
+
+def counter_updates(deltas):
+    """F() expressions adding each delta, never going below zero"""
+    updates = {}
+    for name, delta in deltas.items():
+        updates[name] = F(name) + delta if delta > 0 else Greatest(F(name) + delta, 0)
+    return updates
+
+
+def bump_daily(user_id, day, **deltas):
+    """Add deltas to one user's rollup row for `day`, creating it if needed"""
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    updates = counter_updates(deltas)
+    if DailyTaskStats.objects.filter(user_id=user_id, date=day).update(**updates):
+        return
+
+    # No row yet. Decrements have nothing to take away from.
+    initial = {name: delta for name, delta in deltas.items() if delta > 0}
+    if not initial:
+        return
+    try:
+        with transaction.atomic():
+            DailyTaskStats.objects.create(user_id=user_id, date=day, **initial)
+    except IntegrityError:
+        # Another transaction created the row first
+        DailyTaskStats.objects.filter(user_id=user_id, date=day).update(**updates)
+
+
+def bump_user_stats(user_id, **deltas):
+    """Add deltas to a user's lifetime totals, creating the row if needed"""
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    updates = counter_updates(deltas)
+    if UserStats.objects.filter(user_id=user_id).update(**updates):
+        return
+
+    # First change for this user: count from scratch, which already
+    # includes the row being saved or excludes the one being deleted
+    totals = count_user_totals(user_id)
+    try:
+        with transaction.atomic():
+            UserStats.objects.create(user_id=user_id, **totals)
+    except IntegrityError:
+        # Another transaction created the row first, without our change
+        UserStats.objects.filter(user_id=user_id).update(**updates)
+
+
+def count_user_totals(user_id):
+    totals = Task.objects.filter(user_id=user_id).aggregate(
+        total_tasks=Count('id'),
+        completed_tasks=Count('id', filter=Q(completed=True)),
+    )
+    totals.update(Project.objects.filter(user_id=user_id).aggregate(
+        total_projects=Count('id'),
+        completed_projects=Count('id', filter=Q(completed=True)),
+    ))
+    return totals
+
+
+# Task changes
+
+def record_task_created(task):
+    bump_daily(task.user_id, local_date(task.created_at), created=1)
+    if task.completed:
+        bump_daily(task.user_id, completion_day(task), completed=1)
+    bump_user_stats(task.user_id, total_tasks=1, completed_tasks=int(task.completed))
+
+
+def record_task_deleted(task):
+    bump_daily(task.user_id, local_date(task.created_at), created=-1)
+    if task.completed and task.completed_at is not None:
+        bump_daily(task.user_id, completion_day(task), completed=-1)
+    bump_user_stats(task.user_id, total_tasks=-1, completed_tasks=-int(task.completed))
+
+
+def record_task_updated(task, previous):
+    """
+    Apply a save of an existing task. `previous` is the task's state as it
+    was loaded from the database (see Task.from_db).
+    """
+    was_completed = previous.get('completed')
+    if was_completed is None or was_completed == task.completed:
+        return
+
+    if task.completed:
+        bump_daily(task.user_id, completion_day(task), completed=1)
+        bump_user_stats(task.user_id, completed_tasks=1)
+    else:
+        if previous.get('completed_at') is not None:
+            bump_daily(task.user_id, local_date(previous['completed_at']), completed=-1)
+        bump_daily(task.user_id, local_date(task.updated_at), reopened=1)
+        bump_user_stats(task.user_id, completed_tasks=-1)
+
+
+def record_tasks_changed(user_id, changes):
+    """
+    Apply many task changes of one user at once, for bulk writes that bypass
+    the signal handlers (see tasks/bulk.py and tasks/importer.py). `changes`
+    is a list of (before, after) value dicts, `before` being None for a
+    created task and `after` None for a deleted one. Costs one UPDATE per
+    touched day instead of several per task.
+    """
+    daily = defaultdict(Counter)
+    totals = Counter()
+    for before, after in changes:
+        if before is None:
+            daily[local_date(after['created_at'])]['created'] += 1
+            totals['total_tasks'] += 1
+            if after['completed']:
+                daily[local_date(after['completed_at'])]['completed'] += 1
+                totals['completed_tasks'] += 1
+        elif after is None:
+            daily[local_date(before['created_at'])]['created'] -= 1
+            totals['total_tasks'] -= 1
+            if before['completed']:
+                if before['completed_at'] is not None:
+                    daily[local_date(before['completed_at'])]['completed'] -= 1
+                totals['completed_tasks'] -= 1
+        elif before['completed'] != after['completed']:
+            if after['completed']:
+                daily[local_date(after['completed_at'])]['completed'] += 1
+                totals['completed_tasks'] += 1
+            else:
+                if before['completed_at'] is not None:
+                    daily[local_date(before['completed_at'])]['completed'] -= 1
+                daily[local_date(after['updated_at'])]['reopened'] += 1
+                totals['completed_tasks'] -= 1
+
+    # Same row order in every transaction, so concurrent bulk writes can't deadlock
+    for day in sorted(daily):
+        bump_daily(user_id, day, **daily[day])
+    bump_user_stats(user_id, **totals)
+
+
+# Project changes
+
+def record_project_created(project):
+    bump_user_stats(project.user_id, total_projects=1, completed_projects=int(project.completed))
+
+
+def record_project_deleted(project):
+    bump_user_stats(project.user_id, total_projects=-1, completed_projects=-int(project.completed))
+
+
+def record_project_updated(project, previous):
+    was_completed = previous.get('completed')
+    if was_completed is None or was_completed == project.completed:
+        return
+    bump_user_stats(project.user_id, completed_projects=1 if project.completed else -1)
+
+
+# Reads
+
+def daily_completions(user, start, end):
+    """{date: completed count} for one user between start and end inclusive"""
+    rows = DailyTaskStats.objects.filter(
+        user=user,
+        date__gte=start,
+        date__lte=end,
+        completed__gt=0
+    ).values_list('date', 'completed')
+    return dict(rows)
+
+
+def weekday_completions(user):
+    """Lifetime completions per weekday for one user, Monday first"""
+    weekdays = [0] * 7
+    rows = (
+        DailyTaskStats.objects.filter(user=user, completed__gt=0)
+        .order_by()
+        .values(week_day=ExtractWeekDay('date'))
+        .annotate(count=Sum('completed'))
+    )
+    # Django week_day: Sunday=1, Monday=2 ... Saturday=7
+    for row in rows:
+        weekdays[(row['week_day'] - 2) % 7] = row['count']
+    return weekdays
+
+
+# Rebuild
+
+def expected_daily_rows(user_id):
+    """{date: {'created': n, 'completed': n}} recomputed from the task table"""
+    expected = defaultdict(lambda: dict.fromkeys(REBUILT_FIELDS, 0))
+    tasks = Task.objects.filter(user_id=user_id).order_by()
+
+    for row in tasks.values(day=TruncDate('created_at')).annotate(count=Count('id')):
+        expected[row['day']]['created'] = row['count']
+
+    completed = tasks.filter(completed=True, completed_at__isnull=False)
+    for row in completed.values(day=TruncDate('completed_at')).annotate(count=Count('id')):
+        expected[row['day']]['completed'] = row['count']
+
+    return expected
+
+
+def rebuild_user_rollups(user_id, dry_run=False):
+    """
+    Recompute one user's rollup rows and lifetime totals.
+    Returns a list of drift descriptions, empty when everything matched.
+    """
+    drift = []
+    expected = expected_daily_rows(user_id)
+    existing = {row.date: row for row in DailyTaskStats.objects.filter(user_id=user_id)}
+
+    to_create = []
+    to_update = []
+    for day in sorted(set(expected) | set(existing)):
+        wanted = expected.get(day, dict.fromkeys(REBUILT_FIELDS, 0))
+        row = existing.get(day)
+        if row is None:
+            drift.append(f"{day}: missing row, expected {wanted}")
+            to_create.append(DailyTaskStats(user_id=user_id, date=day, **wanted))
+            continue
+
+        changed = False
+        for name in REBUILT_FIELDS:
+            if getattr(row, name) != wanted[name]:
+                drift.append(f"{day}: {name} {getattr(row, name)} -> {wanted[name]}")
+                setattr(row, name, wanted[name])
+                changed = True
+        if changed:
+            to_update.append(row)
+
+    totals = count_user_totals(user_id)
+    stats = UserStats.objects.filter(user_id=user_id).first()
+    if stats is None:
+        drift.append(f"totals: missing row, expected {totals}")
+    else:
+        for name in USER_STATS_FIELDS:
+            if getattr(stats, name) != totals[name]:
+                drift.append(f"totals: {name} {getattr(stats, name)} -> {totals[name]}")
+
+    if dry_run or not drift:
+        return drift
+
+    with transaction.atomic():
+        DailyTaskStats.objects.bulk_create(to_create)
+        DailyTaskStats.objects.bulk_update(to_update, REBUILT_FIELDS)
+        # Rows left with nothing in them are just noise
+        DailyTaskStats.objects.filter(
+            user_id=user_id, created=0, completed=0, reopened=0
+        ).delete()
+        if stats is None:
+            UserStats.objects.create(user_id=user_id, **totals)
+        else:
+            UserStats.objects.filter(pk=stats.pk).update(**totals)
+
+    return drift
@@ -0,0 +1,103 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from accounts.models import UserProfile
+from projects.models import Project
+from tasks.models import BulkDeleteQuerySet, Task
+from . import rollups
+from .cache import bump_version_on_commit
+
+
+def deleting_account(origin):
+    """True when a delete cascades from a whole user account going away"""
+    return isinstance(origin, (User, UserProfile))
+
+
+@receiver(post_save, sender=Task)
+def update_task_rollups(sender, instance, created, raw=False, **kwargs):
+    """Keep DailyTaskStats and UserStats in step with every task save"""
+    if raw:
+        return
+    if created:
+        rollups.record_task_created(instance)
+    else:
+        rollups.record_task_updated(instance, getattr(instance, '_loaded_values', {}))
+
+
+@receiver(post_delete, sender=Task)
+def remove_task_from_rollups(sender, instance, origin=None, **kwargs):
+    if deleting_account(origin) or isinstance(origin, BulkDeleteQuerySet):
+        return
+    rollups.record_task_deleted(instance)
+
+
+@receiver(post_save, sender=Project)
+def update_project_rollups(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        rollups.record_project_created(instance)
+    else:
+        rollups.record_project_updated(instance, getattr(instance, '_loaded_values', {}))
+
+
+@receiver(post_delete, sender=Project)
+def remove_project_from_rollups(sender, instance, origin=None, **kwargs):
+    if deleting_account(origin):
+        return
+    rollups.record_project_deleted(instance)
+
+
+# Cache invalidation: any change to a user's tasks, projects or profile
+# bumps their data version, which retires every cached context and template
+# fragment of that user only.
+
+def project_user_ids(project):
+    return [project.user_id, *project.members.values_list('id', flat=True)]
+
+
+@receiver(post_save, sender=UserProfile)
+def invalidate_profile(sender, instance, raw=False, **kwargs):
+    # Saved along with every User save too, see accounts.models: names,
+    # email and picture are shown in the sidebar
+    if raw:
+        return
+    bump_version_on_commit(instance.id)
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def invalidate_task_owner(sender, instance, raw=False, origin=None, **kwargs):
+    # Bulk deletes bump once for all their tasks
+    if raw or isinstance(origin, BulkDeleteQuerySet):
+        return
+    bump_version_on_commit(instance.user_id)
+
+
+@receiver(post_save, sender=Project)
+def invalidate_project_users(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    user_ids = [instance.user_id] if created else project_user_ids(instance)
+    bump_version_on_commit(*user_ids)
+
+
+@receiver(pre_delete, sender=Project)
+def invalidate_deleted_project_users(sender, instance, **kwargs):
+    # Members are gone by post_delete, so collect them now
+    bump_version_on_commit(*project_user_ids(instance))
+
+
+@receiver(m2m_changed, sender=Project.members.through)
+def invalidate_project_members(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if reverse:
+        # profile.projects.add(...): instance is the member, pk_set projects
+        projects = Project.objects.filter(pk__in=pk_set) if pk_set else instance.projects.all()
+        user_ids = [instance.pk, *projects.values_list('user_id', flat=True)]
+    else:
+        user_ids = [instance.user_id, *(pk_set or instance.members.values_list('id', flat=True))]
+    bump_version_on_commit(*user_ids)
+
@@ -0,0 +1,203 @@
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+
+from django.db.models import Count, Q
+from django.db.models.functions import ExtractWeekDay, TruncDate
+from django.utils import timezone
+
+from . import rollups
+from .concurrency import run_concurrently
+
+
+# How many days of completion history are loaded by default. Covers the
+# 7 day chart, the 4 week velocity chart and "this week" (the year-long
+# heatmap is loaded separately, see heatmap.py).
+HISTORY_DAYS = 30
+
+
+def day_start(day):
+    """Aware datetime for midnight at the start of `day` in the current time zone"""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def completed_in_range(tasks, start, end):
+    """
+    Completed tasks with completed_at on any day from start to end inclusive.
+
+    Uses a half-open timestamp range instead of a __date cast so an index on
+    completed_at can serve it.
+    """
+    return tasks.filter(
+        completed=True,
+        completed_at__gte=day_start(start),
+        completed_at__lt=day_start(end + timedelta(days=1)),
+    )
+
+
+@dataclass
+class TaskStats:
+    """
+    Counters and per-day completion buckets for a set of tasks.
+
+    Built by get_task_stats() from a couple of aggregate queries, so views
+    can read any number of figures from it without touching the database.
+    """
+    today: date
+    total: int = 0
+    completed: int = 0
+    due_today: int = 0
+    overdue: int = 0
+    high: int = 0
+    medium: int = 0
+    low: int = 0
+    high_open: int = 0
+    high_completed: int = 0
+    # {date: number of tasks completed that day} for the history window
+    daily: dict = field(default_factory=dict)
+    # Completions per weekday, Monday first (only filled when requested)
+    weekdays: list = field(default_factory=lambda: [0] * 7)
+
+    @property
+    def pending(self):
+        return self.total - self.completed
+
+    @property
+    def completion_rate(self):
+        if self.total == 0:
+            return 0
+        return round((self.completed / self.total) * 100)
+
+    @property
+    def priority_stats(self):
+        return {'high': self.high, 'medium': self.medium, 'low': self.low}
+
+    @property
+    def completed_today(self):
+        return self.daily.get(self.today, 0)
+
+    @property
+    def completed_this_week(self):
+        week_start = self.today - timedelta(days=self.today.weekday())
+        return self.completed_between(week_start, self.today)
+
+    def completed_on(self, day):
+        return self.daily.get(day, 0)
+
+    def completed_between(self, start, end):
+        """Completions between start and end, both inclusive"""
+        return sum(count for day, count in self.daily.items() if start <= day <= end)
+
+    def daily_series(self, days):
+        """[(date, count), ...] for the last `days` days, oldest first"""
+        series = []
+        for i in range(days - 1, -1, -1):
+            day = self.today - timedelta(days=i)
+            series.append((day, self.completed_on(day)))
+        return series
+
+    def weekly_series(self, weeks):
+        """
+        Completions per rolling 7 day window, most recent week first.
+        Week 0 is the last 7 days including today.
+        """
+        series = []
+        for week in range(weeks):
+            week_start = self.today - timedelta(days=(week * 7) + 6)
+            week_end = self.today - timedelta(days=week * 7)
+            series.append(self.completed_between(week_start, week_end))
+        return series
+
+
+def get_task_stats(tasks, today=None, history_days=HISTORY_DAYS, user=None, weekdays=False):
+    """
+    Compute a TaskStats for a Task queryset.
+
+    tasks         -- queryset the counters are computed over
+    history_days  -- days of completion history to load, 0 for none
+    user          -- read the completion history for this UserProfile from
+                     the DailyTaskStats rollup instead of grouping `tasks`
+                     (the task list counts its filtered set but charts all
+                     of the user's completions)
+    weekdays      -- also bucket all completions by day of week
+
+    Runs one conditional aggregate plus one small query per history kind,
+    whatever the number of tasks or days involved.
+    """
+    if today is None:
+        today = timezone.now().date()
+
+    stats = task_counters(tasks, today)
+    if history_days:
+        stats.daily = daily_history(tasks, today, history_days, user)
+    if weekdays:
+        stats.weekdays = weekday_history(tasks, user)
+    return stats
+
+
+async def aget_task_stats(tasks, today=None, history_days=HISTORY_DAYS, user=None, weekdays=False):
+    """get_task_stats() with its queries run concurrently"""
+    if today is None:
+        today = timezone.now().date()
+
+    parts = [lambda: task_counters(tasks, today)]
+    if history_days:
+        parts.append(lambda: daily_history(tasks, today, history_days, user))
+    if weekdays:
+        parts.append(lambda: weekday_history(tasks, user))
+    stats, *history = await run_concurrently(*parts)
+
+    if history_days:
+        stats.daily = history.pop(0)
+    if weekdays:
+        stats.weekdays = history.pop(0)
+    return stats
+
+
+# The parts of get_task_stats(), one query each
+
+def task_counters(tasks, today):
+    """TaskStats with the counters filled in, from one conditional aggregate"""
+    # Aliases are prefixed so they can't clash with Task field names
+    counters = tasks.aggregate(
+        n_total=Count('id'),
+        n_completed=Count('id', filter=Q(completed=True)),
+        n_due_today=Count('id', filter=Q(due_date=today, completed=False)),
+        n_overdue=Count('id', filter=Q(due_date__lt=today, completed=False)),
+        n_high=Count('id', filter=Q(priority='high')),
+        n_medium=Count('id', filter=Q(priority='medium')),
+        n_low=Count('id', filter=Q(priority='low')),
+        n_high_open=Count('id', filter=Q(priority='high', completed=False)),
+        n_high_completed=Count('id', filter=Q(priority='high', completed=True)),
+    )
+    return TaskStats(today=today, **{key[2:]: value for key, value in counters.items()})
+
+
+def daily_history(tasks, today, history_days, user=None):
+    """Completions bucketed by day over the history window"""
+    history_start = today - timedelta(days=history_days - 1)
+    if user is not None:
+        return rollups.daily_completions(user, history_start, today)
+    daily_rows = (
+        completed_in_range(tasks, history_start, today)
+        .order_by()
+        .values(day=TruncDate('completed_at'))
+        .annotate(count=Count('id'))
+    )
+    return {row['day']: row['count'] for row in daily_rows}
+
+
+def weekday_history(tasks, user=None):
+    """All completions per weekday, Monday first"""
+    if user is not None:
+        return rollups.weekday_completions(user)
+    weekdays = [0] * 7
+    # Django week_day: Sunday=1, Monday=2 ... Saturday=7
+    weekday_rows = (
+        tasks.filter(completed=True, completed_at__isnull=False)
+        .order_by()
+        .values(week_day=ExtractWeekDay('completed_at'))
+        .annotate(count=Count('id'))
+    )
+    for row in weekday_rows:
+        weekdays[(row['week_day'] - 2) % 7] = row['count']
+    return weekdays
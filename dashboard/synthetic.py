@@ -0,0 +1,316 @@
+"""
+Synthetic data at production scale, for local benchmarks.
+
+seed_population() creates users with profiles, projects with members, and
+tasks spread over the last `days` days:
+
+- tasks per user and projects per user are skewed, a few heavy users and
+  many light ones, averaging the requested numbers
+- priorities are mostly medium, then low, then high
+- most tasks have a due date, typically a week or so after creation
+- the older a task, the more likely it is completed, usually soon after it
+  was created
+- recent days have more tasks than older ones
+
+Everything is inserted with bulk_create in batches, so no signal handler
+runs: the dashboard rollups (DailyTaskStats, UserStats) are counted while
+generating and written at the end, and project counters are rebuilt from
+the task table in one UPDATE. Search vectors come from database triggers
+as usual.
+
+The same `seed` and `today` always give the same data.
+"""
+import math
+import random
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta
+from itertools import accumulate
+from time import perf_counter
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import models, transaction
+from django.utils import timezone
+
+from accounts.models import UserProfile
+from projects.counters import rebuild_project_counters
+from projects.models import Project
+from tasks.models import Task
+from .models import DailyTaskStats, UserStats
+
+
+BATCH_SIZE = 5000
+
+# Every seeded user can log in with this password
+PASSWORD = 'seed-password'
+
+# (value, weight) pairs
+PRIORITY_WEIGHTS = [('medium', 50), ('low', 30), ('high', 20)]
+
+DUE_DATE_SHARE = 0.85
+PROJECT_SHARE = 0.6
+COMPLETED_PROJECT_SHARE = 0.15
+
+VERBS = ['Review', 'Write', 'Update', 'Plan', 'Fix', 'Call', 'Prepare', 'Send', 'Clean up', 'Research',
+         'Schedule', 'Draft', 'Test', 'Deploy', 'Organize', 'Book', 'Order', 'Check', 'Refactor', 'Present']
+NOUNS = ['report', 'budget', 'slides', 'invoice', 'meeting notes', 'release', 'onboarding doc', 'backlog',
+         'newsletter', 'roadmap', 'contract', 'dashboard', 'test plan', 'offsite', 'hiring plan', 'blog post',
+         'design review', 'API docs', 'quarterly goals', 'customer feedback']
+PROJECT_NAMES = ['Website', 'Mobile app', 'Marketing', 'Q{quarter} planning', 'Hiring', 'Infrastructure',
+                 'Research', 'Launch', 'Support', 'Home', 'Garden', 'Travel', 'Finance', 'Reading list']
+
+
+class PopulationExists(Exception):
+    pass
+
+
+@dataclass
+class Population:
+    users: int = 100
+    # Averages per user
+    projects: float = 5
+    tasks: float = 200
+    # Most members per project
+    members: int = 4
+    # Days of history
+    days: int = 365
+    seed: int = 0
+    # Usernames are '<prefix>-<n>'
+    prefix: str = 'seed'
+
+
+@dataclass
+class SeedReport:
+    users: int = 0
+    projects: int = 0
+    memberships: int = 0
+    tasks: int = 0
+    seconds: float = 0
+
+
+@contextmanager
+def historical_timestamps(*model_classes):
+    """
+    Let auto_now/auto_now_add fields of `model_classes` keep the values
+    given, so rows can be dated in the past
+    """
+    saved = []
+    for model_class in model_classes:
+        for field in model_class._meta.concrete_fields:
+            if isinstance(field, models.DateField) and (field.auto_now or field.auto_now_add):
+                saved.append((field, field.auto_now, field.auto_now_add))
+                field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def skewed_count(rng, mean):
+    """Non-negative integer averaging `mean`, heavily skewed (log-normal)"""
+    if mean <= 0:
+        return 0
+    # exp(mu + sigma**2 / 2) is the mean of a log-normal
+    return int(rng.lognormvariate(math.log(mean) - 0.5, 1.0))
+
+
+def past_moment(rng, now, days):
+    """A datetime in the last `days` days, recent ones more likely"""
+    return now - timedelta(days=days * rng.betavariate(1, 2.5))
+
+
+class Generator:
+    def __init__(self, population, now, batch_size=BATCH_SIZE, progress=None):
+        self.population = population
+        self.rng = random.Random(population.seed)
+        self.now = now
+        self.batch_size = batch_size
+        self.progress = progress
+        self.report = SeedReport()
+        # Counted while generating, written at the end
+        self.daily = defaultdict(Counter)
+        self.totals = defaultdict(Counter)
+        self.priorities, weights = zip(*PRIORITY_WEIGHTS)
+        self.priority_cum_weights = list(accumulate(weights))
+        # timezone.localdate() looks the zone up on every call
+        self.tz = timezone.get_current_timezone()
+
+    def run(self):
+        profile_ids = self.create_users()
+        projects_of = self.create_projects(profile_ids)
+        self.create_tasks(profile_ids, projects_of)
+        self.write_counters(profile_ids)
+        return self.report
+
+    # Users
+
+    def create_users(self):
+        prefix = self.population.prefix
+        password = make_password(PASSWORD)
+        users = []
+        for number in range(self.population.users):
+            users.append(User(
+                username=f'{prefix}-{number}',
+                email=f'{prefix}-{number}@example.com',
+                first_name=f'Seed {number}',
+                password=password,
+                date_joined=past_moment(self.rng, self.now, self.population.days),
+            ))
+        users = User.objects.bulk_create(users, batch_size=self.batch_size)
+        profiles = UserProfile.objects.bulk_create(
+            [UserProfile(user=user) for user in users], batch_size=self.batch_size
+        )
+        self.report.users = len(users)
+        self.log(f'{len(users)} users')
+        return [profile.id for profile in profiles]
+
+    # Projects
+
+    def create_projects(self, profile_ids):
+        rng = self.rng
+        colors = [value for value, label in Project.COLOR_CHOICES]
+        projects = []
+        for profile_id in profile_ids:
+            for number in range(skewed_count(rng, self.population.projects)):
+                created_at = past_moment(rng, self.now, self.population.days)
+                name = rng.choice(PROJECT_NAMES).format(quarter=rng.randint(1, 4))
+                projects.append(Project(
+                    user_id=profile_id,
+                    title=f'{name} {number + 1}',
+                    description=f'{name} work' if rng.random() < 0.5 else '',
+                    color=rng.choice(colors),
+                    completed=rng.random() < COMPLETED_PROJECT_SHARE,
+                    created_at=created_at,
+                    updated_at=created_at,
+                ))
+        projects = Project.objects.bulk_create(projects, batch_size=self.batch_size)
+
+        # Projects each user may file tasks under: their own and those they
+        # are a member of
+        projects_of = defaultdict(list)
+        memberships = []
+        Membership = Project.members.through
+        for project in projects:
+            projects_of[project.user_id].append(project.id)
+            count = rng.randint(0, min(self.population.members, len(profile_ids) - 1))
+            # One extra in case the owner is drawn
+            drawn = rng.sample(profile_ids, count + 1)
+            for member_id in [member_id for member_id in drawn if member_id != project.user_id][:count]:
+                memberships.append(Membership(project_id=project.id, userprofile_id=member_id))
+                projects_of[member_id].append(project.id)
+            if project.completed:
+                self.totals[project.user_id]['completed_projects'] += 1
+            self.totals[project.user_id]['total_projects'] += 1
+        Membership.objects.bulk_create(memberships, batch_size=self.batch_size)
+
+        self.report.projects = len(projects)
+        self.report.memberships = len(memberships)
+        self.log(f'{len(projects)} projects, {len(memberships)} memberships')
+        return projects_of
+
+    # Tasks
+
+    def create_tasks(self, profile_ids, projects_of):
+        batch = []
+        for profile_id in profile_ids:
+            for number in range(skewed_count(self.rng, self.population.tasks)):
+                batch.append(self.new_task(profile_id, projects_of[profile_id]))
+                if len(batch) >= self.batch_size:
+                    self.insert_tasks(batch)
+                    batch = []
+        if batch:
+            self.insert_tasks(batch)
+
+    def new_task(self, profile_id, project_ids):
+        rng = self.rng
+        created_at = past_moment(rng, self.now, self.population.days)
+        age_days = (self.now - created_at).total_seconds() / 86400
+
+        due_date = None
+        if rng.random() < DUE_DATE_SHARE:
+            due_date = created_at.astimezone(self.tz).date() + timedelta(days=round(rng.triangular(-2, 45, 7)))
+
+        # A day-old task is done one time in five, a month-old one mostly
+        completed = rng.random() < 0.15 + 0.7 * min(age_days / 30, 1)
+        completed_at = None
+        if completed:
+            completed_at = created_at + (self.now - created_at) * rng.betavariate(1.2, 6)
+
+        project_id = None
+        if project_ids and rng.random() < PROJECT_SHARE:
+            project_id = rng.choice(project_ids)
+
+        title = f'{rng.choice(VERBS)} {rng.choice(NOUNS)}'
+        return Task(
+            user_id=profile_id,
+            project_id=project_id,
+            title=title,
+            description=f'{title} before the deadline' if rng.random() < 0.3 else '',
+            priority=rng.choices(self.priorities, cum_weights=self.priority_cum_weights)[0],
+            due_date=due_date,
+            completed=completed,
+            completed_at=completed_at,
+            created_at=created_at,
+            updated_at=completed_at or created_at,
+        )
+
+    def insert_tasks(self, batch):
+        Task.objects.bulk_create(batch, batch_size=self.batch_size)
+        daily, totals, tz = self.daily, self.totals, self.tz
+        for task in batch:
+            daily[task.user_id, task.created_at.astimezone(tz).date()]['created'] += 1
+            totals[task.user_id]['total_tasks'] += 1
+            if task.completed:
+                daily[task.user_id, task.completed_at.astimezone(tz).date()]['completed'] += 1
+                totals[task.user_id]['completed_tasks'] += 1
+        self.report.tasks += len(batch)
+        self.log(f'{self.report.tasks} tasks')
+
+    # Counters
+
+    def write_counters(self, profile_ids):
+        # One UPDATE with subqueries beats bulk_update's CASE per project
+        rebuild_project_counters(Project.objects.filter(user_id__in=profile_ids))
+
+        DailyTaskStats.objects.bulk_create(
+            [
+                DailyTaskStats(user_id=user_id, date=day, created=counts['created'], completed=counts['completed'])
+                for (user_id, day), counts in self.daily.items()
+            ],
+            batch_size=self.batch_size,
+        )
+        UserStats.objects.bulk_create(
+            [
+                UserStats(user_id=profile_id, **{name: self.totals[profile_id][name] for name in (
+                    'total_tasks', 'completed_tasks', 'total_projects', 'completed_projects'
+                )})
+                for profile_id in profile_ids
+            ],
+            batch_size=self.batch_size,
+        )
+        self.log('counters and rollups')
+
+    def log(self, message):
+        if self.progress:
+            self.progress(message)
+
+
+def seed_population(population, today=None, batch_size=BATCH_SIZE, progress=None):
+    """
+    Create `population` in one transaction and return a SeedReport.
+    Timestamps run up to the end of `today` (default: today). Raises
+    PopulationExists if users with its prefix exist already.
+    """
+    if User.objects.filter(username__startswith=f'{population.prefix}-').exists():
+        raise PopulationExists(f"Users named '{population.prefix}-*' exist already")
+
+    today = today or timezone.localdate()
+    now = timezone.make_aware(datetime.combine(today, time(18)))
+    started = perf_counter()
+    with transaction.atomic(), historical_timestamps(Project, Task):
+        report = Generator(population, now, batch_size, progress).run()
+    report.seconds = perf_counter() - started
+    return report
@@ -0,0 +1,41 @@
+from django import template
+
+from .. import cache as user_cache
+
+register = template.Library()
+
+
+class UserCacheNode(template.Node):
+    def __init__(self, nodelist, name, vary_on):
+        self.nodelist = nodelist
+        self.name = name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        user = context.get('user')
+        profile = getattr(user, 'userprofile', None) if user is not None and user.is_authenticated else None
+        if profile is None:
+            return self.nodelist.render(context)
+        return user_cache.get_or_compute(
+            f'fragment:{self.name.resolve(context)}', profile.id,
+            lambda: self.nodelist.render(context),
+            parts=[variable.resolve(context) for variable in self.vary_on],
+        )
+
+
+@register.tag
+def usercache(parser, token):
+    """
+    Cache the enclosed fragment per user and data version (dashboard/cache.py),
+    so it is rendered again only once one of the user's tasks, projects or
+    their profile changed, plus whatever else it varies on. Rendered as is
+    for anonymous users. Anything per request, like {% csrf_token %}, must
+    stay outside.
+    Usage: {% usercache 'sidebar' active_page %}...{% endusercache %}
+    """
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' tag requires a fragment name")
+    nodelist = parser.parse(('endusercache',))
+    parser.delete_first_token()
+    return UserCacheNode(nodelist, parser.compile_filter(bits[1]), [parser.compile_filter(bit) for bit in bits[2:]])
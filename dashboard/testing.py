@@ -0,0 +1,135 @@
+"""
+Test helpers for query budgets: seeded users of different sizes and the
+query counts of their pages.
+
+    class ProjectQueryTests(QueryScalingTestCase):
+        def test_project_list(self):
+            self.assertConstantQueries(lambda seed: reverse('projects:project_list'))
+
+assertConstantQueries() requests the URL as each of the SIZES seeded users
+and fails unless they all take the same number of queries, and no more
+than the view's budget.
+
+The test cases are TransactionTestCases: async views query from worker
+threads with connections of their own, which wouldn't see data left
+uncommitted by TestCase.
+
+BudgetTestRunner, the project's TEST_RUNNER, makes every request of every
+test raise QueryBudgetExceeded when it goes over its view's budget, unless
+QUERY_BUDGET_MODE is set explicitly.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TransactionTestCase, override_settings
+from django.test.runner import DiscoverRunner
+from django.urls import resolve
+from django.utils import timezone
+
+from projects.models import Project
+from tasks.models import Task
+from .budgets import get_query_budget
+
+
+# Projects per seeded user; each has TASKS_PER_PROJECT tasks and as many
+# members as there are projects
+SIZES = [1, 5, 20]
+TASKS_PER_PROJECT = 6
+PRIORITIES = ['high', 'medium', 'low']
+
+
+class Seed:
+    def __init__(self, user, projects, tasks, members):
+        self.user = user
+        self.user_profile = user.userprofile
+        self.projects = projects
+        self.tasks = tasks
+        self.members = members
+
+
+def seed_user(username, size):
+    """
+    A user with `size` projects, each with TASKS_PER_PROJECT tasks (due over
+    the weeks around today, a third of them completed) and `size` members,
+    plus `size` tasks outside any project.
+    """
+    # No passwords: tests log in with force_login(), and hashing is slow
+    user = User.objects.create_user(username, f'{username}@example.com')
+    user_profile = user.userprofile
+    members = [
+        User.objects.create_user(f'{username}-member-{number}', f'{username}-{number}@example.com').userprofile
+        for number in range(size)
+    ]
+    today = timezone.localdate()
+    projects = []
+    tasks = []
+    for number in range(size):
+        project = Project.objects.create(user=user_profile, title=f'{username} project {number}', color='blue')
+        project.members.add(*members)
+        projects.append(project)
+        for offset in range(TASKS_PER_PROJECT):
+            tasks.append(new_task(user_profile, project, number * TASKS_PER_PROJECT + offset, today))
+    for number in range(size):
+        tasks.append(new_task(user_profile, None, number, today))
+    return Seed(user, projects, tasks, members)
+
+
+def new_task(user_profile, project, number, today):
+    task = Task(
+        user=user_profile,
+        project=project,
+        title=f'Task {number}',
+        priority=PRIORITIES[number % 3],
+        due_date=today + timedelta(days=number % 21 - 10),
+    )
+    # Through save(), so counters and rollups are kept like in the app
+    task.set_completed(number % 3 == 0)
+    task.save()
+    return task
+
+
+class QueryScalingTestCase(TransactionTestCase):
+    """Users seeded at each of SIZES, with assertConstantQueries()"""
+
+    def setUp(self):
+        # Cached pages would hide their queries
+        cache.clear()
+        self.seeds = [seed_user(f'user{size}', size) for size in SIZES]
+
+    def query_count(self, seed, url, method='get', **kwargs):
+        """Queries run by QueryBudgetMiddleware's count for one request"""
+        self.client.force_login(seed.user)
+        response = getattr(self.client, method)(url, **kwargs)
+        self.assertLess(response.status_code, 400, f'{url}: {response.status_code}')
+        return response.wsgi_request.query_stats.count
+
+    def assertConstantQueries(self, url_for, method='get', **kwargs):
+        """
+        `url_for(seed)` requested as every seeded user takes the same
+        number of queries, within the view's budget
+        """
+        counts = {}
+        for seed in self.seeds:
+            url = url_for(seed)
+            counts[len(seed.projects)] = self.query_count(seed, url, method, **kwargs)
+        self.assertEqual(len(set(counts.values())), 1, f'{url}: queries by size {counts}')
+
+        budget = get_query_budget(resolve(url.split('?')[0]).func)
+        if budget is not None:
+            self.assertLessEqual(max(counts.values()), budget.queries, f'{url}: over its budget')
+        return counts
+
+
+class BudgetTestRunner(DiscoverRunner):
+    """DiscoverRunner with query budgets raising by default"""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.budget_mode = override_settings(QUERY_BUDGET_MODE=settings.QUERY_BUDGET_MODE or 'raise')
+        self.budget_mode.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.budget_mode.disable()
+        super().teardown_test_environment(**kwargs)
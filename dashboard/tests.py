@@ -1,3 +1,548 @@
-from django.test import TestCase
+import csv
+import json
+import os
+import threading
+import time
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.template import Context, Template
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import path, reverse
+from django.utils import timezone
+
+from projects.models import Project
+from tasks.models import Task
+from . import cache as user_cache, calendar_data, export, reports, rollups, worker
+from .budgets import QueryBudget, QueryBudgetExceeded, QueryStats, count_queries, get_mode, query_budget
+from .cache import bump_version, get_or_compute, make_key
+from .concurrency import run_concurrently
+from .models import DailyTaskStats, ReportJob, UserStats
+from .plans import busiest_profile, capture_plans, check_plans, load_baselines, plan_regressions
+from .synthetic import Population, seed_population
+from .testing import QueryScalingTestCase
+
+
+def crash_render(job_id):
+    # Dies like a rendering process killed for memory
+    os._exit(1)
+
+
+def run_queries(count):
+    for number in range(count):
+        User.objects.filter(id=number).exists()
+
+
+@query_budget(queries=1)
+def one_query_view(request):
+    run_queries(1)
+    return HttpResponse()
+
+
+@query_budget(queries=1)
+def two_queries_view(request):
+    run_queries(2)
+    return HttpResponse()
+
+
+@query_budget(queries=1, time=1)
+def slow_query_view(request):
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_sleep(0.01)')
+    return HttpResponse()
+
+
+@query_budget(queries=3)
+async def concurrent_queries_view(request):
+    await run_concurrently(*[lambda: run_queries(1)] * 3)
+    return HttpResponse()
+
+
+urlpatterns = [
+    path('one/', one_query_view),
+    path('two/', two_queries_view),
+    path('slow/', slow_query_view),
+    path('concurrent/', concurrent_queries_view),
+]
+
+
+@override_settings(ROOT_URLCONF='dashboard.tests', QUERY_BUDGET_MODE='raise')
+class QueryBudgetMiddlewareTests(TestCase):
+    def test_within_budget(self):
+        response = self.client.get('/one/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.wsgi_request.query_stats.count, 1)
+
+    def test_over_budget_raises(self):
+        with self.assertRaisesMessage(QueryBudgetExceeded, '2 queries (budget 1)'):
+            self.client.get('/two/')
+
+    @override_settings(QUERY_BUDGET_MODE='raise')
+    def test_over_time_logs(self):
+        with self.assertLogs('dashboard.budgets', 'WARNING') as logs:
+            response = self.client.get('/slow/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('ms of SQL (budget 1ms)', logs.output[0])
+
+    def test_default_mode(self):
+        # Set by BudgetTestRunner
+        self.assertEqual(get_mode(), 'raise')
+        with override_settings(QUERY_BUDGET_MODE=None, DEBUG=True):
+            self.assertEqual(get_mode(), 'log')
+
+    @override_settings(QUERY_BUDGET_MODE='log')
+    def test_over_budget_logs(self):
+        with self.assertLogs('dashboard.budgets', 'WARNING') as logs:
+            response = self.client.get('/two/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('/two/', logs.output[0])
+
+    def test_writes_are_not_budgeted(self):
+        response = self.client.post('/two/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_counts_worker_thread_queries(self):
+        response = self.client.get('/concurrent/')
+        self.assertEqual(response.wsgi_request.query_stats.count, 3)
+
+    @override_settings(QUERY_BUDGET_MODE='off')
+    def test_off(self):
+        response = self.client.get('/two/')
+        self.assertFalse(hasattr(response.wsgi_request, 'query_stats'))
+
+
+class QueryStatsTests(TestCase):
+    def test_count_queries(self):
+        with count_queries(record_sql=True) as stats:
+            run_queries(2)
+        run_queries(1)
+        self.assertEqual(stats.count, 2)
+        self.assertEqual(len(stats.queries), 2)
+
+    def test_over(self):
+        stats = QueryStats(durations=[30.0, 30.0])
+        self.assertEqual(stats.over(QueryBudget(2, 100)), [])
+        self.assertEqual(stats.over(QueryBudget(1)), ['2 queries (budget 1)'])
+        self.assertEqual(stats.over(QueryBudget(2, 50)), ['60.0ms of SQL (budget 50ms)'])
+
+
+class DashboardQueryTests(QueryScalingTestCase):
+    def test_pages(self):
+        for name in ['dashboard:dashboard', 'dashboard:analytics', 'dashboard:reports', 'dashboard:calendar']:
+            with self.subTest(name):
+                self.assertConstantQueries(lambda seed: reverse(name))
+
+    def test_json(self):
+        for name in ['dashboard:calendar_data', 'dashboard:heatmap']:
+            with self.subTest(name):
+                self.assertConstantQueries(lambda seed: reverse(name))
+
+    def test_calendar_year(self):
+        self.assertConstantQueries(lambda seed: reverse('dashboard:calendar_data') + '?range=year')
+
+
+# Data plan_baselines.json was captured on, with
+#   manage.py seed --users 300 --tasks 30 --today 2026-10-18
+#   manage.py explain_queries --today 2026-10-18 --analyze --update-baseline
+PLAN_TODAY = date(2026, 10, 18)
+PLAN_POPULATION = Population(users=300, tasks=30)
+
+
+class QueryPlanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed_population(PLAN_POPULATION, today=PLAN_TODAY)
+
+    def test_no_regressions(self):
+        plans = capture_plans(busiest_profile(), PLAN_TODAY, analyze=True)
+        checks = check_plans(plans, load_baselines())
+        self.assertEqual({check.name: check.regressions for check in checks if check.regressions}, {})
+        self.assertEqual([check.name for check in checks if check.new], [])
+
+    def test_flags_regressions(self):
+        sort = {'node': 'Sort', 'sort_key': ['title'], 'children': [
+            {'node': 'Index Scan', 'relation': 'tasks_task', 'index': 'task_user_title_id_idx', 'index_cond': True},
+        ]}
+        self.assertEqual(plan_regressions({'node': 'Seq Scan', 'relation': 'tasks_task'}), ['sequential scan on tasks_task'])
+        self.assertEqual(
+            plan_regressions({'node': 'Index Scan', 'relation': 'tasks_task', 'index': 'task_user_title_id_idx', 'index_cond': False}),
+            ['whole index task_user_title_id_idx of tasks_task scanned'],
+        )
+        self.assertEqual(plan_regressions(sort, baseline=sort['children'][0]), ['sort on title without an index'])
+        self.assertEqual(plan_regressions(sort, baseline=sort), [])
+        # Small tables may be read whole
+        self.assertEqual(plan_regressions({'node': 'Seq Scan', 'relation': 'auth_user'}), [])
+
+
+class FragmentCacheTests(TransactionTestCase):
+    fragment = Template("{% load fragment_cache %}{% usercache 'fragment' page %}{{ title }}{% endusercache %}")
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='fragments')
+
+    def render(self, title, page='tasks', user=None):
+        return self.fragment.render(Context({'user': user or self.user, 'title': title, 'page': page}))
+
+    def test_cached_until_data_changes(self):
+        self.assertEqual(self.render('first'), 'first')
+        self.assertEqual(self.render('second'), 'first')
+        bump_version(self.user.userprofile.id)
+        self.assertEqual(self.render('second'), 'second')
+
+    def test_varies(self):
+        self.render('first')
+        self.assertEqual(self.render('second', page='projects'), 'second')
+        self.assertEqual(self.render('second', user=User.objects.create(username='other')), 'second')
+        self.assertEqual(self.render('second', user=AnonymousUser()), 'second')
+
+    def test_dashboard_shows_changes(self):
+        # Transactions commit here, which bumps the data version
+        self.client.force_login(self.user)
+        task = Task.objects.create(user=self.user.userprofile, title='Old title', priority='high')
+        self.assertContains(self.client.get(reverse('dashboard:dashboard')), 'Old title', count=2)
+
+        task.title = 'New title'
+        task.save()
+        response = self.client.get(reverse('dashboard:dashboard'))
+        self.assertNotContains(response, 'Old title')
+        self.assertContains(response, 'New title', count=2)
+
+
+class RollupTests(TestCase):
+    def setUp(self):
+        self.profile = User.objects.create(username='rollups').userprofile
+        self.today = timezone.localdate()
+
+    def daily(self, day=None):
+        row = DailyTaskStats.objects.filter(user=self.profile, date=day or self.today).first()
+        return (row.created, row.completed, row.reopened) if row else None
+
+    def totals(self):
+        stats = UserStats.objects.get(user=self.profile)
+        return stats.total_tasks, stats.completed_tasks, stats.total_projects, stats.completed_projects
+
+    def test_task_lifecycle(self):
+        task = Task.objects.create(user=self.profile, title='Task')
+        self.assertEqual(self.daily(), (1, 0, 0))
+        self.assertEqual(self.totals(), (1, 0, 0, 0))
+
+        task.set_completed(True)
+        task.save()
+        self.assertEqual(self.daily(), (1, 1, 0))
+        self.assertEqual(self.totals(), (1, 1, 0, 0))
+
+        # Saving again without a change counts nothing
+        task.title = 'Renamed'
+        task.save()
+        self.assertEqual(self.daily(), (1, 1, 0))
+
+        task.set_completed(False)
+        task.save()
+        self.assertEqual(self.daily(), (1, 0, 1))
+        self.assertEqual(self.totals(), (1, 0, 0, 0))
+
+        task.delete()
+        self.assertEqual(self.daily(), (0, 0, 1))
+        self.assertEqual(self.totals(), (0, 0, 0, 0))
+
+    def test_completed_on_another_day(self):
+        task = Task(user=self.profile, title='Task', completed=True)
+        task.completed_at = timezone.now() - timedelta(days=3)
+        task.save()
+        self.assertEqual(self.daily(), (1, 0, 0))
+        self.assertEqual(self.daily(self.today - timedelta(days=3)), (0, 1, 0))
+
+    def test_never_below_zero(self):
+        rollups.bump_daily(self.profile.id, self.today, created=-1)
+        self.assertIsNone(self.daily())
+        Task.objects.create(user=self.profile, title='Task')
+        rollups.bump_daily(self.profile.id, self.today, created=-5)
+        self.assertEqual(self.daily(), (0, 0, 0))
+
+    def test_completed_without_date(self):
+        done = Task.objects.create(user=self.profile, title='Done', completed=True)
+        legacy = [Task.objects.create(user=self.profile, title=f'Legacy {number}') for number in range(2)]
+        # As written by update(): completed, but on no day
+        Task.objects.filter(id__in=[task.id for task in legacy]).update(completed=True)
+        self.assertEqual(self.daily(), (3, 1, 0))
+
+        reopened, deleted = Task.objects.filter(id__in=[task.id for task in legacy]).order_by('id')
+        reopened.set_completed(False)
+        reopened.save()
+        deleted.delete()
+        self.assertEqual(self.daily(), (2, 1, 1))
+        done.delete()
+        self.assertEqual(self.daily(), (1, 0, 1))
+
+    def test_user_stats_created_concurrently(self):
+        count_user_totals = rollups.count_user_totals
+
+        def created_meanwhile(user_id):
+            # Another transaction creates the row between our UPDATE and INSERT
+            totals = count_user_totals(user_id)
+            UserStats.objects.create(user_id=user_id, **totals)
+            return totals
+
+        Task.objects.bulk_create([Task(user=self.profile, title='Task')])
+        with mock.patch.object(rollups, 'count_user_totals', created_meanwhile):
+            rollups.bump_user_stats(self.profile.id, total_tasks=1)
+        self.assertEqual(UserStats.objects.filter(user=self.profile).count(), 1)
+        self.assertEqual(self.totals(), (2, 0, 0, 0))
+
+    def test_projects(self):
+        project = Project.objects.create(user=self.profile, title='Project')
+        project.completed = True
+        project.save()
+        self.assertEqual(self.totals(), (0, 0, 1, 1))
+        project.delete()
+        self.assertEqual(self.totals(), (0, 0, 0, 0))
+
+    def test_tasks_changed(self):
+        now = timezone.now()
+        yesterday = now - timedelta(days=1)
+        created = {'created_at': now, 'completed': True, 'completed_at': yesterday, 'updated_at': now}
+        reopened = {'created_at': yesterday, 'completed': False, 'completed_at': None, 'updated_at': now}
+        rollups.record_tasks_changed(self.profile.id, [
+            (None, created),
+            (None, {**created, 'completed': False, 'completed_at': None}),
+            ({**reopened, 'completed': True, 'completed_at': yesterday}, reopened),
+        ])
+        self.assertEqual(self.daily(), (2, 0, 1))
+        # One completed and one reopened yesterday cancel out
+        self.assertIsNone(self.daily(self.today - timedelta(days=1)))
+        rollups.record_tasks_changed(self.profile.id, [(created, None)])
+        self.assertEqual(self.daily(), (1, 0, 1))
+
+    def test_rebuild(self):
+        Task.objects.create(user=self.profile, title='Task', completed=True)
+        DailyTaskStats.objects.filter(user=self.profile).update(created=5, reopened=2)
+        UserStats.objects.filter(user=self.profile).update(total_tasks=7)
+        stale = DailyTaskStats.objects.create(user=self.profile, date=date(2020, 1, 1), created=3)
+
+        drift = rollups.rebuild_user_rollups(self.profile.id)
+        self.assertIn(f'{self.today}: created 5 -> 1', drift)
+        self.assertIn('totals: total_tasks 7 -> 1', drift)
+        self.assertIn('2020-01-01: created 3 -> 0', drift)
+        # reopened is kept, empty rows dropped
+        self.assertEqual(self.daily(), (1, 1, 2))
+        self.assertFalse(DailyTaskStats.objects.filter(pk=stale.pk).exists())
+        self.assertEqual(self.totals(), (1, 1, 0, 0))
+        self.assertEqual(rollups.rebuild_user_rollups(self.profile.id), [])
+
+
+class UserCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.computed = []
+
+    def compute(self, value='value', delay=0):
+        def compute():
+            time.sleep(delay)
+            self.computed.append(value)
+            return value
+        return compute
+
+    def test_cached_per_version(self):
+        self.assertEqual(get_or_compute('context', 1, self.compute('first')), 'first')
+        self.assertEqual(get_or_compute('context', 1, self.compute('second')), 'first')
+        self.assertEqual(get_or_compute('context', 1, self.compute('part'), parts=['2026-10']), 'part')
+        self.assertEqual(get_or_compute('context', 2, self.compute('other')), 'other')
+
+        bump_version(1)
+        self.assertEqual(get_or_compute('context', 1, self.compute('second')), 'second')
+        self.assertEqual(get_or_compute('context', 2, self.compute('third')), 'other')
+
+    def test_none_cached(self):
+        get_or_compute('context', 1, self.compute(None))
+        get_or_compute('context', 1, self.compute(None))
+        self.assertEqual(self.computed, [None])
+
+    def test_bumped_on_commit(self):
+        get_or_compute('context', 1, self.compute('first'))
+        with self.captureOnCommitCallbacks() as callbacks:
+            user_cache.bump_version_on_commit(1)
+            self.assertEqual(get_or_compute('context', 1, self.compute('second')), 'first')
+        for callback in callbacks:
+            callback()
+        self.assertEqual(get_or_compute('context', 1, self.compute('second')), 'second')
+
+    def test_single_flight(self):
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(get_or_compute('context', 1, self.compute(delay=0.1))))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ['value'] * 5)
+        self.assertEqual(self.computed, ['value'])
+
+    def test_waits_for_other_process(self):
+        # Another process holds the lock and stores the value shortly
+        key = make_key('context', 1, user_cache.get_version(1))
+        cache.add(f'{key}:lock', 1)
+        threading.Timer(0.1, cache.set, [key, 'theirs']).start()
+        self.assertEqual(get_or_compute('context', 1, self.compute('ours')), 'theirs')
+        self.assertEqual(self.computed, [])
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='export')
+        profile = cls.user.userprofile
+        project = Project.objects.create(user=profile, title='Project')
+        for number in range(5):
+            Task.objects.create(
+                user=profile, title=f'Task {number}', priority='high' if number % 2 else 'low',
+                project=project if number < 2 else None, completed=number == 4,
+            )
+        Task.objects.create(user=User.objects.create(username='other').userprofile, title='Not mine')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def get_export(self, **params):
+        response = self.client.get(reverse('dashboard:export_tasks'), params)
+        self.assertEqual(response['Cache-Control'], 'no-store')
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv(self):
+        rows = list(csv.DictReader(self.get_export().splitlines()))
+        self.assertEqual([row['title'] for row in rows], [f'Task {number}' for number in range(5)])
+        self.assertEqual(rows[0]['project'], 'Project')
+        self.assertEqual(rows[4]['completed'], 'True')
+        self.assertEqual(rows[4]['completed_at'], Task.objects.get(title='Task 4').completed_at.isoformat())
+
+    def test_ndjson(self):
+        rows = [json.loads(line) for line in self.get_export(format='ndjson').splitlines()]
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(list(rows[0]), export.COLUMN_NAMES)
+        self.assertIsNone(rows[4]['project'])
+
+    def test_filters(self):
+        titles = lambda **params: [row['title'] for row in csv.DictReader(self.get_export(**params).splitlines())]
+        self.assertEqual(titles(project='none', status='open'), ['Task 2', 'Task 3'])
+        self.assertEqual(titles(priority='high'), ['Task 1', 'Task 3'])
+        self.assertEqual(titles(status='completed', range='7'), ['Task 4'])
+        self.assertEqual(titles(date_field='completed', end='2000-01-01'), [])
+
+    @mock.patch.object(export, 'CHUNK_SIZE', 2)
+    def test_chunks(self):
+        self.assertEqual(len(list(export.stream_export(self.user.userprofile, export.ExportFilters()))), 4)
+
+    @mock.patch.object(export, 'CHUNK_SIZE', 2)
+    async def test_streamed_under_asgi(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('dashboard:export_tasks'), {'format': 'ndjson'})
+        self.assertTrue(response.is_async)
+        chunks = [chunk async for chunk in response.streaming_content]
+        self.assertEqual([chunk.decode().count('\n') for chunk in chunks], [2, 2, 1])
+        self.assertEqual(json.loads(chunks[0].splitlines()[0])['title'], 'Task 0')
+
+
+class ReportQueueTests(TestCase):
+    def setUp(self):
+        profile = User.objects.create(username='reports').userprofile
+        today = timezone.localdate()
+        self.jobs = [reports.request_report(profile, 'summary', 'csv', today, today)[0]]
+        self.jobs.append(reports.request_report(profile, 'priority', 'csv', today, today)[0])
+
+    def status(self):
+        return [ReportJob.objects.get(pk=job.pk).status for job in self.jobs]
+
+    def test_requeued_without_heartbeat(self):
+        self.assertEqual(len(reports.claim_jobs(5)), 2)
+        # Both started long ago, only the first one's worker is still alive
+        long_ago = timezone.now() - reports.STALE_AFTER * 3
+        ReportJob.objects.update(started_at=long_ago, heartbeat_at=long_ago)
+        reports.heartbeat([self.jobs[0].id])
+
+        self.assertEqual(reports.requeue_stale_jobs(), 1)
+        self.assertEqual(self.status(), [ReportJob.STATUS_RUNNING, ReportJob.STATUS_PENDING])
+        self.assertEqual(reports.claim_jobs(5), [self.jobs[1].id])
+
+    def test_broken_pool_fails_running_jobs(self):
+        output = StringIO()
+        # Pool processes import the patched function by name
+        with mock.patch.object(worker, 'render', crash_render):
+            call_command('run_report_worker', '--once', '--processes=2', '--poll-interval=0.1', stdout=output)
+        self.assertEqual(self.status(), [ReportJob.STATUS_FAILED] * 2)
+        self.assertIn('Restarting the process pool', output.getvalue())
+
+
+class CalendarDataTests(TestCase):
+    today = date(2026, 10, 18)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.profile = User.objects.create(username='calendar').userprofile
+        add = lambda title, due_date, priority='medium', completed=False: Task.objects.create(
+            user=cls.profile, title=title, due_date=due_date, priority=priority, completed=completed,
+        )
+        # Five on one day: the preview shows the three highest priority ones
+        for number, priority in enumerate(['low', 'high', 'medium', 'high', 'low']):
+            add(f'Busy {number}', date(2026, 10, 5), priority, completed=number == 0)
+        for number in range(5):
+            add(f'Today {number}', cls.today)
+        add('Overdue', date(2026, 9, 30))
+        add('Done', date(2026, 9, 30), completed=True)
+        add('December', date(2026, 12, 1), 'high')
+        add('Undated', None)
+        Task.objects.create(user=User.objects.create(username='other').userprofile, title='Not mine', due_date=cls.today)
+
+    def build(self, range_name='month', month=10):
+        return calendar_data.build_calendar(self.profile, self.today, 2026, month, range_name)
+
+    def test_month(self):
+        with self.assertNumQueries(3):
+            data = self.build()
+        busy = data.counts[date(2026, 10, 5)]
+        self.assertEqual((busy.total, busy.completed, busy.open, busy.high, busy.low), (5, 1, 4, 2, 2))
+        # Overdue counts open tasks before today, in any month
+        self.assertEqual((data.total, data.completed, data.overdue), (10, 1, 5))
+
+        # October 2026 starts on a Thursday; weeks start on Sunday
+        first_week, second_week = data.months[0].weeks[:2]
+        self.assertEqual(first_week[:4], [None] * 4)
+        self.assertEqual(first_week[4].date, date(2026, 10, 1))
+        day = second_week[1]
+        self.assertEqual([task.title for task in day.preview], ['Busy 1', 'Busy 3', 'Busy 2'])
+        self.assertEqual(day.more, 2)
+        # Every task of today, for the list beside the calendar
+        self.assertEqual(len(data.today_tasks), 5)
+
+    def test_ranges(self):
+        quarter = self.build('quarter', month=11)
+        self.assertEqual((quarter.start, quarter.end), (date(2026, 10, 1), date(2026, 12, 31)))
+        self.assertEqual(quarter.total, 11)
+        # Counts only beyond a single month
+        self.assertEqual(quarter.tasks, {})
+        year = self.build('year')
+        self.assertEqual(len(year.months), 12)
+        self.assertEqual(year.total, 13)
+
+    def test_clean_month(self):
+        self.assertEqual(calendar_data.clean_month({'year': '2027', 'month': '2'}, self.today), (2027, 2))
+        for params in [{'month': '13'}, {'year': 'next'}, {'year': '9999'}]:
+            self.assertEqual(calendar_data.clean_month(params, self.today), (2026, 10))
+        self.assertEqual(calendar_data.shift_month(2026, 12, 1), (2027, 1))
+        self.assertEqual(calendar_data.shift_month(2026, 1, -13), (2024, 12))
+
+    def test_json(self):
+        self.client.force_login(self.profile.user)
+        data = self.client.get(reverse('dashboard:calendar_data'), {'year': 2026, 'month': 10}).json()
+        self.assertEqual(data['days']['2026-10-05']['open'], 4)
+        self.assertEqual(len(data['tasks']['2026-10-05']), 3)
+        self.assertEqual((data['previous'], data['next']), ({'year': 2026, 'month': 9}, {'year': 2026, 'month': 11}))
+        response = self.client.get(reverse('dashboard:calendar_data'), {'range': 'decade'})
+        self.assertEqual(response.status_code, 400)
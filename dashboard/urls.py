@@ -5,7 +5,14 @@ app_name = 'dashboard'
 
 urlpatterns = [
     path('', views.dashboard_view, name='dashboard'),
+    path('heatmap/', views.heatmap_view, name='heatmap'),
     path('analytics/', views.analytics_view, name='analytics'),
     path('reports/', views.reports_view, name='reports'),
+    path('reports/export/', views.export_tasks_view, name='export_tasks'),
+    path('reports/generate/', views.generate_report_view, name='generate_report'),
+    path('reports/status/', views.report_status_view, name='report_status'),
+    path('reports/<int:job_id>/download/', views.report_download_view, name='report_download'),
+    path('reports/<int:job_id>/delete/', views.report_delete_view, name='report_delete'),
     path('calendar/', views.calendar_view, name='calendar'),
+    path('calendar/data/', views.calendar_data_view, name='calendar_data'),
 ]
@@ -1,328 +1,382 @@
-from django.shortcuts import render, redirect
+from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, Http404, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_http_methods
 from django.utils import timezone
-from datetime import timedelta, date
+from asgiref.sync import sync_to_async
+from accounts.models import UserProfile
 from tasks.models import Task
-import json
-import calendar
+from projects.models import visible_projects
+from .stats import aget_task_stats, get_task_stats
+from .export import ExportFilters, EXPORT_FORMATS, astream_export, stream_export
+from .models import ReportJob
+from . import reports
+from . import cache as user_cache
+from . import calendar_data
+from . import heatmap
+from .budgets import query_budget
+from .concurrency import get_user_profile, run_concurrently
+import asyncio
 
 
 @login_required
-def dashboard_view(request):
+@query_budget(queries=9, time=200)
+async def dashboard_view(request):
     """
     Main dashboard view with productivity analytics
     """
-    try:
-        user_profile = request.user.userprofile
-    except:
+    user_profile = await get_user_profile(request)
+    if user_profile is None:
         messages.error(request, 'Please complete your profile first.')
         return redirect('accounts:profile')
 
     # Get today's date
     today = timezone.now().date()
 
-    # Basic task statistics
+    # Cached per user and data version; any task change invalidates it
+    context = await user_cache.aget_or_compute(
+        'dashboard', user_profile.id,
+        lambda: dashboard_context(user_profile, today),
+        parts=[today]
+    )
+    context['active_page'] = 'dashboard'
+    # Key part of the cached fragments of the day's numbers
+    context['today'] = today
+
+    return await sync_to_async(render)(request, 'dashboard/dashboard.html', context)
+
+
+async def dashboard_context(user_profile, today):
+    """Template context for dashboard_view; its queries run concurrently"""
     all_tasks = Task.objects.filter(user=user_profile)
-    total_tasks = all_tasks.count()
-    completed_tasks = all_tasks.filter(completed=True).count()
-
-    # Today's statistics
-    completed_today = all_tasks.filter(
-        completed=True,
-        updated_at__date=today
-    ).count()
-
-    due_today = all_tasks.filter(
-        due_date=today,
-        completed=False
-    ).count()
-
-    # Completion rate
-    completion_rate = 0
-    if total_tasks > 0:
-        completion_rate = round((completed_tasks / total_tasks) * 100)
-
-    # Recent tasks (last 10)
-    recent_tasks = all_tasks.order_by('-created_at')[:10]
-
-    # High priority tasks that are not completed
-    high_priority_tasks = all_tasks.filter(
-        priority='high',
-        completed=False
-    ).order_by('due_date')[:5]
-
-    # Weekly completion data for mini chart
-    weekly_data = []
-    for i in range(6, -1, -1):  # Last 7 days
-        date = today - timedelta(days=i)
-        completed_count = all_tasks.filter(
-            completed=True,
-            updated_at__date=date
-        ).count()
-        weekly_data.append(completed_count)
-
-    # Advanced chart data
-    # Productivity heatmap data (last 30 days)
-    import json
-    heatmap_data = []
-    max_daily_tasks = 0
-
-    for i in range(29, -1, -1):  # Last 30 days
-        date = today - timedelta(days=i)
-        day_completed = all_tasks.filter(
-            completed=True,
-            updated_at__date=date
-        ).count()
-
-        # Keep real data only - no dummy data to avoid conflicts
-
-        heatmap_data.append({
-            'date': date.strftime('%Y-%m-%d'),
-            'value': day_completed
-        })
-        max_daily_tasks = max(max_daily_tasks, day_completed)
-
-    # Convert to JSON string for template
-    heatmap_json = json.dumps(heatmap_data)
-
-    # Priority distribution for radar chart
-    priority_stats = {
-        'high': all_tasks.filter(priority='high').count(),
-        'medium': all_tasks.filter(priority='medium').count(),
-        'low': all_tasks.filter(priority='low').count(),
-    }
 
-    # Task velocity calculation (tasks completed per week average)
-    weeks_back = 4
-    velocity_data = []
-    for week in range(weeks_back):
-        week_start = today - timedelta(days=(week * 7) + 6)
-        week_end = today - timedelta(days=week * 7)
-        week_completed = all_tasks.filter(
-            completed=True,
-            updated_at__date__range=[week_start, week_end]
-        ).count()
-        velocity_data.append(week_completed)
+    # Counters in one aggregate, day buckets from the daily rollup, recent
+    # tasks (last 10) and open high priority tasks, as lists so the context
+    # can be cached
+    stats, (recent_tasks, high_priority_tasks) = await asyncio.gather(
+        aget_task_stats(all_tasks, today=today, user=user_profile),
+        run_concurrently(
+            lambda: list(all_tasks.order_by('-created_at')[:10]),
+            lambda: list(all_tasks.filter(priority='high', completed=False).order_by('due_date')[:5]),
+        ),
+    )
+
+    # Weekly completion data for mini chart (last 7 days)
+    weekly_data = [count for day, count in stats.daily_series(7)]
+
+    # The productivity heatmap is loaded separately, see heatmap_view
 
+    # Task velocity calculation (tasks completed per week average)
+    velocity_data = stats.weekly_series(4)
     avg_velocity = sum(velocity_data) / len(velocity_data) if velocity_data else 0
 
-    context = {
-        'total_tasks': total_tasks,
-        'completed_today': completed_today,
-        'due_today': due_today,
-        'completion_rate': completion_rate,
+    return {
+        'total_tasks': stats.total,
+        'completed_today': stats.completed_today,
+        'due_today': stats.due_today,
+        'completion_rate': stats.completion_rate,
         'recent_tasks': recent_tasks,
         'high_priority_tasks': high_priority_tasks,
         'weekly_data': weekly_data,
         # Advanced chart data
-        'heatmap_data': heatmap_data,
-        'heatmap_json': heatmap_json,
-        'max_daily_tasks': max_daily_tasks,
-        'priority_stats': priority_stats,
+        'priority_stats': stats.priority_stats,
         'velocity_data': velocity_data,
         'avg_velocity': round(avg_velocity, 1),
-        'active_page': 'dashboard'
     }
 
-    return render(request, 'dashboard/dashboard.html', context)
-
 
 @login_required
-def analytics_view(request):
+@query_budget(queries=6, time=50)
+def heatmap_view(request):
     """
-    Detailed analytics view with advanced charts
+    Completions per day as JSON, for the dashboard heatmap: the last year by
+    default, or ?days= / ?start=&end=
     """
     try:
         user_profile = request.user.userprofile
-    except:
+    except UserProfile.DoesNotExist:
+        return JsonResponse({'success': False, 'message': 'Please complete your profile first.'}, status=403)
+
+    try:
+        start, end = heatmap.heatmap_range(request.GET, timezone.now().date())
+    except heatmap.InvalidRange as exc:
+        return JsonResponse({'success': False, 'message': str(exc)}, status=400)
+
+    data = user_cache.get_or_compute(
+        'heatmap', user_profile.id,
+        lambda: heatmap.completion_heatmap(user_profile, start, end),
+        parts=[start, end]
+    )
+    return JsonResponse({'success': True, **data})
+
+
+@login_required
+@query_budget(queries=8, time=200)
+async def analytics_view(request):
+    """
+    Detailed analytics view with advanced charts
+    """
+    user_profile = await get_user_profile(request)
+    if user_profile is None:
         messages.error(request, 'Please complete your profile first.')
         return redirect('accounts:profile')
 
+    today = timezone.now().date()
+    context = await user_cache.aget_or_compute(
+        'analytics', user_profile.id,
+        lambda: analytics_context(user_profile, today),
+        parts=[today]
+    )
+    context['active_page'] = 'analytics'
+
+    return await sync_to_async(render)(request, 'dashboard/analytics.html', context)
+
+
+async def analytics_context(user_profile, today):
+    """Template context for analytics_view; its queries run concurrently"""
     # Get real data for analytics charts
     all_tasks = Task.objects.filter(user=user_profile)
-    today = timezone.now().date()
+    stats = await aget_task_stats(all_tasks, today=today, user=user_profile, weekdays=True)
 
-    # Completion trends (last 4 weeks)
-    completion_trends = []
-    for week in range(3, -1, -1):
-        week_start = today - timedelta(days=(week * 7) + 6)
-        week_end = today - timedelta(days=week * 7)
-        week_completed = all_tasks.filter(
-            completed=True,
-            updated_at__date__range=[week_start, week_end]
-        ).count()
-        completion_trends.append(week_completed)
-
-    # Priority distribution (real data)
-    priority_stats = {
-        'high': all_tasks.filter(priority='high').count(),
-        'medium': all_tasks.filter(priority='medium').count(),
-        'low': all_tasks.filter(priority='low').count(),
-    }
+    # Completion trends (last 4 weeks, oldest first)
+    completion_trends = list(reversed(stats.weekly_series(4)))
 
-    # Time distribution (tasks completed by day of week)
-    time_distribution = []
-    for day in range(7):  # Monday = 0, Sunday = 6
-        day_completed = all_tasks.filter(
-            completed=True,
-            updated_at__week_day=day + 2  # Django week_day: Sunday=1, Monday=2
-        ).count()
-        time_distribution.append(day_completed)
+    # Time distribution (tasks completed by day of week, Monday first)
+    time_distribution = stats.weekdays
 
     # Productivity scores (calculated from real data)
-    total_tasks = all_tasks.count()
-    completed_tasks = all_tasks.filter(completed=True).count()
-    completion_rate = round((completed_tasks / total_tasks) * 100) if total_tasks > 0 else 0
+    completion_rate = stats.completion_rate
 
     # Calculate productivity metrics
     focus_score = min(100, completion_rate + 10)  # Bonus for completion
-    efficiency_score = min(100, (completed_tasks / max(1, total_tasks)) * 100)
+    efficiency_score = min(100, (stats.completed / max(1, stats.total)) * 100)
     consistency_score = min(100, len([x for x in completion_trends if x > 0]) * 25)
-    quality_score = min(100, all_tasks.filter(priority='high', completed=True).count() * 20)
+    quality_score = min(100, stats.high_completed * 20)
     speed_score = min(100, sum(completion_trends) * 10)
 
     productivity_scores = [focus_score, efficiency_score, consistency_score, quality_score, speed_score]
 
-    high_priority_count = all_tasks.filter(priority='high', completed=False).count()
-
-    context = {
+    return {
         'completion_rate': completion_rate,
-        'high_priority_count': high_priority_count,
+        'high_priority_count': stats.high_open,
         # Real chart data
         'completion_trends': completion_trends,
-        'priority_stats': priority_stats,
+        'priority_stats': stats.priority_stats,
         'time_distribution': time_distribution,
         'productivity_scores': productivity_scores,
-        'active_page': 'analytics'
     }
 
-    return render(request, 'dashboard/analytics.html', context)
-
 
 @login_required
+@query_budget(queries=10, time=200)
 def reports_view(request):
     """
     Reports generation and management view
     """
     try:
         user_profile = request.user.userprofile
-    except:
+    except UserProfile.DoesNotExist:
         messages.error(request, 'Please complete your profile first.')
         return redirect('accounts:profile')
 
-    # Get data for reports
     today = timezone.now().date()
-    all_tasks = Task.objects.filter(user=user_profile)
+    context = user_cache.get_or_compute(
+        'reports', user_profile.id,
+        lambda: reports_context(user_profile, today),
+        parts=[today]
+    )
+    context['active_page'] = 'reports'
+
+    # Job statuses change without a data version bump, so they are read
+    # outside the cached context
+    recent_reports = list(ReportJob.objects.filter(user=user_profile)[:10])
+    context['recent_reports'] = recent_reports
+    context['reports_in_progress'] = any(not job.is_ready and job.status != ReportJob.STATUS_FAILED for job in recent_reports)
+    context['report_types'] = ReportJob.REPORT_TYPES
+    context['report_formats'] = ReportJob.FORMATS
+    context['report_ranges'] = reports.RANGE_CHOICES
+
+    return render(request, 'dashboard/reports.html', context)
 
-    # Weekly completion count
-    week_start = today - timedelta(days=today.weekday())
-    completed_this_week = all_tasks.filter(
-        completed=True,
-        updated_at__date__gte=week_start
-    ).count()
 
-    # Overall completion rate
-    completion_rate = 0
-    if all_tasks.count() > 0:
-        completed = all_tasks.filter(completed=True).count()
-        completion_rate = round((completed / all_tasks.count()) * 100)
+def reports_context(user_profile, today):
+    """Template context for reports_view"""
+    # Get data for reports
+    all_tasks = Task.objects.filter(user=user_profile)
+    stats = get_task_stats(all_tasks, today=today, history_days=7, user=user_profile)
 
     # High priority tasks
-    high_priority_tasks = all_tasks.filter(priority='high', completed=False)
+    high_priority_tasks = list(all_tasks.filter(priority='high', completed=False))
 
-    context = {
+    return {
         'today': today,
-        'completed_this_week': completed_this_week,
-        'completion_rate': completion_rate,
+        'completed_this_week': stats.completed_this_week,
+        'completion_rate': stats.completion_rate,
         'high_priority_tasks': high_priority_tasks,
-        'active_page': 'reports'
+        'high_priority_count': stats.high_open,
+        # Project filter of the export form
+        'projects': list(
+            visible_projects(user_profile).values('id', 'title')
+        ),
     }
 
-    return render(request, 'dashboard/reports.html', context)
+
+@login_required
+def export_tasks_view(request):
+    """
+    Stream the user's tasks as CSV or NDJSON.
+    Accepts format, range/start/end, date_field, project, status and priority.
+    """
+    try:
+        user_profile = request.user.userprofile
+    except UserProfile.DoesNotExist:
+        messages.error(request, 'Please complete your profile first.')
+        return redirect('accounts:profile')
+
+    today = timezone.now().date()
+    filters = ExportFilters.from_query(request.GET, today)
+
+    # An ASGI server only streams async iterators, see export.py
+    stream = astream_export if isinstance(request, ASGIRequest) else stream_export
+    response = StreamingHttpResponse(
+        stream(user_profile, filters),
+        content_type=EXPORT_FORMATS[filters.format],
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filters.filename(today)}"'
+    # Don't let a reverse proxy hold the stream back until it is complete
+    response['X-Accel-Buffering'] = 'no'
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+@login_required
+@require_http_methods(["POST"])
+def generate_report_view(request):
+    """Queue a report for the background worker, or reuse an identical one"""
+    try:
+        user_profile = request.user.userprofile
+    except UserProfile.DoesNotExist:
+        messages.error(request, 'Please complete your profile first.')
+        return redirect('accounts:profile')
+
+    report_type = request.POST.get('report_type')
+    report_format = request.POST.get('format')
+    if report_type not in dict(ReportJob.REPORT_TYPES) or report_format not in dict(ReportJob.FORMATS):
+        messages.error(request, 'Please choose a report type and format.')
+        return redirect('dashboard:reports')
+
+    start, end = reports.report_range(request.POST.get('range'), timezone.now().date())
+    job, created = reports.request_report(user_profile, report_type, report_format, start, end)
+    if created:
+        messages.success(request, f'{job.get_report_type_display()} is being generated.')
+    else:
+        messages.info(request, f'{job.get_report_type_display()} for this range is already in your recent reports.')
+    return redirect('dashboard:reports')
+
+
+@login_required
+def report_status_view(request):
+    """Statuses of the user's recent reports, polled by the reports page (AJAX)"""
+    jobs = ReportJob.objects.filter(user__user=request.user).values('id', 'status')[:10]
+    return JsonResponse({'reports': list(jobs)})
+
+
+@login_required
+def report_download_view(request, job_id):
+    job = get_object_or_404(ReportJob, id=job_id, user__user=request.user, status=ReportJob.STATUS_DONE)
+    path = reports.artifact_path(job.digest)
+    if not path.exists():
+        raise Http404('Report file is no longer available')
+
+    response = FileResponse(
+        open(path, 'rb'),
+        as_attachment=True,
+        filename=job.filename,
+        content_type=reports.CONTENT_TYPES[job.format],
+    )
+    # A finished job's file never changes
+    response['ETag'] = f'"{job.digest}"'
+    response['Cache-Control'] = 'private, max-age=86400'
+    return response
 
 
 @login_required
+@require_http_methods(["POST"])
+def report_delete_view(request, job_id):
+    job = get_object_or_404(ReportJob, id=job_id, user__user=request.user)
+    reports.delete_job(job)
+    messages.success(request, 'Report deleted.')
+    return redirect('dashboard:reports')
+
+
+@login_required
+@query_budget(queries=8, time=100)
 def calendar_view(request):
     """
     Calendar view showing tasks in a monthly calendar format
     """
     try:
         user_profile = request.user.userprofile
-    except:
+    except UserProfile.DoesNotExist:
         messages.error(request, 'Please complete your profile first.')
         return redirect('accounts:profile')
 
     # Get current date or requested month/year
     today = timezone.now().date()
-    year = int(request.GET.get('year', today.year))
-    month = int(request.GET.get('month', today.month))
-
-    # Create calendar for the month (Sunday first - US style)
-    calendar.setfirstweekday(6)  # 6 = Sunday
-    cal = calendar.monthcalendar(year, month)
-    month_name = calendar.month_name[month]
-
-    # Get all tasks for the user in this month
-    month_start = date(year, month, 1)
-    if month == 12:
-        month_end = date(year + 1, 1, 1) - timedelta(days=1)
-    else:
-        month_end = date(year, month + 1, 1) - timedelta(days=1)
-
-    tasks_in_month = Task.objects.filter(
-        user=user_profile,
-        due_date__range=[month_start, month_end]
-    ).order_by('due_date', 'priority')
-
-    # Group tasks by date
-    tasks_by_date = {}
-    for task in tasks_in_month:
-        if task.due_date:
-            day = task.due_date.day
-            if day not in tasks_by_date:
-                tasks_by_date[day] = []
-            tasks_by_date[day].append(task)
-
-    # Navigation dates
-    if month == 1:
-        prev_month = 12
-        prev_year = year - 1
-    else:
-        prev_month = month - 1
-        prev_year = year
+    year, month = calendar_data.clean_month(request.GET, today)
 
-    if month == 12:
-        next_month = 1
-        next_year = year + 1
-    else:
-        next_month = month + 1
-        next_year = year
-
-    # Quick stats for the month
-    total_tasks_month = tasks_in_month.count()
-    completed_tasks_month = tasks_in_month.filter(completed=True).count()
-    overdue_tasks = Task.objects.filter(
-        user=user_profile,
-        due_date__lt=today,
-        completed=False
-    ).count()
+    data = user_cache.get_or_compute(
+        'calendar', user_profile.id,
+        lambda: calendar_data.build_calendar(user_profile, today, year, month),
+        parts=[today, year, month]
+    )
+    shown = data.months[0]
+    previous_year, previous_month = calendar_data.shift_month(year, month, -1)
+    next_year, next_month = calendar_data.shift_month(year, month, 1)
 
     context = {
-        'calendar_weeks': cal,
+        'calendar': data,
+        'calendar_month': shown,
+        'weekdays': calendar_data.weekday_names(),
         'month': month,
         'year': year,
-        'month_name': month_name,
+        'month_name': shown.name,
         'today': today,
-        'tasks_by_date': tasks_by_date,
-        'prev_month': prev_month,
-        'prev_year': prev_year,
+        'prev_month': previous_month,
+        'prev_year': previous_year,
         'next_month': next_month,
         'next_year': next_year,
-        'total_tasks_month': total_tasks_month,
-        'completed_tasks_month': completed_tasks_month,
-        'overdue_tasks': overdue_tasks,
-        'active_page': 'calendar'
+        'active_page': 'calendar',
     }
-
     return render(request, 'dashboard/calendar.html', context)
+
+
+@login_required
+@query_budget(queries=8, time=100)
+def calendar_data_view(request):
+    """
+    Calendar data as JSON, for paging without reloading the page.
+
+    ?year=&month= pick the month and ?range=month|quarter|year how much
+    around it: per-day counts for the whole range, plus the tasks to show in
+    each day cell for a single month.
+    """
+    try:
+        user_profile = request.user.userprofile
+    except UserProfile.DoesNotExist:
+        return JsonResponse({'success': False, 'message': 'Please complete your profile first.'}, status=403)
+
+    today = timezone.now().date()
+    year, month = calendar_data.clean_month(request.GET, today)
+    range_name = request.GET.get('range', 'month')
+    if range_name not in calendar_data.RANGE_MONTHS:
+        return JsonResponse({'success': False, 'message': 'Unknown range.'}, status=400)
+
+    data = user_cache.get_or_compute(
+        'calendar_data', user_profile.id,
+        lambda: calendar_data.build_calendar(user_profile, today, year, month, range_name).as_dict(),
+        parts=[today, range_name, year, month]
+    )
+    return JsonResponse({'success': True, **data})
@@ -0,0 +1,17 @@
+"""
+Entry points of report worker processes (see run_report_worker).
+
+Pool processes are started with the "spawn" method so none of them shares
+the parent's database connection. They unpickle these functions before
+Django is set up, so this module must not import any models at import time.
+"""
+
+
+def init_process():
+    import django
+    django.setup()
+
+
+def render(job_id):
+    from .reports import render_job
+    return render_job(job_id)
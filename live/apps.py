@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class LiveConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'live'
+
+    def ready(self):
+        # Live update events for Task and Project changes
+        from . import signals  # noqa: F401
@@ -0,0 +1,188 @@
+"""
+Brokers carrying live update events from whatever thread or process made a
+change to the event streams subscribed to them.
+
+Events are dicts, {'event': type, 'data': {...}}, addressed to UserProfile
+ids. The broker in use is LIVE_BROKER (a dotted path, see settings):
+
+InProcessBroker    -- streams and changes in one process. Enough for a
+                      single ASGI worker (or the development server).
+LocalSocketBroker  -- several worker processes on one host. Every process
+                      serving streams binds a datagram socket in
+                      LIVE_SOCKET_DIR, and events are sent to all of them.
+
+A subscriber that falls more than QUEUE_SIZE events behind gets a single
+`stale` event instead of the backlog, telling the client to reload what it
+shows.
+"""
+import asyncio
+import atexit
+import json
+import logging
+import os
+import socket
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+logger = logging.getLogger(__name__)
+
+# Events a subscriber may have waiting before it is told to resync
+QUEUE_SIZE = 100
+
+STALE = {'event': 'stale', 'data': {}}
+
+
+class Subscription:
+    """Events for one stream, handed over to the event loop it runs on"""
+
+    def __init__(self, user_id, loop):
+        self.user_id = user_id
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+
+    def put(self, event):
+        """Queue an event; safe to call from any thread"""
+        self.loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event):
+        if self.queue.full():
+            # Too far behind for the events to be worth replaying
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            event = STALE
+        self.queue.put_nowait(event)
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class Broker(ABC):
+    """Delivers published events to the subscriptions of their users"""
+
+    @abstractmethod
+    def publish(self, user_ids, event):
+        """Send an event to every subscription of `user_ids`; safe from any thread"""
+
+    @abstractmethod
+    def subscribe(self, user_id):
+        """Subscription for one stream; call from its event loop"""
+
+    @abstractmethod
+    def unsubscribe(self, subscription):
+        """Stop delivering to a subscription"""
+
+
+class InProcessBroker(Broker):
+    def __init__(self):
+        self.lock = threading.Lock()
+        # user id -> set of Subscription
+        self.subscriptions = {}
+
+    def publish(self, user_ids, event):
+        self.deliver(user_ids, event)
+
+    def deliver(self, user_ids, event):
+        with self.lock:
+            targets = [
+                subscription
+                for user_id in set(user_ids)
+                for subscription in self.subscriptions.get(user_id, ())
+            ]
+        for subscription in targets:
+            try:
+                subscription.put(event)
+            except RuntimeError:
+                # Its event loop is closed; the stream is gone
+                self.unsubscribe(subscription)
+
+    def subscribe(self, user_id):
+        subscription = Subscription(user_id, asyncio.get_running_loop())
+        with self.lock:
+            self.subscriptions.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscriptions = self.subscriptions.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self.subscriptions[subscription.user_id]
+
+
+class LocalSocketBroker(InProcessBroker):
+    """
+    Fans events out to every process on the host through Unix datagram
+    sockets, one per process with subscribers, named after its pid. Each
+    process delivers what it receives to its own subscriptions.
+    """
+
+    # Larger events are replaced by `stale`, well below the kernel's limit
+    MAX_DATAGRAM = 32 * 1024
+
+    def __init__(self, directory=None):
+        super().__init__()
+        self.directory = Path(directory or getattr(settings, 'LIVE_SOCKET_DIR', '/tmp/todo-live'))
+        self.receiver = None
+        self.receiver_lock = threading.Lock()
+
+    def publish(self, user_ids, event):
+        payload = json.dumps({'users': sorted(set(user_ids)), 'event': event}).encode()
+        if len(payload) > self.MAX_DATAGRAM:
+            payload = json.dumps({'users': sorted(set(user_ids)), 'event': STALE}).encode()
+
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sender:
+            sender.setblocking(False)
+            for path in self.directory.glob('*.sock'):
+                try:
+                    sender.sendto(payload, str(path))
+                except (ConnectionRefusedError, FileNotFoundError):
+                    # Left behind by a process that has exited
+                    path.unlink(missing_ok=True)
+                except BlockingIOError:
+                    logger.warning('Live update dropped, %s is not keeping up', path)
+
+    def subscribe(self, user_id):
+        self.start_receiver()
+        return super().subscribe(user_id)
+
+    def start_receiver(self):
+        with self.receiver_lock:
+            if self.receiver is not None:
+                return
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self.directory / f'{os.getpid()}.sock'
+            # A file with our pid belonged to an earlier process
+            path.unlink(missing_ok=True)
+            receiver = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            receiver.bind(str(path))
+            atexit.register(path.unlink, missing_ok=True)
+            threading.Thread(target=self.receive, args=(receiver,), name='live-receiver', daemon=True).start()
+            self.receiver = receiver
+
+    def receive(self, receiver):
+        while True:
+            payload = receiver.recv(self.MAX_DATAGRAM + 1024)
+            try:
+                message = json.loads(payload)
+                self.deliver(message['users'], message['event'])
+            except (ValueError, KeyError, TypeError):
+                logger.warning('Ignoring a malformed live update')
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """The process's broker, created on first use from LIVE_BROKER"""
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = import_string(getattr(settings, 'LIVE_BROKER', 'live.brokers.InProcessBroker'))()
+        return _broker
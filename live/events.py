@@ -0,0 +1,105 @@
+"""
+Live update events for tasks and projects.
+
+Events go to everyone who sees the object: a task's owner plus, for a task
+in a project, the project's owner and members. They are published once the
+transaction commits, so a client reacting to one reads the committed state.
+
+Event types (the `data` of each is described where it is built):
+
+task     -- one task created, updated or deleted
+tasks    -- a bulk action changed many tasks at once
+project  -- a project created, updated or deleted
+stale    -- too much changed to describe; reload
+"""
+from django.db import transaction
+
+from projects.models import Project
+from .brokers import get_broker
+
+
+# Bulk changes to more tasks than this are sent as `stale`
+MAX_BULK_RESULTS = 200
+
+TASK_FIELDS = ['title', 'priority', 'completed', 'due_date', 'project_id']
+
+
+def publish(user_ids, event_type, data):
+    """Publish an event to `user_ids` when the current transaction commits"""
+    user_ids = sorted({user_id for user_id in user_ids if user_id})
+    if not user_ids:
+        return
+    event = {'event': event_type, 'data': data}
+    transaction.on_commit(lambda: get_broker().publish(user_ids, event))
+
+
+def project_audience(project_ids):
+    """Owner and member profile ids of the given projects"""
+    project_ids = [project_id for project_id in set(project_ids) if project_id]
+    if not project_ids:
+        return set()
+    # One row per member (None without any), each with the owner
+    rows = Project.objects.filter(id__in=project_ids).values_list('user_id', 'members')
+    return {user_id for row in rows for user_id in row if user_id}
+
+
+def task_data(task):
+    return {
+        'id': task.id,
+        'title': task.title,
+        'priority': task.priority,
+        'completed': task.completed,
+        'due_date': task.due_date.isoformat() if task.due_date else None,
+        'project_id': task.project_id,
+    }
+
+
+def task_changed(task, action, before=None):
+    """
+    `task` event: {'action', 'task': task_data(), 'changed': [field names]}.
+    `before` holds the values loaded before an update, telling which of the
+    shown fields changed.
+    """
+    changed = TASK_FIELDS
+    if action == 'updated' and before:
+        changed = [name for name in TASK_FIELDS if before.get(name) != getattr(task, name)]
+        if not changed:
+            return
+    project_ids = {task.project_id, (before or {}).get('project_id')}
+    audience = {task.user_id} | project_audience(project_ids)
+    publish(audience, 'task', {'action': action, 'task': task_data(task), 'changed': changed})
+
+
+def tasks_changed(user_id, action, results, project_ids=()):
+    """
+    `tasks` event for a bulk action: {'action', 'results': [{'id',
+    'status', 'completed'}]} as returned by the bulk endpoint, or `stale`
+    for too many results.
+    """
+    audience = {user_id} | project_audience(project_ids)
+    if len(results) > MAX_BULK_RESULTS:
+        publish(audience, 'stale', {})
+    else:
+        publish(audience, 'tasks', {'action': action, 'results': results})
+
+
+def tasks_imported(user_id, project_ids=()):
+    publish({user_id} | project_audience(project_ids), 'stale', {})
+
+
+def project_changed(project, action):
+    """`project` event: {'action', 'project': {...}}"""
+    audience = {project.user_id}
+    if action != 'created':
+        audience |= project_audience([project.id])
+    publish(audience, 'project', {
+        'action': action,
+        'project': {
+            'id': project.id,
+            'title': project.title,
+            'completed': project.completed,
+            'task_count': project.task_count,
+            'completed_task_count': project.completed_task_count,
+            'progress': project.progress,
+        },
+    })
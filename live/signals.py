@@ -0,0 +1,42 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from accounts.models import UserProfile
+from projects.models import Project
+from tasks.models import BulkDeleteQuerySet, Task
+from . import events
+
+
+@receiver(post_save, sender=Task)
+def publish_task_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        events.task_changed(instance, 'created')
+    else:
+        events.task_changed(instance, 'updated', getattr(instance, '_loaded_values', {}))
+
+
+@receiver(post_delete, sender=Task)
+def publish_task_deleted(sender, instance, origin=None, **kwargs):
+    # The project's or the account's own event covers its tasks, and a bulk
+    # delete sends one event for all of them
+    if isinstance(origin, (Project, User, UserProfile, BulkDeleteQuerySet)):
+        return
+    events.task_changed(instance, 'deleted')
+
+
+@receiver(post_save, sender=Project)
+def publish_project_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    events.project_changed(instance, 'created' if created else 'updated')
+
+
+@receiver(pre_delete, sender=Project)
+def publish_project_deleted(sender, instance, origin=None, **kwargs):
+    # Before the delete, while the members can still be looked up
+    if isinstance(origin, (User, UserProfile)):
+        return
+    events.project_changed(instance, 'deleted')
@@ -0,0 +1,62 @@
+"""
+Server-Sent Events stream of live updates for the signed-in user.
+
+The stream stays open for as long as the page does, so it needs an ASGI
+server (see todo/asgi.py): there it costs a coroutine, not a worker thread.
+Under WSGI the view answers 204, which tells EventSource not to reconnect;
+pages then simply don't update live.
+"""
+import asyncio
+import json
+
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
+
+from dashboard.concurrency import get_user_profile
+from .brokers import get_broker
+
+
+# Comment lines sent while idle, so proxies don't time the stream out
+KEEPALIVE_INTERVAL = 15
+
+# Milliseconds the browser waits before reconnecting
+RETRY_AFTER = 5000
+
+
+def format_event(event):
+    return f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+
+
+async def stream(user_id):
+    # Subscribed once the response is actually being sent
+    broker = get_broker()
+    subscription = broker.subscribe(user_id)
+    try:
+        yield f"retry: {RETRY_AFTER}\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.get(), KEEPALIVE_INTERVAL)
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            yield format_event(event)
+    finally:
+        # Runs when the client disconnects and the response is cancelled
+        broker.unsubscribe(subscription)
+
+
+async def event_stream(request):
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+    user = await request.auser()
+    if not user.is_authenticated:
+        return HttpResponse(status=204)
+    user_profile = await get_user_profile(request)
+    if user_profile is None:
+        return HttpResponse(status=204)
+
+    response = StreamingHttpResponse(stream(user_profile.id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Don't let nginx buffer the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
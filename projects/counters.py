@@ -0,0 +1,118 @@
+"""
+Denormalized task counters on Project.
+
+Project.task_count and Project.completed_task_count are adjusted with atomic
+F() updates from the Task signal handlers in projects.signals whenever a task
+is created, deleted, moved between projects or toggled, so listing projects
+with their progress costs nothing per project. rebuild_project_counters()
+recomputes them in bulk and backs the `rebuild_project_counters` command.
+
+Counter changes stamp Project.updated_at too: the counters are part of what
+the project list and the API show, and the API's ETags are derived from
+updated_at (see api/views.py).
+"""
+from collections import defaultdict
+
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from tasks.models import Task
+from .models import Project
+
+
+def bump_project(project_id, tasks=0, completed=0):
+    """Add to a project's counters in a single UPDATE"""
+    if not project_id or not (tasks or completed):
+        return
+    updates = {'updated_at': timezone.now()}
+    if tasks:
+        updates['task_count'] = Greatest(F('task_count') + tasks, 0)
+    if completed:
+        updates['completed_task_count'] = Greatest(F('completed_task_count') + completed, 0)
+    Project.objects.filter(pk=project_id).update(**updates)
+
+
+def record_task_created(task):
+    bump_project(task.project_id, tasks=1, completed=int(task.completed))
+
+
+def record_task_deleted(task):
+    bump_project(task.project_id, tasks=-1, completed=-int(task.completed))
+
+
+def record_task_updated(task, previous):
+    """
+    Apply a save of an existing task. `previous` is the task's state as it
+    was loaded from the database (see Task.from_db).
+    """
+    if 'project_id' not in previous or 'completed' not in previous:
+        return
+    old_project_id = previous['project_id']
+    was_completed = previous['completed']
+
+    if old_project_id != task.project_id:
+        bump_project(old_project_id, tasks=-1, completed=-int(was_completed))
+        bump_project(task.project_id, tasks=1, completed=int(task.completed))
+    elif was_completed != task.completed:
+        bump_project(task.project_id, completed=1 if task.completed else -1)
+
+
+def record_tasks_changed(changes):
+    """
+    Apply many task changes at once, for bulk writes that bypass the signal
+    handlers (see tasks/bulk.py and tasks/importer.py). `changes` is a list of
+    (before, after) value dicts, `before` being None for a created task and
+    `after` None for a deleted one. One UPDATE per project.
+    """
+    deltas = defaultdict(lambda: [0, 0])
+    for before, after in changes:
+        for row, sign in ((before, -1), (after, 1)):
+            if row is not None and row['project_id']:
+                deltas[row['project_id']][0] += sign
+                deltas[row['project_id']][1] += sign * int(row['completed'])
+
+    for project_id in sorted(deltas):
+        tasks, completed = deltas[project_id]
+        bump_project(project_id, tasks=tasks, completed=completed)
+
+
+def counted_tasks(**filters):
+    """Subquery counting a project's tasks, for use in a bulk UPDATE"""
+    tasks = (
+        Task.objects.filter(project=OuterRef('pk'), **filters)
+        .order_by()
+        .values('project')
+        .annotate(count=Count('id'))
+        .values('count')
+    )
+    return Coalesce(Subquery(tasks, output_field=IntegerField()), 0)
+
+
+def rebuild_project_counters(projects=None, dry_run=False):
+    """
+    Recompute the counters of `projects` (default: all) from the task table.
+    Returns the number of projects whose counters had drifted.
+    """
+    if projects is None:
+        projects = Project.objects.all()
+
+    drifted = (
+        projects.annotate(
+            actual_tasks=counted_tasks(),
+            actual_completed=counted_tasks(completed=True),
+        )
+        .filter(
+            ~Q(task_count=F('actual_tasks')) |
+            ~Q(completed_task_count=F('actual_completed'))
+        )
+    )
+    drift_count = drifted.count()
+
+    if drift_count and not dry_run:
+        Project.objects.filter(pk__in=drifted.values('pk')).update(
+            task_count=counted_tasks(),
+            completed_task_count=counted_tasks(completed=True),
+            updated_at=timezone.now(),
+        )
+    return drift_count
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from projects.counters import rebuild_project_counters
+from projects.models import Project
+
+
+class Command(BaseCommand):
+    help = 'Recompute Project.task_count and completed_task_count from the task table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--project', type=int, action='append', default=[],
+                            help='Project id to repair (repeatable). Defaults to every project.')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only report how many projects drifted')
+
+    def handle(self, *args, **options):
+        projects = Project.objects.all()
+        if options['project']:
+            projects = projects.filter(id__in=options['project'])
+
+        drifted = rebuild_project_counters(projects, dry_run=options['dry_run'])
+
+        action = 'found' if options['dry_run'] else 'repaired'
+        self.stdout.write(self.style.SUCCESS(f"Counter drift {action} in {drifted} project(s)"))
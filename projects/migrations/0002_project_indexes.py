@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:06
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+# Indexes are built concurrently so deploying doesn't take a write lock on
+# large tables.
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('projects', '0001_initial'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='project',
+            index=models.Index(fields=['user', 'completed'], name='project_user_completed_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='project',
+            index=models.Index(condition=models.Q(('completed', False)), fields=['user', '-created_at'], name='project_open_created_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:08
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_task_counters(apps, schema_editor):
+    Project = apps.get_model('projects', 'Project')
+    Task = apps.get_model('tasks', 'Task')
+
+    def counted_tasks(**filters):
+        tasks = (
+            Task.objects.filter(project=OuterRef('pk'), **filters)
+            .order_by()
+            .values('project')
+            .annotate(count=Count('id'))
+            .values('count')
+        )
+        return Coalesce(Subquery(tasks, output_field=IntegerField()), 0)
+
+    Project.objects.update(
+        task_count=counted_tasks(),
+        completed_task_count=counted_tasks(completed=True),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0002_project_indexes'),
+        ('tasks', '0006_task_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='completed_task_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='task_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_task_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+# Rows updated per statement. Each chunk commits on its own so a large
+# projects table is never locked in one long transaction.
+CHUNK_SIZE = 5000
+
+
+def backfill_search_vector(apps, schema_editor):
+    """
+    Touch existing rows so the trigger from 0004 computes their vectors.
+    """
+    Project = apps.get_model('projects', 'Project')
+    pending = Project.objects.filter(search_vector__isnull=True)
+
+    last_id = 0
+    while True:
+        ids = list(
+            pending.filter(id__gt=last_id)
+            .order_by('id')
+            .values_list('id', flat=True)[:CHUNK_SIZE]
+        )
+        if not ids:
+            break
+        Project.objects.filter(id__in=ids).update(search_vector=None)
+        last_id = ids[-1]
+
+
+class Migration(migrations.Migration):
+
+    # Chunks commit separately and CREATE INDEX CONCURRENTLY can't run
+    # inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('projects', '0004_project_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_search_vector, migrations.RunPython.noop),
+        AddIndexConcurrently(
+            model_name='project',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='project_search_vector_idx'),
+        ),
+    ]
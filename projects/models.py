@@ -1,4 +1,7 @@
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction
+from django.db.models.functions import Upper
 from django.db.models.fields import related
 
 class Project(models.Model):
@@ -23,11 +26,69 @@ class Project(models.Model):
     members = models.ManyToManyField('accounts.UserProfile', related_name='projects', blank=True)
     color = models.CharField(max_length=10, choices=COLOR_CHOICES, blank=True)
     completed = models.BooleanField(default=False)
+    # Denormalized task counters, kept current by projects.signals
+    task_count = models.PositiveIntegerField(default=0)
+    completed_task_count = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Weighted title/description document, written by a database trigger
+    # (see migrations/0004_project_search_vector.py and accounts/search.py)
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         ordering = ['-created_at']
+        # Built concurrently on Postgres, see migrations/0002, 0005 and 0006
+        indexes = [
+            models.Index(fields=['user', 'completed'], name='project_user_completed_idx'),
+            models.Index(fields=['user', '-created_at'], condition=models.Q(completed=False), name='project_open_created_idx'),
+            GinIndex(fields=['search_vector'], name='project_search_vector_idx'),
+            GinIndex(OpClass(Upper('title'), name='gin_trgm_ops'), name='project_title_trgm_idx'),
+        ]
     
     def __str__(self):
-        return self.title
\ No newline at end of file
+        return self.title
+
+    @property
+    def progress(self):
+        """Percentage of this project's tasks that are completed"""
+        if self.task_count == 0:
+            return 0
+        return round((self.completed_task_count / self.task_count) * 100)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded state so signal handlers can tell what changed
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        # The task counters only change through F() updates; a full save of
+        # an instance loaded earlier must not write stale values back
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in ('task_count', 'completed_task_count')
+            ]
+        # Keep the rollups written by post_save handlers in the same transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+        # Signal handlers have seen the change; this is the new baseline
+        self._loaded_values = {
+            field.attname: getattr(self, field.attname)
+            for field in self._meta.concrete_fields
+        }
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
+
+
+def visible_projects(user_profile):
+    """Projects the user owns or is a member of"""
+    # Ids from a UNION of the two lookups, each served by an index. An OR
+    # across the members join (or with a membership subquery) can't use
+    # either index and reads the whole project table, plus a DISTINCT.
+    owned = Project.objects.filter(user=user_profile).order_by().values('id')
+    member_of = Project.members.through.objects.filter(userprofile=user_profile).values('project_id')
+    return Project.objects.filter(id__in=owned.union(member_of))
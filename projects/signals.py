@@ -0,0 +1,44 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from accounts.models import UserProfile
+from tasks.models import BulkDeleteQuerySet, Task
+from . import counters
+from .models import Project
+
+
+@receiver(post_save, sender=Task)
+def update_project_counters(sender, instance, created, raw=False, **kwargs):
+    """Keep Project.task_count/completed_task_count in step with task saves"""
+    if raw:
+        return
+    if created:
+        counters.record_task_created(instance)
+    else:
+        counters.record_task_updated(instance, getattr(instance, '_loaded_values', {}))
+
+
+@receiver(post_delete, sender=Task)
+def remove_task_from_project_counters(sender, instance, origin=None, **kwargs):
+    # The project or the whole account is going away with the task, or a
+    # bulk delete adjusts the counters itself
+    if isinstance(origin, (Project, User, UserProfile, BulkDeleteQuerySet)):
+        return
+    counters.record_task_deleted(instance)
+
+
+@receiver(m2m_changed, sender=Project.members.through)
+def touch_project_members(sender, instance, action, reverse, pk_set, **kwargs):
+    """Members are shown with the project, so changing them stamps updated_at"""
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        projects = Project.objects.filter(pk=instance.pk)
+    elif pk_set:
+        projects = Project.objects.filter(pk__in=pk_set)
+    else:
+        # profile.projects.clear(), before it happens
+        projects = Project.objects.filter(pk__in=list(instance.projects.values_list('pk', flat=True)))
+    projects.update(updated_at=timezone.now())
@@ -1,3 +1,92 @@
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from dashboard.testing import QueryScalingTestCase
+from tasks.models import Task
+from .counters import rebuild_project_counters, record_tasks_changed
+from .models import Project
+
+
+class ProjectQueryTests(QueryScalingTestCase):
+    def test_project_list(self):
+        self.assertConstantQueries(lambda seed: reverse('projects:project_list'))
+
+    def test_project_detail(self):
+        self.assertConstantQueries(lambda seed: reverse('projects:project_detail', args=[seed.projects[0].id]))
+
+    def test_project_detail_as_member(self):
+        # Only a member of the project, with projects of their own
+        def url_for(seed):
+            seed.user = seed.members[0].user
+            return reverse('projects:project_detail', args=[seed.projects[0].id])
+        self.assertConstantQueries(url_for)
+
+    def test_project_edit(self):
+        self.assertConstantQueries(lambda seed: reverse('projects:project_edit', args=[seed.projects[0].id]))
+
+    def test_api(self):
+        self.assertConstantQueries(lambda seed: reverse('api:project_collection'))
+        self.assertConstantQueries(lambda seed: reverse('api:project_detail', args=[seed.projects[0].id]))
+
+
+class ProjectCounterTests(TestCase):
+    def setUp(self):
+        self.profile = User.objects.create(username='counters').userprofile
+        self.project = Project.objects.create(user=self.profile, title='Project')
+        self.other = Project.objects.create(user=self.profile, title='Other')
+
+    def counters(self, project):
+        project.refresh_from_db()
+        return project.task_count, project.completed_task_count, project.progress
+
+    def test_task_changes(self):
+        task = Task.objects.create(user=self.profile, project=self.project, title='Task')
+        Task.objects.create(user=self.profile, project=self.project, title='Done', completed=True)
+        self.assertEqual(self.counters(self.project), (2, 1, 50))
+
+        task.set_completed(True)
+        task.save()
+        self.assertEqual(self.counters(self.project), (2, 2, 100))
+
+        task.project = self.other
+        task.save()
+        self.assertEqual(self.counters(self.project), (1, 1, 100))
+        self.assertEqual(self.counters(self.other), (1, 1, 100))
+
+        task.project = None
+        task.save()
+        self.assertEqual(self.counters(self.other), (0, 0, 0))
+
+        Task.objects.filter(project=self.project).get().delete()
+        self.assertEqual(self.counters(self.project), (0, 0, 0))
+
+    def test_stale_instance_save(self):
+        # Saving a project loaded before its tasks changed keeps the counters
+        stale = Project.objects.get(pk=self.project.pk)
+        Task.objects.create(user=self.profile, project=self.project, title='Task')
+        stale.title = 'Renamed'
+        stale.save()
+        self.assertEqual(self.counters(self.project), (1, 0, 0))
+
+    def test_tasks_changed(self):
+        # Two open tasks to start with
+        Project.objects.filter(pk=self.project.pk).update(task_count=2)
+        task = {'project_id': self.project.id, 'completed': False}
+        record_tasks_changed([
+            (None, task),
+            (None, {**task, 'completed': True}),
+            (task, {'project_id': self.other.id, 'completed': True}),
+            (task, None),
+        ])
+        self.assertEqual(self.counters(self.project), (2, 1, 50))
+        self.assertEqual(self.counters(self.other), (1, 1, 100))
+
+    def test_rebuild(self):
+        Task.objects.create(user=self.profile, project=self.project, title='Task', completed=True)
+        Project.objects.filter(pk=self.project.pk).update(task_count=4, completed_task_count=0)
+        self.assertEqual(rebuild_project_counters(dry_run=True), 1)
+        self.assertEqual(self.counters(self.project), (4, 0, 0))
+        self.assertEqual(rebuild_project_counters(), 1)
+        self.assertEqual(self.counters(self.project), (1, 1, 100))
+        self.assertEqual(rebuild_project_counters(), 0)
@@ -2,26 +2,27 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse
-from django.db.models import Q, Count
+from django.db.models import Count
 from django.views.decorators.http import require_http_methods
 
-from .models import Project
+from .models import Project, visible_projects
 from tasks.models import Task
 from accounts.models import UserProfile
+from accounts.search import search_filter
+from dashboard.budgets import query_budget
 
 @login_required
+@query_budget(queries=6, time=100)
 def project_list_view(request):
     """View all projects the user owns or is a member of"""
     try:
         user_profile = request.user.userprofile
-    except:
+    except UserProfile.DoesNotExist:
         messages.error(request, 'Please complete your profile first.')
         return redirect('accounts:profile')
     
     # Get projects where user is owner or member
-    projects = Project.objects.filter(
-        Q(user=user_profile) | Q(members=user_profile)
-    ).distinct()
+    projects = visible_projects(user_profile)
     
     # Filter by completion status
     status = request.GET.get('status')
@@ -30,18 +31,13 @@ def project_list_view(request):
     elif status == 'active':
         projects = projects.filter(completed=False)
     
-    # Search functionality
+    # Full-text search on the indexed search_vector column
     search = request.GET.get('search')
     if search:
-        projects = projects.filter(
-            Q(title__icontains=search) |
-            Q(description__icontains=search)
-        )
+        projects = search_filter(projects, search)
     
-    # Add task counts to each project
-    for project in projects:
-        project.task_count = Task.objects.filter(project=project).count()
-        project.completed_task_count = Task.objects.filter(project=project, completed=True).count()
+    # Task counts come from the denormalized Project.task_count and
+    # Project.completed_task_count columns, no per-project queries needed
     
     context = {
         'projects': projects,
@@ -53,20 +49,18 @@ def project_list_view(request):
     return render(request, 'projects/project_list.html', context)
 
 @login_required
+@query_budget(queries=8, time=100)
 def project_detail_view(request, project_id):
     """View a specific project and its tasks"""
     try:
         user_profile = request.user.userprofile
-    except:
+    except UserProfile.DoesNotExist:
         messages.error(request, 'Please complete your profile first.')
         return redirect('accounts:profile')
     
     # Check if user has access to this project
     try:
-        project = Project.objects.get(
-            Q(id=project_id),
-            Q(user=user_profile) | Q(members=user_profile)
-        )
+        project = visible_projects(user_profile).select_related('user__user').get(id=project_id)
     except Project.DoesNotExist:
         messages.error(request, 'Project not found or you do not have permission to view it.')
         return redirect('projects:project_list')
@@ -81,14 +75,14 @@ def project_detail_view(request, project_id):
     elif status == 'active':
         tasks = tasks.filter(completed=False)
     
-    # Get project members
-    members = project.members.all()
+    # Get project members, with the usernames shown
+    members = project.members.select_related('user')
     
     context = {
         'project': project,
         'tasks': tasks,
         'members': members,
-        'is_owner': project.user == user_profile,
+        'is_owner': project.user_id == user_profile.id,
         'active_page': 'projects',
     }
     
@@ -99,7 +93,7 @@ def project_create_view(request):
     """Create a new project"""
     try:
         user_profile = request.user.userprofile
-    except:
+    except UserProfile.DoesNotExist:
         messages.error(request, 'Please complete your profile first.')
         return redirect('accounts:profile')
     
@@ -128,11 +122,12 @@ def project_create_view(request):
     return render(request, 'projects/project_create.html', context)
 
 @login_required
+@query_budget(queries=6, time=100)
 def project_edit_view(request, project_id):
     """Edit an existing project"""
     try:
         user_profile = request.user.userprofile
-    except:
+    except UserProfile.DoesNotExist:
         messages.error(request, 'Please complete your profile first.')
         return redirect('accounts:profile')
     
@@ -174,7 +169,7 @@ def project_delete_view(request, project_id):
     """Delete a project"""
     try:
         user_profile = request.user.userprofile
-    except:
+    except UserProfile.DoesNotExist:
         messages.error(request, 'Please complete your profile first.')
         return redirect('accounts:profile')
     
@@ -203,7 +198,7 @@ def project_members_view(request, project_id):
     """Manage project members"""
     try:
         user_profile = request.user.userprofile
-    except:
+    except UserProfile.DoesNotExist:
         messages.error(request, 'Please complete your profile first.')
         return redirect('accounts:profile')
     
@@ -255,14 +250,11 @@ def project_toggle_complete(request, project_id):
     """AJAX endpoint to toggle project completion status"""
     try:
         user_profile = request.user.userprofile
-    except:
+    except UserProfile.DoesNotExist:
         return JsonResponse({'success': False, 'message': 'Please complete your profile first'})
     
     try:
-        project = Project.objects.get(
-            Q(id=project_id),
-            Q(user=user_profile) | Q(members=user_profile)
-        )
+        project = visible_projects(user_profile).get(id=project_id)
     except Project.DoesNotExist:
         return JsonResponse({
             'success': False,
@@ -9,14 +9,31 @@ document.addEventListener('DOMContentLoaded', function() {
     // Initialize calendar features
     initializeCalendarInteractions();
     initializeCalendarAnimations();
+    initializeCalendarPaging();
 });
 
 /**
  * Initialize calendar interactions
  */
 function initializeCalendarInteractions() {
-    // Add hover effects to calendar days
-    const calendarDays = document.querySelectorAll('.grid.grid-cols-7.gap-1 > div');
+    initializeCalendarDays();
+    
+    // Add smooth transitions to navigation buttons
+    const navButtons = document.querySelectorAll('a[href*="month="]');
+    navButtons.forEach(button => {
+        button.addEventListener('click', function(e) {
+            // Add loading animation
+            this.style.opacity = '0.7';
+            this.style.transform = 'scale(0.95)';
+        });
+    });
+}
+
+/**
+ * Hover effects and click handlers for the day cells
+ */
+function initializeCalendarDays() {
+    const calendarDays = document.querySelectorAll('#calendarGrid > div');
     
     calendarDays.forEach(day => {
         // Skip empty days
@@ -40,16 +57,6 @@ function initializeCalendarInteractions() {
             });
         }
     });
-    
-    // Add smooth transitions to navigation buttons
-    const navButtons = document.querySelectorAll('a[href*="month="]');
-    navButtons.forEach(button => {
-        button.addEventListener('click', function(e) {
-            // Add loading animation
-            this.style.opacity = '0.7';
-            this.style.transform = 'scale(0.95)';
-        });
-    });
 }
 
 /**
@@ -87,6 +94,177 @@ function initializeCalendarAnimations() {
     });
 }
 
+/**
+ * Page between months with the calendar data endpoint instead of reloading
+ */
+function initializeCalendarPaging() {
+    const calendarElement = document.getElementById('calendar');
+    if (!calendarElement || !window.fetch) return;
+
+    document.querySelectorAll('[data-calendar-nav]').forEach(link => {
+        link.addEventListener('click', function(e) {
+            e.preventDefault();
+            loadCalendarMonth(parseInt(this.dataset.year), parseInt(this.dataset.month), true);
+        });
+    });
+
+    window.addEventListener('popstate', function(e) {
+        if (e.state && e.state.calendar) {
+            loadCalendarMonth(e.state.year, e.state.month, false);
+        }
+    });
+    history.replaceState(
+        { calendar: true, year: parseInt(calendarElement.dataset.year), month: parseInt(calendarElement.dataset.month) },
+        ''
+    );
+}
+
+/**
+ * Fetch one month and redraw the calendar with it
+ */
+function loadCalendarMonth(year, month, pushHistory) {
+    const calendarElement = document.getElementById('calendar');
+    const url = `${calendarElement.dataset.calendarUrl}?year=${year}&month=${month}`;
+
+    calendarElement.style.opacity = '0.7';
+    fetch(url, { headers: { 'X-Requested-With': 'XMLHttpRequest' } })
+        .then(response => response.json())
+        .then(data => {
+            if (!data.success) throw new Error(data.message);
+            renderCalendar(data);
+            if (pushHistory) {
+                history.pushState({ calendar: true, year: year, month: month }, '', `?month=${month}&year=${year}`);
+            }
+        })
+        .catch(() => {
+            // Fall back to a full page load
+            window.location.href = `?month=${month}&year=${year}`;
+        })
+        .finally(() => {
+            calendarElement.style.opacity = '';
+            document.querySelectorAll('[data-calendar-nav]').forEach(link => {
+                link.style.opacity = '';
+                link.style.transform = '';
+            });
+        });
+}
+
+// Tasks listed per day cell, as in dashboard/calendar_data.py
+const CALENDAR_PREVIEW_TASKS = 3;
+
+const PRIORITY_CLASSES = {
+    high: 'bg-red-100 text-red-700',
+    medium: 'bg-yellow-100 text-yellow-700',
+    low: 'bg-blue-100 text-blue-700'
+};
+
+const PRIORITY_DOTS = {
+    high: 'bg-red-500',
+    medium: 'bg-yellow-500',
+    low: 'bg-blue-500'
+};
+
+/**
+ * Redraw header, stats, grid and today's tasks from calendar data
+ */
+function renderCalendar(data) {
+    const calendarElement = document.getElementById('calendar');
+    const shown = data.months[0];
+    calendarElement.dataset.year = shown.year;
+    calendarElement.dataset.month = shown.month;
+
+    document.getElementById('calendarTitle').textContent = `${shown.name} ${shown.year}`;
+    document.getElementById('calendarTotal').textContent = data.totals.total;
+    document.getElementById('calendarCompleted').textContent = data.totals.completed;
+    document.getElementById('calendarOverdue').textContent = data.totals.overdue;
+
+    [['prev', data.previous], ['next', data.next]].forEach(([direction, target]) => {
+        const link = document.querySelector(`[data-calendar-nav="${direction}"]`);
+        link.dataset.year = target.year;
+        link.dataset.month = target.month;
+        link.href = `?month=${target.month}&year=${target.year}`;
+    });
+
+    const grid = document.getElementById('calendarGrid');
+    grid.replaceChildren();
+    shown.weeks.forEach(week => {
+        week.forEach(dayNumber => {
+            grid.appendChild(renderCalendarDay(data, shown, dayNumber));
+        });
+    });
+
+    const todayTasks = data.tasks[data.today] || [];
+    const todayList = document.getElementById('todayTaskList');
+    todayList.replaceChildren(...todayTasks.map(renderTodayTask));
+    document.getElementById('todayTasks').classList.toggle('hidden', todayTasks.length === 0);
+
+    initializeCalendarDays();
+}
+
+function isoDate(year, month, day) {
+    return `${year}-${String(month).padStart(2, '0')}-${String(day).padStart(2, '0')}`;
+}
+
+function createElement(tag, className, text) {
+    const element = document.createElement(tag);
+    if (className) element.className = className;
+    if (text !== undefined) element.textContent = text;
+    return element;
+}
+
+function renderCalendarDay(data, shown, dayNumber) {
+    const cell = createElement('div', 'min-h-[120px] border border-gray-100 rounded-lg p-2 hover:bg-gray-50 transition-colors duration-200');
+    if (!dayNumber) return cell;
+
+    const day = isoDate(shown.year, shown.month, dayNumber);
+    const isToday = day === data.today;
+    if (isToday) cell.classList.add('bg-indigo-50', 'border-indigo-200');
+
+    const header = createElement('div', 'flex items-center justify-between mb-2');
+    header.appendChild(createElement('span', `text-sm font-medium text-gray-900${isToday ? ' text-indigo-600' : ''}`, dayNumber));
+    cell.appendChild(header);
+
+    const counts = data.days[day];
+    if (!counts) return cell;
+    header.appendChild(createElement('span', 'bg-indigo-100 text-indigo-600 text-xs px-2 py-1 rounded-full font-medium', counts.total));
+
+    const list = createElement('div', 'space-y-1');
+    const tasks = (data.tasks[day] || []).slice(0, CALENDAR_PREVIEW_TASKS);
+    tasks.forEach(task => {
+        const colors = task.completed ? 'bg-green-100 text-green-700' : PRIORITY_CLASSES[task.priority];
+        list.appendChild(createElement('div', `text-xs p-1 rounded ${colors} truncate`, task.title));
+    });
+    if (counts.total > CALENDAR_PREVIEW_TASKS) {
+        list.appendChild(createElement('div', 'text-xs text-gray-500 font-medium', `+${counts.total - CALENDAR_PREVIEW_TASKS} more`));
+    }
+    cell.appendChild(list);
+    return cell;
+}
+
+function renderTodayTask(task) {
+    const row = createElement('div', 'flex items-center justify-between p-4 bg-gray-50 rounded-xl hover:bg-gray-100 transition-colors duration-200');
+
+    const info = createElement('div', 'flex items-center space-x-3');
+    info.appendChild(createElement('div', `w-3 h-3 rounded-full ${PRIORITY_DOTS[task.priority]}`));
+    const text = createElement('div');
+    text.appendChild(createElement('h4', `font-medium text-gray-900${task.completed ? ' line-through text-gray-500' : ''}`, task.title));
+    if (task.description) {
+        const words = task.description.split(/\s+/);
+        const summary = words.length > 10 ? `${words.slice(0, 10).join(' ')} …` : task.description;
+        text.appendChild(createElement('p', 'text-sm text-gray-600', summary));
+    }
+    info.appendChild(text);
+    row.appendChild(info);
+
+    const actions = createElement('div', 'flex items-center space-x-2');
+    actions.appendChild(createElement('span', `text-xs px-2 py-1 rounded-full ${PRIORITY_CLASSES[task.priority]}`, task.priority_display));
+    const link = createElement('a', 'text-indigo-600 hover:text-indigo-800 font-medium text-sm', 'View');
+    link.href = task.url;
+    actions.appendChild(link);
+    row.appendChild(actions);
+    return row;
+}
+
 /**
  * Show tasks for a specific day (future enhancement)
  */
@@ -139,6 +317,10 @@ const CalendarUtils = {
      * Navigate to specific month
      */
     navigateToMonth: function(month, year) {
+        if (document.getElementById('calendar')) {
+            loadCalendarMonth(year, month, true);
+            return;
+        }
         const url = new URL(window.location);
         url.searchParams.set('month', month);
         url.searchParams.set('year', year);
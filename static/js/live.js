@@ -0,0 +1,63 @@
+/**
+ * TaskFlow - Live Updates
+ * Listens to the server's event stream and re-dispatches every event on
+ * `document` as a `live:<type>` CustomEvent with the event's data as
+ * `detail`, so each page patches what it shows:
+ *
+ *   live:task     one task created, updated or deleted
+ *   live:tasks    a bulk action changed many tasks
+ *   live:project  a project created, updated or deleted
+ *   live:stale    changes were missed; reload what is shown
+ */
+(function() {
+    const script = document.currentScript;
+    const url = script && script.dataset.liveUrl;
+    if (!url || !('EventSource' in window)) return;
+
+    const EVENT_TYPES = ['task', 'tasks', 'project', 'stale'];
+
+    function dispatch(type, detail) {
+        document.dispatchEvent(new CustomEvent(`live:${type}`, { detail }));
+    }
+
+    let source = null;
+    let dropped = false;
+
+    function connect() {
+        source = new EventSource(url);
+
+        EVENT_TYPES.forEach(type => {
+            source.addEventListener(type, event => {
+                try {
+                    dispatch(type, JSON.parse(event.data));
+                } catch (error) {
+                    console.error('Bad live update:', error);
+                }
+            });
+        });
+
+        // The browser reconnects by itself; anything published while the
+        // stream was down is lost, so have the page resync
+        source.addEventListener('error', () => { dropped = true; });
+        source.addEventListener('open', () => {
+            if (dropped) {
+                dropped = false;
+                dispatch('stale', {});
+            }
+        });
+    }
+
+    connect();
+
+    // Free the server's stream as soon as the page goes away
+    window.addEventListener('pagehide', () => source.close());
+
+    // A page restored from the back/forward cache keeps the closed stream:
+    // open a new one and resync what was missed in between
+    window.addEventListener('pageshow', event => {
+        if (event.persisted) {
+            dropped = true;
+            connect();
+        }
+    });
+})();
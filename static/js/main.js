@@ -113,6 +113,9 @@ function initializeGlobalFeatures() {
     
     // Keyboard shortcuts
     initializeKeyboardShortcuts();
+    
+    // Header search suggestions
+    initializeSearchAutocomplete();
 }
 
 /**
@@ -141,8 +144,8 @@ function initializeSmoothScroll() {
  * Enhanced form interactions
  */
 function initializeFormEnhancements() {
-    // Auto-focus first input in forms
-    const firstInput = document.querySelector('form input:not([type="hidden"]):first-of-type');
+    // Auto-focus first input in forms (not the header search box)
+    const firstInput = document.querySelector('form:not([role="search"]) input:not([type="hidden"]):first-of-type');
     if (firstInput) {
         firstInput.focus();
     }
@@ -184,3 +187,131 @@ function initializeKeyboardShortcuts() {
         }
     });
 }
+
+
+/**
+ * Search-as-you-type suggestions for the header search box.
+ * Requests are debounced, a newer keystroke aborts the request still in
+ * flight, and answers are remembered for the page's lifetime so deleting
+ * and retyping characters doesn't hit the server again.
+ */
+function initializeSearchAutocomplete() {
+    const input = document.querySelector('input[data-autocomplete-url]');
+    const list = document.getElementById('searchSuggestions');
+    if (!input || !list) return;
+    
+    const url = input.dataset.autocompleteUrl;
+    const minLength = 2;
+    const recent = new Map();
+    const maxRecent = 50;
+    const kindLabels = { task: 'Task', project: 'Project', person: 'Person' };
+    let controller = null;
+    let activeIndex = -1;
+    
+    function normalize(text) {
+        return text.trim().replace(/\s+/g, ' ').toLowerCase();
+    }
+    
+    function hide() {
+        list.classList.add('hidden');
+        list.innerHTML = '';
+        activeIndex = -1;
+    }
+    
+    function render(results) {
+        list.innerHTML = '';
+        activeIndex = -1;
+        if (!results.length) {
+            hide();
+            return;
+        }
+        results.forEach(result => {
+            const link = document.createElement('a');
+            link.href = result.url;
+            link.setAttribute('role', 'option');
+            link.className = 'flex items-center justify-between px-4 py-2 text-sm text-gray-700 hover:bg-indigo-50';
+            
+            const label = document.createElement('span');
+            label.className = 'truncate';
+            label.textContent = result.label;
+            
+            const kind = document.createElement('span');
+            kind.className = 'ml-3 text-xs text-gray-400';
+            kind.textContent = kindLabels[result.kind] || result.kind;
+            
+            link.append(label, kind);
+            list.appendChild(link);
+        });
+        list.classList.remove('hidden');
+    }
+    
+    function setActive(index) {
+        const options = list.querySelectorAll('[role="option"]');
+        if (!options.length) return;
+        activeIndex = (index + options.length) % options.length;
+        options.forEach((option, i) => {
+            option.classList.toggle('bg-indigo-50', i === activeIndex);
+        });
+    }
+    
+    async function fetchSuggestions() {
+        const query = normalize(input.value);
+        if (query.length < minLength) {
+            if (controller) controller.abort();
+            hide();
+            return;
+        }
+        if (recent.has(query)) {
+            render(recent.get(query));
+            return;
+        }
+        
+        // Only the latest keystroke's answer matters
+        if (controller) controller.abort();
+        controller = new AbortController();
+        
+        try {
+            const response = await fetch(`${url}?q=${encodeURIComponent(query)}`, {
+                headers: { 'X-Requested-With': 'XMLHttpRequest' },
+                signal: controller.signal
+            });
+            if (!response.ok) return;
+            const data = await response.json();
+            
+            if (recent.size >= maxRecent) {
+                recent.delete(recent.keys().next().value);
+            }
+            recent.set(query, data.results);
+            
+            // Skip answers overtaken by further typing
+            if (normalize(input.value) === query) {
+                render(data.results);
+            }
+        } catch (error) {
+            if (error.name !== 'AbortError') {
+                TaskFlow.utils.log('Search suggestions failed', error);
+            }
+        }
+    }
+    
+    input.addEventListener('input', TaskFlow.utils.debounce(fetchSuggestions, 150));
+    
+    input.addEventListener('keydown', function(e) {
+        if (list.classList.contains('hidden')) return;
+        if (e.key === 'ArrowDown') {
+            e.preventDefault();
+            setActive(activeIndex + 1);
+        } else if (e.key === 'ArrowUp') {
+            e.preventDefault();
+            setActive(activeIndex - 1);
+        } else if (e.key === 'Enter' && activeIndex >= 0) {
+            e.preventDefault();
+            list.querySelectorAll('[role="option"]')[activeIndex].click();
+        } else if (e.key === 'Escape') {
+            hide();
+        }
+    });
+    
+    // Let a click on a suggestion land before the list disappears
+    input.addEventListener('blur', () => setTimeout(hide, 150));
+}
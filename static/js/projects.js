@@ -9,6 +9,7 @@ document.addEventListener('DOMContentLoaded', function() {
     
     // Initialize project toggle functionality
     initializeProjectToggle();
+    initializeLiveUpdates();
 });
 
 /**
@@ -80,13 +81,15 @@ function toggleProject(projectId, buttonElement) {
 
 /**
  * Update project UI after toggle
- * @param {Element} buttonElement - The button that was clicked
+ * @param {Element|null} buttonElement - The button that was clicked, if any
  * @param {string} projectId - The ID of the project
  * @param {boolean} completed - New completion status
  */
 function updateProjectUI(buttonElement, projectId, completed) {
     // Update button text
-    buttonElement.textContent = completed ? 'Mark as Active' : 'Mark as Completed';
+    if (buttonElement) {
+        buttonElement.textContent = completed ? 'Mark as Active' : 'Mark as Completed';
+    }
     
     // Update status badge if it exists
     const statusBadge = document.getElementById(`project-status-${projectId}`);
@@ -103,6 +106,123 @@ function updateProjectUI(buttonElement, projectId, completed) {
     }
 }
 
+/**
+ * Keep the projects shown current with changes made elsewhere, as
+ * dispatched by live.js. Project events carry the new state; task events
+ * only say which project they touched, so its counts are fetched from the
+ * API (a conditional request, cheap when nothing changed).
+ */
+function initializeLiveUpdates() {
+    if (!document.querySelector('[data-project-card]')) return;
+
+    const PROJECT_FIELDS = 'id,title,completed,task_count,completed_task_count,progress';
+    const stale = new Set();
+    let timeout;
+
+    function projectElement(projectId) {
+        return document.querySelector(`[data-project-card="${projectId}"]`);
+    }
+
+    // Fetch the marked projects once a burst of events is over
+    function scheduleReload(projectIds) {
+        projectIds.forEach(id => stale.add(String(id)));
+        clearTimeout(timeout);
+        timeout = setTimeout(() => {
+            const ids = Array.from(stale);
+            stale.clear();
+            ids.forEach(reloadProject);
+        }, 300);
+    }
+
+    function reloadProject(projectId) {
+        const element = projectElement(projectId);
+        if (!element) return;
+        fetch(`${element.dataset.projectUrl}?fields=${PROJECT_FIELDS}`, {
+            headers: { 'Accept': 'application/json' },
+        })
+        .then(response => {
+            if (response.status === 404) return { deleted: true };
+            return response.ok ? response.json() : null;
+        })
+        .then(body => {
+            if (!body) return;
+            if (body.deleted) {
+                removeProject(projectId);
+            } else {
+                patchProject(body.data);
+            }
+        })
+        .catch(error => {
+            console.error('Error reloading project:', error);
+        });
+    }
+
+    function patchProject(project) {
+        const element = projectElement(project.id);
+        if (!element) return;
+
+        const title = element.querySelector('[data-project-title]');
+        if (title) title.textContent = project.title;
+        const counts = element.querySelector('[data-project-counts]');
+        if (counts) counts.textContent = `${project.completed_task_count}/${project.task_count} Tasks`;
+        const progress = element.querySelector('[data-project-progress]');
+        if (progress) progress.textContent = `${project.progress}%`;
+        const bar = element.querySelector('[data-project-progress-bar]');
+        if (bar) bar.style.width = `${project.progress}%`;
+
+        // List cards have the badge only, no button
+        updateProjectUI(element.querySelector('.toggle-project-status'), project.id, project.completed);
+    }
+
+    function removeProject(projectId) {
+        const element = projectElement(projectId);
+        if (!element) return;
+        if (element.querySelector('.toggle-project-status')) {
+            // The detail page of the project itself
+            showToast('This project has been deleted.', 'error');
+        } else {
+            element.remove();
+        }
+    }
+
+    function patchTaskRow(task) {
+        const checkbox = document.querySelector(`.toggle-task-status[data-task-id="${task.id}"]`);
+        if (!checkbox) return;
+        checkbox.checked = task.completed;
+        const title = checkbox.closest('.flex.items-center').querySelector('h3');
+        if (title) {
+            title.textContent = task.title;
+            title.classList.toggle('line-through', task.completed);
+            title.classList.toggle('text-gray-500', task.completed);
+        }
+    }
+
+    document.addEventListener('live:project', ({ detail }) => {
+        if (detail.action === 'deleted') {
+            removeProject(detail.project.id);
+        } else {
+            patchProject(detail.project);
+        }
+    });
+
+    document.addEventListener('live:task', ({ detail }) => {
+        if (detail.action === 'updated') patchTaskRow(detail.task);
+        if (detail.changed.includes('project_id')) {
+            // The project it left isn't named
+            reloadAll();
+        } else if (detail.task.project_id) {
+            scheduleReload([detail.task.project_id]);
+        }
+    });
+
+    // Events not naming their projects reload every project shown
+    function reloadAll() {
+        scheduleReload(Array.from(document.querySelectorAll('[data-project-card]'), element => element.dataset.projectCard));
+    }
+    document.addEventListener('live:tasks', reloadAll);
+    document.addEventListener('live:stale', reloadAll);
+}
+
 /**
  * Show toast notification
  * @param {string} message - Message to display
@@ -12,10 +12,14 @@ document.addEventListener('DOMContentLoaded', function() {
     initializeTaskToggle();
     initializeAnimations();
     initializeCharts();
+    initializeInfiniteScroll();
+    initializeBulkActions();
+    initializeLiveUpdates();
 });
 
 /**
- * Auto-submit filters when user changes dropdowns
+ * Apply filters in place when the user changes dropdowns or types a search.
+ * The URL is updated so a reload or a shared link shows the same list.
  */
 function initializeFilters() {
     // Find all filter dropdown elements
@@ -25,37 +29,7 @@ function initializeFilters() {
     filterSelects.forEach(select => {
         select.addEventListener('change', function() {
             console.log('Filter changed:', this.name, '=', this.value);
-
-            // Build clean URL parameters
-            const params = new URLSearchParams();
-
-            // Get all filter values
-            const searchValue = document.querySelector('input[name="search"]')?.value?.trim();
-            const statusValue = document.querySelector('select[name="status"]')?.value;
-            const priorityValue = document.querySelector('select[name="priority"]')?.value;
-            const projectValue = document.querySelector('select[name="project_id"]')?.value;
-            const sortValue = document.querySelector('select[name="sort"]')?.value;
-
-            // Only add non-empty values
-            if (searchValue && searchValue !== '' && searchValue !== 'None') {
-                params.append('search', searchValue);
-            }
-            if (statusValue && statusValue !== '') {
-                params.append('status', statusValue);
-            }
-            if (priorityValue && priorityValue !== '') {
-                params.append('priority', priorityValue);
-            }
-            if (projectValue && projectValue !== '') {
-                params.append('project_id', projectValue);
-            }
-            if (sortValue && sortValue !== '') {
-                params.append('sort', sortValue);
-            }
-
-            // Navigate to filtered URL
-            const newUrl = window.location.pathname + (params.toString() ? '?' + params.toString() : '');
-            window.location.href = newUrl;
+            applyFilters();
         });
     });
 
@@ -67,49 +41,138 @@ function initializeFilters() {
             clearTimeout(searchTimeout);
             console.log('Search input changed:', this.value);
 
-            // Wait 500ms after user stops typing, then submit with preserved filters
-            searchTimeout = setTimeout(() => {
-                // Build clean URL parameters
-                const params = new URLSearchParams();
-
-                // Get all filter values
-                const searchValue = this.value?.trim();
-                const statusValue = document.querySelector('select[name="status"]')?.value;
-                const priorityValue = document.querySelector('select[name="priority"]')?.value;
-                const projectValue = document.querySelector('select[name="project_id"]')?.value;
-                const sortValue = document.querySelector('select[name="sort"]')?.value;
-
-                // Only add non-empty values
-                if (searchValue && searchValue !== '' && searchValue !== 'None') {
-                    params.append('search', searchValue);
-                }
-                if (statusValue && statusValue !== '') {
-                    params.append('status', statusValue);
-                }
-                if (priorityValue && priorityValue !== '') {
-                    params.append('priority', priorityValue);
-                }
-                if (projectValue && projectValue !== '') {
-                    params.append('project_id', projectValue);
-                }
-                if (sortValue && sortValue !== '') {
-                    params.append('sort', sortValue);
-                }
-
-                // Navigate to filtered URL
-                const newUrl = window.location.pathname + (params.toString() ? '?' + params.toString() : '');
-                window.location.href = newUrl;
-            }, 500);
+            // Wait 500ms after user stops typing, then filter
+            searchTimeout = setTimeout(applyFilters, 500);
         });
     }
 }
 
+/**
+ * Current filter values as URL parameters, empty ones left out
+ */
+function filterParams() {
+    const params = new URLSearchParams();
+
+    const searchValue = document.querySelector('#topSearchInput')?.value?.trim();
+    if (searchValue && searchValue !== 'None') {
+        params.append('search', searchValue);
+    }
+    ['status', 'priority', 'project_id', 'sort'].forEach(name => {
+        const value = document.querySelector(`select[name="${name}"]`)?.value;
+        if (value) params.append(name, value);
+    });
+    return params;
+}
+
+function applyFilters() {
+    const params = filterParams();
+    const newUrl = window.location.pathname + (params.toString() ? '?' + params.toString() : '');
+    history.replaceState(null, '', newUrl);
+    refreshTaskList();
+}
+
+// Set by initializeInfiniteScroll(): start loading pages again once the
+// list has been replaced
+let resumeInfiniteScroll = () => {};
+
+// Reloads running at once would race each other; the latest one wins
+let refreshRequest = 0;
+
+/**
+ * Reload the task list's first page and its stats for the current URL,
+ * replacing the cards shown. Used instead of a page reload after filter
+ * changes, bulk actions and live updates.
+ */
+function refreshTaskList() {
+    const grid = document.getElementById('taskGrid');
+    if (!grid) return Promise.resolve();
+
+    const request = ++refreshRequest;
+    const params = new URLSearchParams(window.location.search);
+    params.delete('cursor');
+    params.set('page_size', grid.dataset.pageSize);
+    params.set('stats', '1');
+
+    return fetch(`${grid.dataset.pageUrl}?${params.toString()}`, {
+        headers: { 'X-Requested-With': 'XMLHttpRequest' },
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (request !== refreshRequest) return;
+        if (!data.success) {
+            showToast(data.message, 'error');
+            return;
+        }
+
+        grid.innerHTML = data.html;
+        initializeTaskToggle(grid);
+        grid.dataset.nextCursor = data.next_cursor || '';
+        document.getElementById('taskListEmpty')?.classList.toggle('hidden', data.count > 0);
+        updateTaskStats(data.stats);
+        resumeInfiniteScroll();
+        document.dispatchEvent(new CustomEvent('tasks:refreshed'));
+    })
+    .catch(error => {
+        console.error('Error reloading tasks:', error);
+    });
+}
+
+/**
+ * Reload the list shortly, once for a burst of calls
+ */
+const scheduleTaskListRefresh = (() => {
+    let timeout;
+    return () => {
+        clearTimeout(timeout);
+        timeout = setTimeout(refreshTaskList, 300);
+    };
+})();
+
+/**
+ * Show new stats in the header cards, the charts and the bulk bar
+ * @param {Object} stats - {total, completed, pending, high, medium, low}
+ */
+function updateTaskStats(stats) {
+    if (!stats) return;
+
+    const setText = (id, value) => {
+        const element = document.getElementById(id);
+        if (element) element.textContent = value;
+    };
+    setText('totalTasks', stats.total);
+    setText('completedTasks', stats.completed);
+    setText('pendingTasks', stats.pending);
+    setText('highPriorityCount', stats.high);
+    setText('mediumPriorityCount', stats.medium);
+    setText('lowPriorityCount', stats.low);
+    updateCompletionPercentage(stats);
+
+    const bar = document.getElementById('bulkBar');
+    if (bar) {
+        bar.dataset.total = stats.total;
+        setText('bulkSelectAll', `Select all ${stats.total} matching`);
+    }
+
+    if (window.Chart) {
+        const completionChart = Chart.getChart('completionChart');
+        if (completionChart) {
+            completionChart.data.datasets[0].data = [stats.completed, stats.pending];
+            completionChart.update();
+        }
+        const priorityChart = Chart.getChart('priorityChart');
+        if (priorityChart) {
+            priorityChart.data.datasets[0].data = [stats.high, stats.medium, stats.low];
+            priorityChart.update();
+        }
+    }
+}
+
 /**
  * Handle task completion toggle with AJAX
  */
-function initializeTaskToggle() {
-    // Find all toggle buttons
-    const toggleButtons = document.querySelectorAll('.toggle-task');
+function initializeTaskToggle(root = document) {
+    // Find all toggle buttons (only inside `root` when new cards were added)
+    const toggleButtons = root.querySelectorAll('.toggle-task');
     
     // Add click event to each button
     toggleButtons.forEach(button => {
@@ -122,59 +185,354 @@ function initializeTaskToggle() {
 }
 
 /**
- * Toggle task completion status via AJAX
- * @param {string} taskId - The ID of the task to toggle
- * @param {Element} buttonElement - The button that was clicked
+ * Load further pages of the task list as the user scrolls.
+ * Pages come from the keyset-paginated JSON endpoint; the server hands back
+ * an opaque cursor for the next page, or none when the list is exhausted.
  */
-function toggleTask(taskId, buttonElement) {
-    console.log('Starting toggle for task:', taskId);
-    
-    // Show loading state
-    buttonElement.disabled = true;
-    buttonElement.classList.add('opacity-50', 'cursor-not-allowed');
-    
-    // Get CSRF token (Django security requirement)
-    const csrfToken = document.querySelector('[name=csrfmiddlewaretoken]').value;
-    
-    // Make AJAX request to Django backend
-    fetch(`/tasks/${taskId}/toggle/`, {
+function initializeInfiniteScroll() {
+    const grid = document.getElementById('taskGrid');
+    const sentinel = document.getElementById('taskListSentinel');
+    if (!grid || !sentinel || !('IntersectionObserver' in window)) return;
+
+    let loading = false;
+
+    const observer = new IntersectionObserver(entries => {
+        if (entries.some(entry => entry.isIntersecting)) {
+            loadNextPage();
+        }
+    }, { rootMargin: '400px' });
+
+    function loadNextPage() {
+        const cursor = grid.dataset.nextCursor;
+        if (loading || !cursor) return;
+        loading = true;
+
+        // Same filters and sort as the page itself, plus the cursor
+        const params = new URLSearchParams(window.location.search);
+        params.set('cursor', cursor);
+        params.set('page_size', grid.dataset.pageSize);
+
+        fetch(`${grid.dataset.pageUrl}?${params.toString()}`, {
+            headers: { 'X-Requested-With': 'XMLHttpRequest' },
+        })
+        .then(response => response.json())
+        .then(data => {
+            // The list was reloaded meanwhile; this page belongs to the old one
+            if (grid.dataset.nextCursor !== cursor) return;
+            if (!data.success) {
+                showToast(data.message, 'error');
+                grid.dataset.nextCursor = '';
+                return;
+            }
+
+            // Append the new cards and wire up their toggle buttons
+            const holder = document.createElement('div');
+            holder.innerHTML = data.html;
+            const cards = Array.from(holder.children);
+            cards.forEach(card => grid.appendChild(card));
+            cards.forEach(card => initializeTaskToggle(card));
+
+            grid.dataset.nextCursor = data.next_cursor || '';
+        })
+        .catch(error => {
+            console.error('Error loading tasks:', error);
+        })
+        .finally(() => {
+            loading = false;
+            if (!grid.dataset.nextCursor) {
+                sentinel.classList.add('hidden');
+                observer.disconnect();
+            } else {
+                // Re-observe so a sentinel still on screen loads another page
+                observer.unobserve(sentinel);
+                observer.observe(sentinel);
+            }
+        });
+    }
+
+    resumeInfiniteScroll = () => {
+        sentinel.classList.toggle('hidden', !grid.dataset.nextCursor);
+        observer.disconnect();
+        if (grid.dataset.nextCursor) observer.observe(sentinel);
+    };
+
+    observer.observe(sentinel);
+}
+
+/**
+ * POST a bulk action to the server.
+ * Resolves with the response data, rejects with an Error carrying the
+ * server's message.
+ * @param {Object} payload - {action, ids | filter, value?, after?}
+ */
+function sendBulkAction(payload) {
+    const bar = document.getElementById('bulkBar');
+    const url = bar ? bar.dataset.bulkUrl : '/tasks/bulk/';
+
+    return fetch(url, {
         method: 'POST',
         headers: {
-            'X-CSRFToken': csrfToken,
+            'X-CSRFToken': getCSRFToken(),
             'Content-Type': 'application/json',
         },
+        body: JSON.stringify(payload),
     })
-    .then(response => {
-        console.log('Response received:', response.status);
-        return response.json();
-    })
+    .then(response => response.json())
     .then(data => {
-        console.log('Data received:', data);
-        
-        if (data.success) {
-            // Update the UI without page reload
-            updateTaskUI(buttonElement, data.completed);
-            showToast(data.message, 'success');
-
-            // Refresh charts with new data
-            setTimeout(() => {
-                const taskStats = getTaskStatsFromTemplate();
-                updateCompletionPercentage(taskStats);
-                // Note: Charts will need to be recreated for real-time updates
-            }, 100);
-        } else {
-            showToast(data.message, 'error');
+        if (!data.success) {
+            throw new Error(data.message);
         }
+        return data;
+    });
+}
+
+// Toggles clicked within this many ms of each other go out as one request
+const TOGGLE_BATCH_DELAY = 400;
+const pendingToggles = new Map();  // task id -> toggle button
+let toggleTimer = null;
+
+/**
+ * Toggle task completion status.
+ * The card updates immediately; the change is queued and sent together with
+ * any other toggles clicked in the next TOGGLE_BATCH_DELAY ms as a single
+ * bulk 'toggle' request. Clicking a task twice in that window cancels out.
+ * @param {string} taskId - The ID of the task to toggle
+ * @param {Element} buttonElement - The button that was clicked
+ */
+function toggleTask(taskId, buttonElement) {
+    const completed = !buttonElement.classList.contains('bg-green-500');
+    updateTaskUI(buttonElement, completed);
+
+    if (pendingToggles.has(taskId)) {
+        pendingToggles.delete(taskId);
+    } else {
+        pendingToggles.set(taskId, buttonElement);
+    }
+
+    clearTimeout(toggleTimer);
+    toggleTimer = setTimeout(flushToggles, TOGGLE_BATCH_DELAY);
+}
+
+/**
+ * Send the queued toggles and settle each card on the state the server
+ * reports back.
+ */
+function flushToggles() {
+    if (!pendingToggles.size) return;
+    const batch = new Map(pendingToggles);
+    pendingToggles.clear();
+
+    sendBulkAction({ action: 'toggle', ids: Array.from(batch.keys(), Number) })
+    .then(data => {
+        data.results.forEach(result => {
+            const button = batch.get(String(result.id));
+            if (!button) return;
+            if (result.status === 'not_found') {
+                // Undo the optimistic change
+                updateTaskUI(button, !button.classList.contains('bg-green-500'));
+            } else {
+                updateTaskUI(button, result.completed);
+            }
+        });
+        showToast(data.message, 'success');
+        updateCompletionPercentage(getTaskStatsFromTemplate());
     })
     .catch(error => {
-        console.error('Error toggling task:', error);
-        showToast('Something went wrong!', 'error');
-    })
-    .finally(() => {
-        // Remove loading state
-        buttonElement.disabled = false;
-        buttonElement.classList.remove('opacity-50', 'cursor-not-allowed');
+        console.error('Error toggling tasks:', error);
+        batch.forEach(button => updateTaskUI(button, !button.classList.contains('bg-green-500')));
+        showToast(error.message || 'Something went wrong!', 'error');
+    });
+}
+
+/**
+ * Multi-select and the bulk actions bar.
+ * Actions go to the server as one request for all selected tasks, or, after
+ * "Select all matching", as the list's current filter so tasks not loaded
+ * yet are included too.
+ */
+function initializeBulkActions() {
+    const bar = document.getElementById('bulkBar');
+    const grid = document.getElementById('taskGrid');
+    if (!bar || !grid) return;
+
+    const countElement = document.getElementById('bulkCount');
+    const selected = new Set();
+    let allMatching = false;
+
+    function refresh() {
+        bar.classList.toggle('hidden', selected.size === 0 && !allMatching);
+        countElement.textContent = allMatching ? bar.dataset.total : selected.size;
+    }
+
+    function setAllBoxes(checked) {
+        grid.querySelectorAll('.task-select').forEach(box => { box.checked = checked; });
+    }
+
+    // Delegated, so cards added by infinite scroll work without re-binding
+    grid.addEventListener('change', event => {
+        const box = event.target;
+        if (!box.classList.contains('task-select')) return;
+        allMatching = false;
+        if (box.checked) {
+            selected.add(box.dataset.taskId);
+        } else {
+            selected.delete(box.dataset.taskId);
+        }
+        refresh();
+    });
+
+    document.getElementById('bulkSelectAll').addEventListener('click', () => {
+        allMatching = true;
+        setAllBoxes(true);
+        refresh();
     });
+
+    document.getElementById('bulkClear').addEventListener('click', () => {
+        allMatching = false;
+        selected.clear();
+        setAllBoxes(false);
+        refresh();
+    });
+
+    // Reloaded cards come unchecked
+    document.addEventListener('tasks:refreshed', () => {
+        allMatching = false;
+        selected.clear();
+        refresh();
+    });
+
+    function currentFilter() {
+        const params = new URLSearchParams(window.location.search);
+        const filter = {};
+        ['status', 'priority', 'project_id', 'search'].forEach(name => {
+            if (params.get(name)) filter[name] = params.get(name);
+        });
+        return filter;
+    }
+
+    // A filter can match more tasks than one request may change; follow
+    // next_after until the server has been through all of them
+    function runFilterAction(payload, changed = 0) {
+        return sendBulkAction(payload).then(data => {
+            changed += data.changed;
+            if (data.has_more) {
+                return runFilterAction({ ...payload, after: data.next_after }, changed);
+            }
+            return changed;
+        });
+    }
+
+    bar.querySelectorAll('[data-bulk-action]').forEach(control => {
+        const isButton = control.tagName === 'BUTTON';
+        control.addEventListener(isButton ? 'click' : 'change', () => {
+            const action = control.dataset.bulkAction;
+            const value = isButton ? undefined : control.value;
+            if (!isButton && !value && action !== 'reschedule') return;
+
+            const count = countElement.textContent;
+            if (action === 'delete' && !confirm(`Delete ${count} task${count === '1' ? '' : 's'}? This cannot be undone.`)) {
+                return;
+            }
+
+            let request;
+            if (allMatching) {
+                request = runFilterAction({ action, value, filter: currentFilter() })
+                    .then(changed => ({ reload: true, message: `${changed} task${changed === 1 ? '' : 's'} updated` }));
+            } else {
+                request = sendBulkAction({ action, value, ids: Array.from(selected, Number) })
+                    .then(data => {
+                        // Completion and deletion can be shown in place;
+                        // other changes move cards around, so reload
+                        const inPlace = ['complete', 'reopen', 'delete'].includes(action);
+                        if (inPlace) applyTaskResults(data.results);
+                        return { reload: !inPlace, message: data.message };
+                    });
+            }
+
+            request
+            .then(({ reload, message }) => {
+                showToast(message, 'success');
+                selected.clear();
+                setAllBoxes(false);
+                refresh();
+                if (reload) {
+                    refreshTaskList();
+                } else {
+                    updateCompletionPercentage(getTaskStatsFromTemplate());
+                }
+            })
+            .catch(error => {
+                console.error('Bulk action failed:', error);
+                showToast(error.message || 'Something went wrong!', 'error');
+            })
+            .finally(() => {
+                if (!isButton) control.value = '';
+            });
+        });
+    });
+}
+
+/**
+ * Show the results of a bulk action ({id, status, completed} per task) on
+ * the cards they concern
+ */
+function applyTaskResults(results) {
+    results.forEach(result => {
+        const card = document.querySelector(`[data-task-card="${result.id}"]`);
+        if (!card) return;
+        if (result.status === 'deleted') {
+            card.remove();
+        } else if (result.status === 'updated') {
+            updateTaskUI(card.querySelector('.toggle-task'), result.completed);
+        }
+    });
+}
+
+/**
+ * Keep the list current with changes made elsewhere (other tabs, project
+ * members), as dispatched by live.js. Completion, title and deletion are
+ * patched into the cards shown, like the page's own toggles; anything else
+ * that can move a task within or into the filtered, sorted list reloads it.
+ */
+function initializeLiveUpdates() {
+    const grid = document.getElementById('taskGrid');
+    if (!grid) return;
+
+    const MOVING_FIELDS = ['priority', 'due_date', 'project_id'];
+    const IN_PLACE_ACTIONS = ['toggle', 'complete', 'reopen', 'delete'];
+
+    document.addEventListener('live:task', ({ detail }) => {
+        const task = detail.task;
+        const card = grid.querySelector(`[data-task-card="${task.id}"]`);
+
+        if (detail.action === 'deleted') {
+            if (card) card.remove();
+            return;
+        }
+        if (detail.action === 'created' || detail.changed.some(name => MOVING_FIELDS.includes(name))) {
+            scheduleTaskListRefresh();
+            return;
+        }
+        if (!card) return;
+
+        if (detail.changed.includes('title')) {
+            const link = card.querySelector('h3 a');
+            if (link) link.textContent = task.title;
+        }
+        if (detail.changed.includes('completed')) {
+            updateTaskUI(card.querySelector('.toggle-task'), task.completed);
+        }
+    });
+
+    document.addEventListener('live:tasks', ({ detail }) => {
+        if (IN_PLACE_ACTIONS.includes(detail.action)) {
+            applyTaskResults(detail.results);
+        } else {
+            scheduleTaskListRefresh();
+        }
+    });
+
+    document.addEventListener('live:stale', scheduleTaskListRefresh);
 }
 
 /**
@@ -7,5 +7,5 @@ class TaskAdmin(admin.ModelAdmin):
     list_filter = ['priority', 'due_date', 'completed', 'created_at']
     search_fields = ['title', 'description', 'user_username']
     list_editable = ['completed', 'priority']
-    readonly_fields = ['created_at', 'updated_at']
+    readonly_fields = ['created_at', 'updated_at', 'completed_at']
 
@@ -0,0 +1,322 @@
+"""
+Bulk task operations.
+
+apply_bulk_action() applies one action to many of a user's tasks with a
+single ownership-checked UPDATE or DELETE, instead of a read and a save per
+task.
+
+Queryset updates don't send the post_save signal that keeps the dashboard
+rollups, the project counters and the dashboard cache current, and the
+post_delete handlers skip deletes through BulkDeleteQuerySet. So the
+affected rows are read (and locked) first, and the same adjustments are
+then made in aggregate: one UPDATE per touched day and project rather than
+several per task.
+"""
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from datetime import date
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Value, When
+from django.utils import timezone
+
+from dashboard import rollups
+from dashboard.cache import bump_version_on_commit
+from live import events as live_events
+from projects import counters
+from projects.models import visible_projects
+from .models import BulkDeleteQuerySet, Task
+
+
+# Most tasks one request may change. A filter matching more is applied to
+# the first MAX_BULK_TASKS by id and reports has_more along with the id to
+# continue after.
+MAX_BULK_TASKS = getattr(settings, 'TASK_BULK_LIMIT', 1000)
+
+# Task values read before the write, enough to adjust rollups and counters
+ROW_FIELDS = ['id', 'project_id', 'completed', 'completed_at', 'created_at', 'updated_at', 'priority', 'due_date']
+
+# Per-task result statuses
+UPDATED = 'updated'
+UNCHANGED = 'unchanged'
+DELETED = 'deleted'
+NOT_FOUND = 'not_found'
+
+
+class BulkActionError(Exception):
+    """Invalid action, value or task selection; the message is shown to the user"""
+    pass
+
+
+def clean_ids(ids):
+    """Requested task ids as a list of ints, without duplicates"""
+    if not isinstance(ids, list):
+        raise BulkActionError('ids must be a list of task ids')
+    try:
+        ids = list(dict.fromkeys(int(task_id) for task_id in ids))
+    except (TypeError, ValueError):
+        raise BulkActionError('ids must be a list of task ids')
+    if not ids:
+        raise BulkActionError('No tasks selected')
+    if len(ids) > MAX_BULK_TASKS:
+        raise BulkActionError(f'At most {MAX_BULK_TASKS} tasks can be changed at once')
+    return ids
+
+
+# Actions
+
+class BulkAction(ABC):
+    """
+    One bulk operation.
+
+    verb  -- past tense for the response message
+    clean -- function(value, user_profile) validating the request's value
+    """
+
+    def __init__(self, name, verb, clean=None):
+        self.name = name
+        self.verb = verb
+        self.clean_value = clean
+
+    def clean(self, value, user_profile):
+        if self.clean_value is None:
+            return None
+        return self.clean_value(value, user_profile)
+
+    @abstractmethod
+    def write(self, user_profile, rows, value, now):
+        """
+        Write the action to the user's locked `rows`. Returns the
+        (before, after) row changes for the rollups and counters and
+        {id: (status, completed)} of every row.
+        """
+
+
+class ChangeAction(BulkAction):
+    """Action updating rows to the values change() gives each of them"""
+
+    @abstractmethod
+    def change(self, row, value, now):
+        """Values the row gets, or {} when it already has them"""
+
+    def write(self, user_profile, rows, value, now):
+        changes = {}
+        row_changes = []
+        statuses = {}
+        for row in rows:
+            values = self.change(row, value, now)
+            if values:
+                changes[row['id']] = values
+                row_changes.append((row, {**row, **values, 'updated_at': now}))
+                statuses[row['id']] = (UPDATED, values.get('completed', row['completed']))
+            else:
+                statuses[row['id']] = (UNCHANGED, row['completed'])
+        if changes:
+            update_statement(Task.objects.filter(user=user_profile), changes, now)
+        return row_changes, statuses
+
+
+class SetCompleted(ChangeAction):
+    def __init__(self, name, verb, completed):
+        super().__init__(name, verb)
+        self.completed = completed
+
+    def change(self, row, value, now):
+        if row['completed'] == self.completed:
+            return {}
+        # Same rules as Task.set_completed()
+        return {'completed': self.completed, 'completed_at': now if self.completed else None}
+
+
+class Toggle(ChangeAction):
+    def change(self, row, value, now):
+        completed = not row['completed']
+        return {'completed': completed, 'completed_at': now if completed else None}
+
+
+class SetField(ChangeAction):
+    def __init__(self, name, verb, field_name, clean):
+        super().__init__(name, verb, clean)
+        self.field_name = field_name
+
+    def change(self, row, value, now):
+        if row[self.field_name] == value:
+            return {}
+        return {self.field_name: value}
+
+
+class Delete(BulkAction):
+    def write(self, user_profile, rows, value, now):
+        if rows:
+            # A regular delete, so cascades and other apps' handlers run;
+            # the rollup, counter, cache and live handlers skip it
+            BulkDeleteQuerySet(Task).filter(user=user_profile, id__in=[row['id'] for row in rows]).delete()
+        return [(row, None) for row in rows], {row['id']: (DELETED, row['completed']) for row in rows}
+
+
+def clean_priority(value, user_profile):
+    if value not in dict(Task.PRIORITY_CHOICES):
+        raise BulkActionError('Choose a valid priority')
+    return value
+
+
+def clean_due_date(value, user_profile):
+    """ISO date, or empty to clear the due date"""
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(str(value))
+    except ValueError:
+        raise BulkActionError('Enter a valid due date')
+
+
+def clean_project(value, user_profile):
+    """Id of a project the user owns or is a member of, or empty for none"""
+    if value in (None, '', 'none'):
+        return None
+    try:
+        project_id = int(value)
+    except (TypeError, ValueError):
+        raise BulkActionError('Choose a valid project')
+    if not visible_projects(user_profile).filter(id=project_id).exists():
+        raise BulkActionError('Project not found or you do not have permission')
+    return project_id
+
+
+BULK_ACTIONS = {
+    'complete': SetCompleted('complete', 'completed', completed=True),
+    'reopen': SetCompleted('reopen', 'reopened', completed=False),
+    'toggle': Toggle('toggle', 'updated'),
+    'delete': Delete('delete', 'deleted'),
+    'set_priority': SetField('set_priority', 'reprioritized', 'priority', clean_priority),
+    'reschedule': SetField('reschedule', 'rescheduled', 'due_date', clean_due_date),
+    'move': SetField('move', 'moved', 'project_id', clean_project),
+}
+
+
+# Results
+
+@dataclass
+class BulkResult:
+    action: str
+    verb: str
+    # [{'id': ..., 'status': ..., 'completed': ...}] in request order
+    results: list = field(default_factory=list)
+    # A filter matched more than MAX_BULK_TASKS tasks; send the request again
+    # with after=next_after for the rest
+    has_more: bool = False
+    next_after: int = None
+
+    def count(self, status):
+        return sum(1 for result in self.results if result['status'] == status)
+
+    @property
+    def changed(self):
+        return self.count(UPDATED) + self.count(DELETED)
+
+    @property
+    def message(self):
+        changed = self.changed
+        return f"{changed} task{'' if changed == 1 else 's'} {self.verb}"
+
+    def as_dict(self):
+        return {
+            'action': self.action,
+            'changed': self.changed,
+            'unchanged': self.count(UNCHANGED),
+            'not_found': self.count(NOT_FOUND),
+            'has_more': self.has_more,
+            'next_after': self.next_after,
+            'results': self.results,
+            'message': self.message,
+        }
+
+
+def update_statement(tasks, changes, now):
+    """
+    One UPDATE giving every changed row its new values. Rows that need
+    different values (e.g. a toggle) get them through CASE expressions.
+    """
+    groups = {}
+    for row_id, values in changes.items():
+        groups.setdefault(tuple(sorted(values.items())), []).append(row_id)
+
+    if len(groups) == 1:
+        (values, row_ids), = groups.items()
+        updates = dict(values)
+    else:
+        names = {name for values in groups for name, value in values}
+        updates = {}
+        for name in names:
+            model_field = Task._meta.get_field(name)
+            updates[name] = Case(
+                *[
+                    When(id__in=row_ids, then=Value(dict(values)[name], output_field=model_field))
+                    for values, row_ids in groups.items()
+                    if name in dict(values)
+                ],
+                default=model_field.attname,
+                output_field=model_field,
+            )
+    # auto_now only applies to save()
+    updates['updated_at'] = now
+    return tasks.filter(id__in=list(changes)).update(**updates)
+
+
+def apply_bulk_action(user_profile, action_name, tasks, ids=None, value=None, after=None):
+    """
+    Apply an action to `tasks`, a queryset of the user's tasks narrowed to
+    `ids` when those are given, and to ids above `after` when continuing a
+    filter. Raises BulkActionError for an unknown action, an invalid value or
+    a bad id list.
+    """
+    action = BULK_ACTIONS.get(action_name)
+    if action is None:
+        raise BulkActionError('Unknown action')
+    value = action.clean(value, user_profile)
+
+    # Ownership is checked here and again in the write itself
+    tasks = tasks.filter(user=user_profile).select_related(None).order_by('id')
+    if ids is not None:
+        ids = clean_ids(ids)
+        tasks = tasks.filter(id__in=ids)
+    elif after is not None:
+        try:
+            tasks = tasks.filter(id__gt=int(after))
+        except (TypeError, ValueError):
+            raise BulkActionError('Invalid continuation')
+
+    result = BulkResult(action=action.name, verb=action.verb)
+    now = timezone.now()
+
+    with transaction.atomic():
+        # Lock the rows so the adjustments below match what gets written
+        rows = list(tasks.select_for_update().values(*ROW_FIELDS)[:MAX_BULK_TASKS + 1])
+        if len(rows) > MAX_BULK_TASKS:
+            rows = rows[:MAX_BULK_TASKS]
+            result.has_more = True
+            result.next_after = rows[-1]['id']
+        row_changes, statuses = action.write(user_profile, rows, value, now)
+
+        if row_changes:
+            rollups.record_tasks_changed(user_profile.id, row_changes)
+            counters.record_tasks_changed(row_changes)
+            bump_version_on_commit(user_profile.id)
+
+    for row_id in (ids if ids is not None else statuses):
+        if row_id in statuses:
+            status, completed = statuses[row_id]
+            result.results.append({'id': row_id, 'status': status, 'completed': completed})
+        else:
+            result.results.append({'id': row_id, 'status': NOT_FOUND})
+
+    if row_changes:
+        # Other tabs and project members update the changed cards
+        project_ids = {values['project_id'] for change in row_changes for values in change if values}
+        live_events.tasks_changed(
+            user_profile.id, action.name,
+            [row for row in result.results if row['status'] in (UPDATED, DELETED)],
+            project_ids,
+        )
+    return result
@@ -0,0 +1,420 @@
+"""
+Bulk import of tasks (and the projects they name) from CSV or JSON.
+
+Files are parsed a record at a time: CSV through csv.DictReader, JSON as
+either newline-delimited objects (the NDJSON export) or one array of objects
+decoded incrementally, so memory stays flat however large the file is.
+Columns are those of the task export (dashboard/export.py), so an export can
+be imported again as is; unknown columns are ignored.
+
+Valid rows are inserted with bulk_create, BATCH_SIZE at a time, each batch in
+its own transaction. A failure loses at most the batch in progress, and the
+import can be resumed with start_row=report.resume_row. bulk_create doesn't
+send post_save, so every batch adjusts rollups, project counters and the
+dashboard cache itself, in aggregate.
+
+Projects are matched by title (case-insensitively) against the user's own
+projects and those they are a member of, through a map loaded once. Unknown
+titles create a project unless create_projects is off.
+"""
+import csv
+import io
+import itertools
+import json
+import re
+from dataclasses import dataclass, field
+from datetime import date, datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from dashboard import rollups
+from dashboard.cache import bump_version_on_commit
+from live import events as live_events
+from projects import counters
+from projects.models import Project, visible_projects
+from .models import Task
+
+
+BATCH_SIZE = getattr(settings, 'TASK_IMPORT_BATCH_SIZE', 1000)
+MAX_BATCH_SIZE = 10000
+
+# Errors kept for the report; further ones are only counted
+MAX_REPORTED_ERRORS = 1000
+
+# Characters read per step when decoding a JSON array, and the longest
+# array item accepted
+JSON_CHUNK_SIZE = 64 * 1024
+MAX_JSON_RECORD_SIZE = 1024 * 1024
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+IMPORT_FORMATS = ['csv', 'json']
+
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 'on', 'completed', 'done'}
+FALSE_VALUES = {'', '0', 'false', 'no', 'n', 'off', 'pending', 'open'}
+
+TITLE_MAX_LENGTH = Task._meta.get_field('title').max_length
+DESCRIPTION_MAX_LENGTH = Task._meta.get_field('description').max_length
+PROJECT_TITLE_MAX_LENGTH = Project._meta.get_field('title').max_length
+
+
+class ImportFileError(Exception):
+    """The file can't be read; the message is shown to the user"""
+    report = None
+
+
+class RowError(Exception):
+    """One field of one record is invalid"""
+
+    def __init__(self, field_name, message):
+        super().__init__(message)
+        self.field_name = field_name
+        self.message = message
+
+
+# Readers. Each yields one dict per record.
+
+def text_stream(binary_file):
+    """Decoded view of an uploaded or opened binary file, BOM stripped"""
+    return io.TextIOWrapper(binary_file, encoding='utf-8-sig', newline='')
+
+
+def read_csv(stream):
+    reader = csv.DictReader(stream)
+    if not reader.fieldnames:
+        raise ImportFileError('The file is empty')
+    for row in reader:
+        # Short rows fill in None, long ones collect extras under None
+        yield {key: value for key, value in row.items() if key is not None}
+
+
+def read_json_array(stream, buffer='', chunk_size=JSON_CHUNK_SIZE, max_record_size=MAX_JSON_RECORD_SIZE):
+    """
+    Items of a top-level JSON array, decoded without loading the whole file.
+    `buffer` is text already read from the start of `stream`. Items are
+    decoded at an offset into the buffer, which is only cut down when the
+    next chunk is read; an item that doesn't parse within `max_record_size`
+    characters fails the file.
+    """
+    decoder = json.JSONDecoder()
+    index = 0
+
+    def read_more():
+        """Drop the decoded text and add the next chunk; False at the end of the file"""
+        nonlocal buffer, index
+        if len(buffer) - index > max_record_size:
+            raise ImportFileError(f'A JSON record is longer than {max_record_size} characters')
+        chunk = stream.read(chunk_size)
+        buffer = buffer[index:] + chunk
+        index = 0
+        return bool(chunk)
+
+    def next_char():
+        """First character past any whitespace, or '' at the end of the file"""
+        nonlocal index
+        while True:
+            index = WHITESPACE.match(buffer, index).end()
+            if index < len(buffer) or not read_more():
+                return buffer[index:index + 1]
+
+    if next_char() != '[':
+        raise ImportFileError('Expected a JSON array')
+    index += 1
+    if next_char() == ']':
+        return
+
+    while True:
+        if not next_char():
+            raise ImportFileError('Unexpected end of the JSON array')
+        try:
+            value, end = decoder.raw_decode(buffer, index)
+        except json.JSONDecodeError:
+            # Possibly just cut off at the chunk boundary
+            if not read_more():
+                raise ImportFileError('Invalid JSON in the array')
+            continue
+        if end == len(buffer) and read_more():
+            # A number or literal may go on in the next chunk
+            continue
+        index = end
+        yield value
+
+        separator = next_char()
+        if separator == ']':
+            return
+        if separator != ',':
+            raise ImportFileError('Invalid JSON in the array' if separator else 'Unexpected end of the JSON array')
+        index += 1
+
+
+def read_ndjson(lines):
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            # Reported against this record rather than failing the file
+            yield None
+
+
+def read_json(stream):
+    """A JSON array of objects, or one object per line"""
+    head = stream.read(JSON_CHUNK_SIZE)
+    if head.lstrip().startswith('['):
+        return read_json_array(stream, head)
+    # Complete the last line of `head`, then carry on line by line
+    head += stream.readline()
+    return read_ndjson(itertools.chain(io.StringIO(head), stream))
+
+
+READERS = {
+    'csv': read_csv,
+    'json': read_json,
+}
+
+
+def guess_format(filename):
+    """Import format from a file name, or None"""
+    name = (filename or '').lower()
+    if name.endswith('.csv'):
+        return 'csv'
+    if name.endswith(('.json', '.ndjson', '.jsonl')):
+        return 'json'
+    return None
+
+
+# Field cleaning
+
+def clean_text(record, name, max_length, required=False):
+    value = record.get(name)
+    value = '' if value is None else str(value).strip()
+    if required and not value:
+        raise RowError(name, 'This field is required')
+    if len(value) > max_length:
+        raise RowError(name, f'At most {max_length} characters')
+    return value
+
+
+def clean_bool(record, name):
+    value = record.get(name)
+    if isinstance(value, bool):
+        return value
+    value = '' if value is None else str(value).strip().lower()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    raise RowError(name, 'Expected true or false')
+
+
+def clean_date(record, name):
+    value = record.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        return date.fromisoformat(str(value).strip()[:10])
+    except ValueError:
+        raise RowError(name, 'Expected a date as YYYY-MM-DD')
+
+
+def clean_datetime(record, name):
+    value = record.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        value = datetime.fromisoformat(str(value).strip())
+    except ValueError:
+        raise RowError(name, 'Expected an ISO 8601 date and time')
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+def clean_priority(record, name):
+    # Labels work too ("High")
+    value = str(record.get(name) or '').strip().lower()
+    if not value:
+        return 'medium'
+    if value not in dict(Task.PRIORITY_CHOICES):
+        raise RowError(name, 'Expected low, medium or high')
+    return value
+
+
+class ProjectResolver:
+    """
+    Project ids by title. Loads the user's visible projects once; unknown
+    titles create a project (or fail the row if `create` is off).
+    """
+
+    def __init__(self, user_profile, create=True):
+        self.user_profile = user_profile
+        self.create = create
+        self.created = 0
+        projects = (
+            visible_projects(user_profile)
+            .order_by('created_at', 'id')
+            .values_list('id', 'title', 'user_id')
+        )
+        owned = {}
+        shared = {}
+        for project_id, title, owner_id in projects:
+            target = owned if owner_id == user_profile.id else shared
+            target.setdefault(title.casefold(), project_id)
+        # The user's own project wins over one they are a member of
+        self.ids = {**shared, **owned}
+
+    def resolve(self, title):
+        if not title:
+            return None
+        key = title.casefold()
+        if key not in self.ids:
+            if not self.create:
+                raise RowError('project', f"No project named '{title}'")
+            # Regular save, so its own signals keep rollups and caches current
+            self.ids[key] = Project.objects.create(title=title, user=self.user_profile).id
+            self.created += 1
+        return self.ids[key]
+
+
+def build_task(record, user_profile, projects):
+    """Unsaved Task for one record; raises RowError"""
+    if not isinstance(record, dict):
+        raise RowError('', 'Expected an object with task fields')
+
+    task = Task(
+        user=user_profile,
+        title=clean_text(record, 'title', TITLE_MAX_LENGTH, required=True),
+        description=clean_text(record, 'description', DESCRIPTION_MAX_LENGTH),
+        priority=clean_priority(record, 'priority'),
+        due_date=clean_date(record, 'due_date'),
+    )
+    completed_at = clean_datetime(record, 'completed_at')
+    completed = clean_bool(record, 'completed') if record.get('completed') not in (None, '') else bool(completed_at)
+    task.completed_at = completed_at
+    task.set_completed(completed)
+    task.project_id = projects.resolve(clean_text(record, 'project', PROJECT_TITLE_MAX_LENGTH))
+    return task
+
+
+# Import
+
+@dataclass
+class ImportReport:
+    rows: int = 0
+    imported: int = 0
+    failed: int = 0
+    projects_created: int = 0
+    # (row, field, message), at most MAX_REPORTED_ERRORS of them
+    errors: list = field(default_factory=list)
+    # Rows up to here are committed; pass resume_row as start_row to go on
+    # after an interruption
+    resume_row: int = 1
+
+    def add_error(self, row, field_name, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((row, field_name, message))
+
+    @property
+    def errors_truncated(self):
+        return self.failed > len(self.errors)
+
+    def write_errors(self, stream):
+        """Per-row error report as CSV"""
+        writer = csv.writer(stream)
+        writer.writerow(['row', 'field', 'error'])
+        writer.writerows(self.errors)
+
+
+def insert_batch(user_profile, batch):
+    """Insert one batch of tasks and bring rollups and counters up to date"""
+    with transaction.atomic():
+        Task.objects.bulk_create(batch)
+        changes = [
+            (None, {
+                'created_at': task.created_at,
+                'updated_at': task.updated_at,
+                'completed': task.completed,
+                'completed_at': task.completed_at,
+                'project_id': task.project_id,
+            })
+            for task in batch
+        ]
+        rollups.record_tasks_changed(user_profile.id, changes)
+        counters.record_tasks_changed(changes)
+        bump_version_on_commit(user_profile.id)
+
+
+def clean_batch_size(batch_size):
+    try:
+        batch_size = int(batch_size)
+    except (TypeError, ValueError):
+        return BATCH_SIZE
+    return max(1, min(batch_size, MAX_BATCH_SIZE))
+
+
+def import_tasks(user_profile, binary_file, file_format, batch_size=BATCH_SIZE,
+                 start_row=1, create_projects=True, progress=None):
+    """
+    Import the records of `binary_file` as tasks of `user_profile`.
+
+    Records before `start_row` (1-based, header excluded) are skipped.
+    `progress`, if given, is called with the report after each committed
+    batch. Returns an ImportReport. Raises ImportFileError when the file
+    can't be parsed any further; rows committed until then stay imported and
+    the exception's `report` says where to resume.
+    """
+    if file_format not in READERS:
+        raise ImportFileError(f"Unsupported format '{file_format}'")
+    batch_size = clean_batch_size(batch_size)
+    report = ImportReport(resume_row=start_row)
+    projects = ProjectResolver(user_profile, create=create_projects)
+    project_ids = set()
+
+    try:
+        records = READERS[file_format](text_stream(binary_file))
+        batch = []
+        for number, record in enumerate(records, start=1):
+            if number < start_row:
+                continue
+            report.rows += 1
+            try:
+                batch.append(build_task(record, user_profile, projects))
+            except RowError as exc:
+                report.add_error(number, exc.field_name, exc.message)
+
+            if len(batch) >= batch_size:
+                insert_batch(user_profile, batch)
+                project_ids.update(task.project_id for task in batch)
+                report.imported += len(batch)
+                report.resume_row = number + 1
+                batch = []
+                if progress:
+                    progress(report)
+            elif not batch:
+                # Nothing pending, so resuming can skip this row too
+                report.resume_row = number + 1
+
+        if batch:
+            insert_batch(user_profile, batch)
+            project_ids.update(task.project_id for task in batch)
+            report.imported += len(batch)
+            report.resume_row = number + 1
+    except ImportFileError as exc:
+        exc.report = report
+        raise
+    except (UnicodeDecodeError, csv.Error) as exc:
+        error = ImportFileError(f'Could not read the file: {exc}')
+        error.report = report
+        raise error
+    finally:
+        report.projects_created = projects.created
+        if report.imported:
+            # Open pages reload their lists once, not once per batch
+            live_events.tasks_imported(user_profile.id, project_ids)
+
+    return report
@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import UserProfile
+from tasks.importer import BATCH_SIZE, IMPORT_FORMATS, ImportFileError, guess_format, import_tasks
+
+
+class Command(BaseCommand):
+    help = 'Import tasks for one user from a CSV or JSON file, in batched inserts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV, JSON array or newline-delimited JSON file')
+        parser.add_argument('--user', required=True, help='Username the tasks belong to')
+        parser.add_argument('--format', choices=IMPORT_FORMATS,
+                            help='File format. Defaults to guessing from the file extension.')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                            help=f'Rows inserted per transaction (default {BATCH_SIZE})')
+        parser.add_argument('--start-row', type=int, default=1,
+                            help='Skip records before this one (1-based), to resume an interrupted import')
+        parser.add_argument('--no-create-projects', action='store_true',
+                            help='Reject rows naming an unknown project instead of creating it')
+        parser.add_argument('--errors', help='Write the per-row error report to this CSV file')
+
+    def handle(self, *args, **options):
+        try:
+            user_profile = UserProfile.objects.get(user__username=options['user'])
+        except UserProfile.DoesNotExist:
+            raise CommandError(f"No profile for user '{options['user']}'")
+
+        file_format = options['format'] or guess_format(options['path'])
+        if file_format is None:
+            raise CommandError('Cannot tell the file format from its name, pass --format')
+
+        def progress(report):
+            self.stdout.write(f"  {report.imported} imported, {report.failed} failed (next row {report.resume_row})")
+
+        try:
+            with open(options['path'], 'rb') as binary_file:
+                report = import_tasks(
+                    user_profile,
+                    binary_file,
+                    file_format,
+                    batch_size=options['batch_size'],
+                    start_row=options['start_row'],
+                    create_projects=not options['no_create_projects'],
+                    progress=progress if options['verbosity'] > 1 else None,
+                )
+        except OSError as exc:
+            raise CommandError(str(exc))
+        except ImportFileError as exc:
+            raise CommandError(f"{exc}. Rows before {exc.report.resume_row} are imported; "
+                               f"resume with --start-row {exc.report.resume_row}")
+
+        if options['errors']:
+            with open(options['errors'], 'w', newline='', encoding='utf-8') as error_file:
+                report.write_errors(error_file)
+
+        for row, field_name, message in report.errors[:20]:
+            self.stdout.write(self.style.WARNING(f"  row {row}: {field_name or 'record'}: {message}"))
+        if report.failed > 20:
+            self.stdout.write(self.style.WARNING(f"  ... {report.failed - 20} more error(s)"))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report.imported} of {report.rows} row(s), {report.failed} failed, "
+            f"{report.projects_created} project(s) created"
+        ))
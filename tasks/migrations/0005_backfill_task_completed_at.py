@@ -0,0 +1,41 @@
+from django.db import migrations
+from django.db.models import F
+
+# Rows updated per statement. Each chunk commits on its own so a large
+# tasks table is never locked in one long transaction.
+CHUNK_SIZE = 5000
+
+
+def backfill_completed_at(apps, schema_editor):
+    """
+    Existing completed tasks have no completion timestamp; their last update
+    is the best estimate of when they were completed.
+    """
+    Task = apps.get_model('tasks', 'Task')
+    pending = Task.objects.filter(completed=True, completed_at__isnull=True)
+
+    last_id = 0
+    while True:
+        ids = list(
+            pending.filter(id__gt=last_id)
+            .order_by('id')
+            .values_list('id', flat=True)[:CHUNK_SIZE]
+        )
+        if not ids:
+            break
+        Task.objects.filter(id__in=ids).update(completed_at=F('updated_at'))
+        last_id = ids[-1]
+
+
+class Migration(migrations.Migration):
+
+    # Let every chunk commit separately instead of one huge transaction
+    atomic = False
+
+    dependencies = [
+        ('tasks', '0004_task_completed_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_completed_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:06
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+# Indexes are built concurrently so deploying doesn't take a write lock on
+# large tables.
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('tasks', '0005_backfill_task_completed_at'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(fields=['user', 'completed', 'completed_at'], name='task_user_completed_at_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(fields=['user', 'due_date'], name='task_user_due_date_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(fields=['project', 'completed'], name='task_project_completed_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(fields=['user', 'priority', 'completed'], name='task_user_priority_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(condition=models.Q(('completed', False)), fields=['user', 'due_date'], name='task_open_due_date_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(condition=models.Q(('completed', False)), fields=['user', '-created_at'], name='task_open_created_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:09
+
+from django.contrib.postgres.operations import AddIndexConcurrently, RemoveIndexConcurrently
+from django.db import migrations, models
+
+
+# Indexes backing the task list sort modes, built concurrently so deploying
+# doesn't take a write lock on large tables.
+
+
+class Migration(migrations.Migration):
+
+    # CREATE/DROP INDEX CONCURRENTLY can't run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('tasks', '0006_task_indexes'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(fields=['user', 'due_date', 'id'], name='task_user_due_id_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='task_user_created_id_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(models.F('user'), models.Case(models.When(priority='high', then=models.Value(0)), models.When(priority='medium', then=models.Value(1)), default=models.Value(2), output_field=models.IntegerField()), models.F('id'), name='task_user_priority_rank_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(fields=['user', 'title', 'id'], name='task_user_title_id_idx'),
+        ),
+        # Superseded by task_user_due_id_idx, dropped once that one exists
+        RemoveIndexConcurrently(
+            model_name='task',
+            name='task_user_due_date_idx',
+        ),
+    ]
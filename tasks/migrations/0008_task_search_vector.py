@@ -0,0 +1,43 @@
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+# search_vector is owned by the database: a BEFORE trigger rebuilds it
+# whenever the title or description is written, so every writer (ORM,
+# queryset.update(), bulk_create, raw SQL) keeps it current. Django's own
+# saves write the column too, which simply fires the trigger again.
+CREATE_TRIGGER = """
+CREATE FUNCTION tasks_task_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.description, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER tasks_task_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, description, search_vector ON tasks_task
+    FOR EACH ROW EXECUTE FUNCTION tasks_task_search_vector_update();
+"""
+
+DROP_TRIGGER = """
+DROP TRIGGER IF EXISTS tasks_task_search_vector_trigger ON tasks_task;
+DROP FUNCTION IF EXISTS tasks_task_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0007_task_sort_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(CREATE_TRIGGER, DROP_TRIGGER),
+    ]
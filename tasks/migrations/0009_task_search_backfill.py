@@ -0,0 +1,46 @@
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+# Rows updated per statement. Each chunk commits on its own so a large
+# tasks table is never locked in one long transaction.
+CHUNK_SIZE = 5000
+
+
+def backfill_search_vector(apps, schema_editor):
+    """
+    Touch existing rows so the trigger from 0008 computes their vectors.
+    """
+    Task = apps.get_model('tasks', 'Task')
+    pending = Task.objects.filter(search_vector__isnull=True)
+
+    last_id = 0
+    while True:
+        ids = list(
+            pending.filter(id__gt=last_id)
+            .order_by('id')
+            .values_list('id', flat=True)[:CHUNK_SIZE]
+        )
+        if not ids:
+            break
+        Task.objects.filter(id__in=ids).update(search_vector=None)
+        last_id = ids[-1]
+
+
+class Migration(migrations.Migration):
+
+    # Chunks commit separately and CREATE INDEX CONCURRENTLY can't run
+    # inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('tasks', '0008_task_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_search_vector, migrations.RunPython.noop),
+        AddIndexConcurrently(
+            model_name='task',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='task_search_vector_idx'),
+        ),
+    ]
@@ -1,7 +1,31 @@
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction
+from django.db.models import Case, F, IntegerField, Q, Value, When
+from django.db.models.functions import Upper
+from django.utils import timezone
 from django.contrib.auth.models import User
 from django.db.models.fields import related
 
+# Sort key for "Priority": high first, then medium, then low. Also the
+# expression of a functional index, so keep the two in step.
+PRIORITY_RANK = Case(
+    When(priority='high', then=Value(0)),
+    When(priority='medium', then=Value(1)),
+    default=Value(2),
+    output_field=IntegerField(),
+)
+
+
+class BulkDeleteQuerySet(models.QuerySet):
+    """
+    Tasks deleted by tasks/bulk.py, which adjusts the rollups, project
+    counters and live updates once for all of them. The per-task
+    post_delete handlers check for it as the delete's origin and skip.
+    """
+    pass
+
+
 class Task(models.Model):
     PRIORITY_CHOICES = [
         ('low', 'Low'),
@@ -14,13 +38,72 @@ class Task(models.Model):
     user = models.ForeignKey('accounts.UserProfile', on_delete=models.CASCADE, related_name='tasks')
     project = models.ForeignKey('projects.Project', on_delete=models.CASCADE, related_name='tasks', null=True, blank=True)
     completed = models.BooleanField(default=False)
+    completed_at = models.DateTimeField(blank=True, null=True)
     priority = models.CharField(max_length=10, choices=PRIORITY_CHOICES, default='medium')
     due_date = models.DateField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Weighted title/description document, written by a database trigger
+    # (see migrations/0008_task_search_vector.py and accounts/search.py)
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         ordering = ['-created_at']
+        # Built concurrently on Postgres, see migrations/0006, 0007, 0009 and 0010
+        indexes = [
+            # Completion history: user's completed tasks in a completed_at range
+            models.Index(fields=['user', 'completed', 'completed_at'], name='task_user_completed_at_idx'),
+            # Calendar month ranges and the "Due Date" task list sort
+            models.Index(fields=['user', 'due_date', 'id'], name='task_user_due_id_idx'),
+            # Project progress
+            models.Index(fields=['project', 'completed'], name='task_project_completed_idx'),
+            # High priority widgets
+            models.Index(fields=['user', 'priority', 'completed'], name='task_user_priority_idx'),
+            # Most reads only touch open tasks: due/overdue lists and the
+            # newest-first task list
+            models.Index(fields=['user', 'due_date'], condition=Q(completed=False), name='task_open_due_date_idx'),
+            models.Index(fields=['user', '-created_at'], condition=Q(completed=False), name='task_open_created_idx'),
+            # Task list sort modes (tasks/pagination.py), id breaks ties
+            models.Index(fields=['user', 'created_at', 'id'], name='task_user_created_id_idx'),
+            models.Index(F('user'), PRIORITY_RANK, F('id'), name='task_user_priority_rank_idx'),
+            models.Index(fields=['user', 'title', 'id'], name='task_user_title_id_idx'),
+            # Full-text search and search-as-you-type (pg_trgm)
+            GinIndex(fields=['search_vector'], name='task_search_vector_idx'),
+            GinIndex(OpClass(Upper('title'), name='gin_trgm_ops'), name='task_title_trgm_idx'),
+        ]
 
     def __str__(self):
-        return self.title
\ No newline at end of file
+        return self.title
+
+    def set_completed(self, completed):
+        """Set the completion status, stamping or clearing completed_at"""
+        if completed and not self.completed_at:
+            self.completed_at = timezone.now()
+        elif not completed:
+            self.completed_at = None
+        self.completed = completed
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded state so signal handlers can tell what changed
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Writers that only flip `completed` (e.g. the admin list) still get
+        # a consistent completed_at
+        if self.completed != bool(self.completed_at):
+            self.set_completed(self.completed)
+        # Keep the rollups written by post_save handlers in the same transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+        # Signal handlers have seen the change; this is the new baseline
+        self._loaded_values = {
+            field.attname: getattr(self, field.attname)
+            for field in self._meta.concrete_fields
+        }
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
@@ -0,0 +1,161 @@
+"""
+Keyset (cursor) pagination for the task list.
+
+Only the sort modes in SORT_MODES can be requested, and each one is backed by
+an index on (user, sort key, id). A page is fetched with a WHERE clause that
+continues after the last row of the previous page instead of an OFFSET, so
+page N costs the same as page 1 however many tasks a user has.
+
+Cursors are signed, so clients can pass them back but not forge them.
+"""
+from datetime import date, datetime
+
+from django.conf import settings
+from django.core import signing
+from django.db.models import F, Q
+
+from .models import PRIORITY_RANK
+
+
+DEFAULT_SORT = '-created_at'
+DEFAULT_PAGE_SIZE = getattr(settings, 'TASK_LIST_PAGE_SIZE', 25)
+MAX_PAGE_SIZE = 100
+
+CURSOR_SALT = 'tasks.pagination.cursor'
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class SortMode:
+    """
+    One whitelisted task list ordering.
+
+    key        -- field (or annotation of `expression`) the list is ordered by
+    descending -- newest/largest first
+    nullable   -- key can be NULL; NULLs always sort last
+    value_type -- how cursor values are turned back into Python values
+    """
+
+    def __init__(self, label, key, descending=False, nullable=False, expression=None, value_type=str):
+        self.label = label
+        self.key = key
+        self.descending = descending
+        self.nullable = nullable
+        self.expression = expression
+        self.value_type = value_type
+
+    def prepare(self, tasks):
+        if self.expression is not None:
+            tasks = tasks.annotate(**{self.key: self.expression})
+        return tasks
+
+    def ordering(self):
+        key = F(self.key)
+        # NULLS LAST only where there can be NULLs: the clause has to match
+        # the index order exactly, or Postgres sorts every row instead
+        nulls = {'nulls_last': True} if self.nullable else {}
+        if self.descending:
+            return [key.desc(**nulls), F('id').desc()]
+        return [key.asc(**nulls), F('id').asc()]
+
+    def after(self, value, task_id):
+        """Filter selecting the rows that come after (value, task_id)"""
+        op = 'lt' if self.descending else 'gt'
+        if value is None:
+            # Only other NULL rows can follow a NULL key
+            return Q(**{f'{self.key}__isnull': True, f'id__{op}': task_id})
+
+        condition = Q(**{f'{self.key}__{op}': value}) | Q(**{self.key: value, f'id__{op}': task_id})
+        if self.nullable:
+            condition |= Q(**{f'{self.key}__isnull': True})
+        return condition
+
+    def dump_value(self, value):
+        if isinstance(value, (date, datetime)):
+            return value.isoformat()
+        return value
+
+    def load_value(self, raw):
+        if raw is None:
+            return None
+        if self.value_type is datetime:
+            return datetime.fromisoformat(raw)
+        if self.value_type is date:
+            return date.fromisoformat(raw)
+        return self.value_type(raw)
+
+
+SORT_MODES = {
+    '-created_at': SortMode('Newest First', 'created_at', descending=True, value_type=datetime),
+    'created_at': SortMode('Oldest First', 'created_at', value_type=datetime),
+    'due_date': SortMode('Due Date', 'due_date', nullable=True, value_type=date),
+    'priority': SortMode('Priority', 'priority_rank', expression=PRIORITY_RANK, value_type=int),
+    'title': SortMode('Title', 'title'),
+}
+
+SORT_CHOICES = [(name, mode.label) for name, mode in SORT_MODES.items()]
+
+
+def clean_sort(sort):
+    """Requested sort if it is whitelisted, else the default"""
+    return sort if sort in SORT_MODES else DEFAULT_SORT
+
+
+def clean_page_size(page_size):
+    try:
+        page_size = int(page_size)
+    except (TypeError, ValueError):
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(page_size, MAX_PAGE_SIZE))
+
+
+def encode_cursor(sort, value, task_id):
+    mode = SORT_MODES[sort]
+    return signing.dumps({'s': sort, 'v': mode.dump_value(value), 'id': task_id}, salt=CURSOR_SALT, compress=True)
+
+
+def decode_cursor(cursor, sort):
+    """
+    (value, task_id) from a cursor. Raises InvalidCursor if it was tampered
+    with or belongs to a different sort mode.
+    """
+    try:
+        data = signing.loads(cursor, salt=CURSOR_SALT)
+        if data['s'] != sort:
+            raise InvalidCursor('Cursor belongs to a different sort order')
+        return SORT_MODES[sort].load_value(data['v']), int(data['id'])
+    except (signing.BadSignature, KeyError, TypeError, ValueError) as exc:
+        raise InvalidCursor('Invalid cursor') from exc
+
+
+def page_query(tasks, sort=DEFAULT_SORT, cursor=None):
+    """
+    `tasks` in the given sort mode, after the cursor if any. Raises
+    InvalidCursor for a bad cursor.
+    """
+    mode = SORT_MODES[sort]
+    tasks = mode.prepare(tasks).order_by(*mode.ordering())
+    if cursor:
+        value, task_id = decode_cursor(cursor, sort)
+        tasks = tasks.filter(mode.after(value, task_id))
+    return tasks
+
+
+def paginate_tasks(tasks, sort=DEFAULT_SORT, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    One page of `tasks` in the given sort mode.
+    Returns (tasks on this page, cursor for the next page or None).
+    """
+    sort = clean_sort(sort)
+    mode = SORT_MODES[sort]
+    # One extra row tells us whether there is a next page
+    page = list(page_query(tasks, sort, cursor)[:page_size + 1])
+
+    next_cursor = None
+    if len(page) > page_size:
+        page = page[:page_size]
+        last = page[-1]
+        next_cursor = encode_cursor(sort, getattr(last, mode.key), last.id)
+    return page, next_cursor
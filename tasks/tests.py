@@ -1,3 +1,295 @@
+import io
+import json
+from datetime import date
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from dashboard.models import DailyTaskStats, UserStats
+from dashboard.testing import QueryScalingTestCase
+from projects.models import Project
+from . import bulk
+from .bulk import BulkActionError, apply_bulk_action
+from .importer import ImportFileError, import_tasks, read_json_array
+from .models import Task
+from .pagination import SORT_MODES, InvalidCursor, decode_cursor, encode_cursor, paginate_tasks
+
+
+class TaskQueryTests(QueryScalingTestCase):
+    def test_task_list(self):
+        self.assertConstantQueries(lambda seed: reverse('tasks:task_list'))
+
+    def test_filtered_task_list(self):
+        self.assertConstantQueries(lambda seed: reverse('tasks:task_list') + '?status=incomplete&sort=priority')
+
+    def test_task_page(self):
+        self.assertConstantQueries(lambda seed: reverse('tasks:task_page') + '?stats=1')
+
+    def test_task_forms(self):
+        self.assertConstantQueries(lambda seed: reverse('tasks:task_create'))
+        self.assertConstantQueries(lambda seed: reverse('tasks:task_edit', args=[seed.tasks[0].id]))
+
+    def test_task_detail(self):
+        self.assertConstantQueries(lambda seed: reverse('tasks:task_detail', args=[seed.tasks[0].id]))
+
+    def test_api(self):
+        self.assertConstantQueries(lambda seed: reverse('api:task_collection'))
+        self.assertConstantQueries(lambda seed: reverse('api:task_detail', args=[seed.tasks[0].id]))
+
+
+class PaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.profile = User.objects.create(username='pages').userprofile
+        due = [date(2026, 10, 1), None, date(2026, 10, 1), None, date(2026, 9, 1), date(2026, 11, 1), None]
+        priorities = ['low', 'high', 'medium', 'high', 'low', 'medium', 'high']
+        for number, (due_date, priority) in enumerate(zip(due, priorities)):
+            # Titles repeat so ties are broken by id
+            Task.objects.create(user=cls.profile, title=f'Task {number % 3}', due_date=due_date, priority=priority)
+
+    def walk(self, sort, page_size=2):
+        tasks = Task.objects.filter(user=self.profile)
+        seen, cursor = [], None
+        while True:
+            page, cursor = paginate_tasks(tasks, sort, cursor, page_size)
+            self.assertLessEqual(len(page), page_size)
+            seen += [task.id for task in page]
+            if cursor is None:
+                return seen
+
+    def test_sort_modes(self):
+        tasks = list(Task.objects.filter(user=self.profile))
+        rank = {'high': 0, 'medium': 1, 'low': 2}
+        expected = {
+            '-created_at': sorted(tasks, key=lambda task: (task.created_at, task.id), reverse=True),
+            'created_at': sorted(tasks, key=lambda task: (task.created_at, task.id)),
+            # NULLs last
+            'due_date': sorted(tasks, key=lambda task: (task.due_date is None, task.due_date or date.min, task.id)),
+            'priority': sorted(tasks, key=lambda task: (rank[task.priority], task.id)),
+            'title': sorted(tasks, key=lambda task: (task.title, task.id)),
+        }
+        for sort in SORT_MODES:
+            for page_size in (1, 2, 3, 10):
+                with self.subTest(sort=sort, page_size=page_size):
+                    self.assertEqual(self.walk(sort, page_size), [task.id for task in expected[sort]])
+
+    def test_unknown_sort(self):
+        self.assertEqual(self.walk('user__user__password'), self.walk('-created_at'))
+
+    def test_cursor_checked(self):
+        cursor = encode_cursor('due_date', date(2026, 10, 1), 5)
+        self.assertEqual(decode_cursor(cursor, 'due_date'), (date(2026, 10, 1), 5))
+        with self.assertRaisesMessage(InvalidCursor, 'different sort order'):
+            decode_cursor(cursor, 'title')
+        with self.assertRaises(InvalidCursor):
+            decode_cursor(cursor[:-2] + 'xx', 'due_date')
+        with self.assertRaises(InvalidCursor):
+            decode_cursor(encode_cursor('created_at', 'yesterday', 5), 'created_at')
+
+    def test_task_page_view(self):
+        self.client.force_login(self.profile.user)
+        url = reverse('tasks:task_page')
+        data = self.client.get(url, {'sort': 'title', 'page_size': 4}).json()
+        self.assertEqual(data['count'], 4)
+        data = self.client.get(url, {'sort': 'title', 'page_size': 4, 'cursor': data['next_cursor']}).json()
+        self.assertEqual(data['count'], 3)
+        self.assertIsNone(data['next_cursor'])
+
+        response = self.client.get(url, {'sort': 'title', 'cursor': 'forged'})
+        self.assertEqual(response.status_code, 400)
+
+
+class BulkActionTests(TestCase):
+    def setUp(self):
+        self.profile = User.objects.create(username='bulk').userprofile
+        self.project = Project.objects.create(user=self.profile, title='Project')
+        self.tasks = [
+            Task.objects.create(user=self.profile, title=f'Task {number}', project=self.project,
+                                completed=number == 0)
+            for number in range(3)
+        ]
+        self.ids = [task.id for task in self.tasks]
+        self.foreign = Task.objects.create(user=User.objects.create(username='other').userprofile, title='Not mine')
+
+    def apply(self, action, ids=None, value=None, **kwargs):
+        return apply_bulk_action(self.profile, action, Task.objects.all(),
+                                 ids=self.ids if ids is None else ids, value=value, **kwargs)
+
+    def totals(self):
+        self.project.refresh_from_db()
+        stats = UserStats.objects.get(user=self.profile)
+        daily = DailyTaskStats.objects.get(user=self.profile, date=timezone.localdate())
+        return (self.project.task_count, self.project.completed_task_count,
+                stats.total_tasks, stats.completed_tasks, daily.created, daily.completed)
+
+    def test_complete(self):
+        result = self.apply('complete', ids=self.ids + [self.foreign.id])
+        self.assertEqual([row['status'] for row in result.results], ['unchanged', 'updated', 'updated', 'not_found'])
+        self.assertEqual(result.message, '2 tasks completed')
+        self.assertFalse(Task.objects.filter(user=self.profile, completed=False).exists())
+        self.assertFalse(Task.objects.get(pk=self.foreign.pk).completed)
+        self.assertEqual(self.totals(), (3, 3, 3, 3, 3, 3))
+
+    def test_toggle(self):
+        result = self.apply('toggle')
+        self.assertEqual([row['completed'] for row in result.results], [False, True, True])
+        self.assertIsNone(Task.objects.get(pk=self.ids[0]).completed_at)
+        self.assertIsNotNone(Task.objects.get(pk=self.ids[1]).completed_at)
+        self.assertEqual(self.totals(), (3, 2, 3, 2, 3, 2))
+
+    def test_set_fields(self):
+        other = Project.objects.create(user=self.profile, title='Other')
+        self.apply('move', ids=self.ids[:2], value=other.id)
+        self.apply('set_priority', value='high')
+        self.apply('reschedule', value='2026-12-24')
+        self.assertEqual(self.totals()[:2], (1, 0))
+        other.refresh_from_db()
+        self.assertEqual((other.task_count, other.completed_task_count), (2, 1))
+        self.assertEqual(
+            set(Task.objects.filter(user=self.profile).values_list('priority', 'due_date')),
+            {('high', date(2026, 12, 24))},
+        )
+
+    def test_delete(self):
+        deleted = []
+        receiver = lambda sender, instance, **kwargs: deleted.append(instance.id)
+        post_delete.connect(receiver, sender=Task)
+        self.addCleanup(post_delete.disconnect, receiver, sender=Task)
+
+        result = self.apply('delete', ids=self.ids[1:] + [self.foreign.id])
+        self.assertEqual(result.message, '2 tasks deleted')
+        # Other receivers still see every task, the aggregates change once
+        self.assertEqual(sorted(deleted), self.ids[1:])
+        self.assertEqual(self.totals(), (1, 1, 1, 1, 1, 1))
+        self.assertTrue(Task.objects.filter(pk=self.foreign.pk).exists())
+
+    @mock.patch.object(bulk, 'MAX_BULK_TASKS', 2)
+    def test_continued(self):
+        result = apply_bulk_action(self.profile, 'reopen', Task.objects.all())
+        self.assertTrue(result.has_more)
+        self.assertEqual(result.next_after, self.ids[1])
+        result = apply_bulk_action(self.profile, 'complete', Task.objects.all(), after=result.next_after)
+        self.assertFalse(result.has_more)
+        self.assertEqual([row['id'] for row in result.results], self.ids[2:])
+
+    def test_invalid(self):
+        for action, value, message in [
+            ('archive', None, 'Unknown action'),
+            ('set_priority', 'urgent', 'Choose a valid priority'),
+            ('reschedule', 'tomorrow', 'Enter a valid due date'),
+            ('move', self.project.id + 100, 'Project not found'),
+        ]:
+            with self.subTest(action), self.assertRaisesMessage(BulkActionError, message):
+                self.apply(action, value=value)
+        with self.assertRaisesMessage(BulkActionError, 'No tasks selected'):
+            self.apply('complete', ids=[])
+
+    def test_view(self):
+        self.client.force_login(self.profile.user)
+        response = self.client.post(
+            reverse('tasks:task_bulk'),
+            json.dumps({'action': 'complete', 'filter': {'status': 'incomplete'}}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.json()['changed'], 2)
+        response = self.client.post(reverse('tasks:task_bulk'), '[]', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+
+class ImporterTests(TestCase):
+    csv_file = (
+        'title,priority,completed,due_date,project,extra\n'
+        'First,high,yes,2026-11-01,Home,ignored\n'
+        ',low,no,,,\n'
+        'Third,urgent,no,,home,\n'
+        'Fourth,,done,not a date,,\n'
+        'Fifth,Low,,,Work,\n'
+    )
+
+    def setUp(self):
+        self.profile = User.objects.create(username='importer').userprofile
+
+    def run_import(self, content, file_format='csv', **kwargs):
+        return import_tasks(self.profile, io.BytesIO(content.encode()), file_format, **kwargs)
+
+    def titles(self):
+        return list(Task.objects.filter(user=self.profile).order_by('id').values_list('title', flat=True))
+
+    def test_csv(self):
+        report = self.run_import(self.csv_file)
+        self.assertEqual((report.rows, report.imported, report.failed, report.projects_created), (5, 2, 3, 2))
+        self.assertEqual(report.errors, [
+            (2, 'title', 'This field is required'),
+            (3, 'priority', 'Expected low, medium or high'),
+            (4, 'due_date', 'Expected a date as YYYY-MM-DD'),
+        ])
+        self.assertEqual(self.titles(), ['First', 'Fifth'])
+        first = Task.objects.get(title='First')
+        self.assertEqual((first.priority, first.completed, first.due_date), ('high', True, date(2026, 11, 1)))
+        self.assertIsNotNone(first.completed_at)
+        # Counters and rollups are kept up to date without post_save
+        self.assertEqual(Project.objects.get(title='Home').completed_task_count, 1)
+        self.assertEqual(UserStats.objects.get(user=self.profile).total_tasks, 2)
+
+    def test_unknown_projects(self):
+        Project.objects.create(user=self.profile, title='Home')
+        report = self.run_import(self.csv_file, create_projects=False)
+        self.assertEqual(report.imported, 1)
+        self.assertIn((5, 'project', "No project named 'Work'"), report.errors)
+
+    def test_resume(self):
+        self.run_import(self.csv_file, start_row=4)
+        self.assertEqual(self.titles(), ['Fifth'])
+
+    def test_json(self):
+        array = '[{"title": "First", "completed": true}, 42, {"title": "Third"}]'
+        report = self.run_import(array, 'json')
+        self.assertEqual((report.imported, report.errors), (2, [(2, '', 'Expected an object with task fields')]))
+
+        lines = '{"title": "Line"}\n\n{"title": \n'
+        report = self.run_import(lines, 'json')
+        self.assertEqual((report.rows, report.imported, report.failed), (2, 1, 1))
+        self.assertEqual(self.titles(), ['First', 'Third', 'Line'])
+
+    def test_interrupted(self):
+        content = '[' + ', '.join(f'{{"title": "Task {number}"}}' for number in range(5)) + ', {"title": '
+        with self.assertRaisesMessage(ImportFileError, 'Invalid JSON') as context:
+            self.run_import(content, 'json', batch_size=2)
+        # Two batches went in; the fifth task was pending when it failed
+        self.assertEqual(context.exception.report.resume_row, 5)
+        self.assertEqual(len(self.titles()), 4)
+
+    def test_json_array_chunks(self):
+        items = [{'title': 'First, "quoted" ]'}, 1234567, None, [1, {'a': 'b'}], 'last']
+        content = json.dumps(items, indent=2)
+        for chunk_size in (1, 2, 3, 7, 1000):
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(list(read_json_array(io.StringIO(content), chunk_size=chunk_size)), items)
+        self.assertEqual(list(read_json_array(io.StringIO(' [ ] '))), [])
+
+        for content, message in [
+            ('{"title": "First"}', 'Expected a JSON array'),
+            ('[{"title": "First"} {"title": "Second"}]', 'Invalid JSON in the array'),
+            ('[{"title": "First"},', 'Unexpected end of the JSON array'),
+            ('[1, 2', 'Unexpected end of the JSON array'),
+        ]:
+            with self.subTest(content), self.assertRaisesMessage(ImportFileError, message):
+                list(read_json_array(io.StringIO(content), chunk_size=4))
+
+    def test_json_record_size_limit(self):
+        stream = io.StringIO('[{"title": "' + 'x' * 1000)
+        with self.assertRaisesMessage(ImportFileError, 'longer than 100 characters'):
+            list(read_json_array(stream, chunk_size=10, max_record_size=100))
+        # Stopped reading soon after the limit
+        self.assertLess(stream.tell(), 150)
 
-# Create your tests here.
+    def test_view(self):
+        self.client.force_login(self.profile.user)
+        upload = io.BytesIO(self.csv_file.encode())
+        upload.name = 'tasks.csv'
+        response = self.client.post(reverse('tasks:task_import'), {'file': upload, 'create_projects': 'on'})
+        self.assertEqual(response.context['report'].imported, 2)
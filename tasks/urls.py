@@ -11,7 +11,10 @@ urlpatterns = [
     path('create/', views.task_create_view, name='task_create'),
     path('<int:task_id>/edit/', views.task_edit_view, name='task_edit'),
     path('<int:task_id>/delete/', views.task_delete_view, name='task_delete'),
+    path('import/', views.task_import_view, name='task_import'),
 
     # AJAX endpoints
+    path('page/', views.task_page_view, name='task_page'),  # Infinite scroll
     path('<int:task_id>/toggle/', views.task_toggle_complete, name='task_toggle_complete'),
+    path('bulk/', views.task_bulk_view, name='task_bulk'),  # Multi-select actions
 ]
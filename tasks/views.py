@@ -1,124 +1,184 @@
+import asyncio
+import json
+
 from email import message
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse
+from django.template.loader import render_to_string
 from django.views.decorators.http import require_http_methods
-from django.db.models import Q
+from django.conf import settings
+from django.utils import timezone
+from asgiref.sync import sync_to_async
 
 from accounts.models import UserProfile
+from accounts.search import search_filter
+from .bulk import BulkActionError, MAX_BULK_TASKS, apply_bulk_action
+from .importer import ImportFileError, guess_format, import_tasks
 from .models import Task
-from projects.models import Project
-
+from projects.models import visible_projects
+from dashboard.budgets import query_budget
+from dashboard.concurrency import get_user_profile, run_concurrently
+from dashboard.stats import aget_task_stats, task_counters
+from .pagination import InvalidCursor, SORT_CHOICES, clean_page_size, clean_sort, paginate_tasks
 
-@login_required
-def task_list_view(request):
-    # Get user profile (needed for your model relationships)
-    try:
-        user_profile = request.user.userprofile
-    except:
-        messages.error(request, 'Please complete your profile first.')
-        return redirect('accounts:profile')
 
-    # Filter tasks by user
-    tasks = Task.objects.filter(user=user_profile)
+def filter_tasks(params, user_profile):
+    """
+    The user's tasks narrowed by the status/priority/project/search
+    parameters shared by the task list page, its JSON pages and bulk actions.
+    """
+    tasks = Task.objects.filter(user=user_profile).select_related('project')
 
     # Filter by status
-    status = request.GET.get('status')
+    status = params.get('status')
     if status == 'completed':
         tasks = tasks.filter(completed=True)
     elif status == 'incomplete':
         tasks = tasks.filter(completed=False)
+    elif status == 'overdue':
+        tasks = tasks.filter(completed=False, due_date__lt=timezone.localdate())
 
     # Filter by priority
-    priority = request.GET.get('priority')
+    priority = params.get('priority')
     if priority:
         tasks = tasks.filter(priority=priority)
 
     # Filter by project
-    project_id = request.GET.get('project_id')
+    project_id = params.get('project_id')
     if project_id:
         tasks = tasks.filter(project_id=project_id)
 
-    # Search functionality
-    search = request.GET.get('search')  # Fixed: added quotes
+    # Full-text search on the indexed search_vector column
+    search = params.get('search')
     if search:
-        tasks = tasks.filter(
-            Q(title__icontains=search) |
-            Q(description__icontains=search)
-        )
+        tasks = search_filter(tasks, search)
 
-    # Sort by due date or creation date
-    sort = request.GET.get('sort', '-created_at')  
-    tasks = tasks.order_by(sort)
+    return tasks
 
-    # Get user projects for filter dropdown
-    user_projects = Project.objects.filter(
-        Q(user=user_profile) | Q(members=user_profile) 
-    ).distinct()
 
-    # Calculate task statistics for template
-    total_tasks = tasks.count()
-    completed_tasks = tasks.filter(completed=True).count()
-    pending_tasks = tasks.filter(completed=False).count()
+@login_required
+@query_budget(queries=9, time=200)
+async def task_list_view(request):
+    # Get user profile (needed for your model relationships)
+    user_profile = await get_user_profile(request)
+    if user_profile is None:
+        messages.error(request, 'Please complete your profile first.')
+        return redirect('accounts:profile')
 
-    # Priority statistics
-    high_priority = tasks.filter(priority='high').count()
-    medium_priority = tasks.filter(priority='medium').count()
-    low_priority = tasks.filter(priority='low').count()
+    tasks = filter_tasks(request.GET, user_profile)
+    status = request.GET.get('status')
+    priority = request.GET.get('priority')
+    project_id = request.GET.get('project_id')
+    search = request.GET.get('search')
 
-    # Weekly completion data (last 7 days)
-    from datetime import timedelta
-    from django.utils import timezone
+    # Only whitelisted, index-backed sort modes; first page only; the rest
+    # is fetched from task_page_view as the user scrolls
+    sort = clean_sort(request.GET.get('sort'))
+    page_size = clean_page_size(request.GET.get('page_size'))
 
-    weekly_data = []
-    weekly_labels = []
+    def first_page():
+        try:
+            return paginate_tasks(tasks, sort, request.GET.get('cursor'), page_size)
+        except InvalidCursor:
+            return paginate_tasks(tasks, sort, None, page_size)
 
-    for i in range(6, -1, -1):  # Last 7 days (6 days ago to today)
-        date = timezone.now().date() - timedelta(days=i)
-        completed_count = Task.objects.filter(
-            user=user_profile,
-            completed=True,
-            updated_at__date=date
-        ).count()
+    # Get user projects for filter dropdown
+    user_projects = visible_projects(user_profile)
+
+    # The page, the projects and the task statistics (for the filtered
+    # list, weekly chart over all tasks) are independent queries, run
+    # concurrently
+    ((page, next_cursor), user_projects), stats = await asyncio.gather(
+        run_concurrently(first_page, lambda: list(user_projects)),
+        aget_task_stats(tasks, history_days=7, user=user_profile),
+    )
 
-        weekly_data.append(completed_count)
-        weekly_labels.append(date.strftime('%a'))  # Mon, Tue, Wed, etc.
+    # Weekly completion data (last 7 days)
+    weekly_series = stats.daily_series(7)
+    weekly_data = [count for day, count in weekly_series]
+    weekly_labels = [day.strftime('%a') for day, count in weekly_series]  # Mon, Tue, Wed, etc.
 
     # Calculate weekly total
     weekly_total = sum(weekly_data)
 
     # Context for template
     context = {
-        'tasks': tasks,
+        'tasks': page,
+        'next_cursor': next_cursor,
+        'page_size': page_size,
         'user_projects': user_projects,
         'current_status': status,
         'current_priority': priority,
         'current_project': project_id,
         'search_query': search,
         'current_sort': sort,
+        'sort_choices': SORT_CHOICES,
         'priority_choices': Task.PRIORITY_CHOICES,
         'active_page': 'tasks',
         # Task statistics
-        'total_tasks': total_tasks,
-        'completed_tasks': completed_tasks,
-        'pending_tasks': pending_tasks,
-        'high_priority': high_priority,
-        'medium_priority': medium_priority,
-        'low_priority': low_priority,
+        'total_tasks': stats.total,
+        'completed_tasks': stats.completed,
+        'pending_tasks': stats.pending,
+        'high_priority': stats.high,
+        'medium_priority': stats.medium,
+        'low_priority': stats.low,
         # Weekly data
         'weekly_data': weekly_data,
         'weekly_labels': weekly_labels,
         'weekly_total': weekly_total,
     }
 
-    return render(request, 'tasks/task_list.html', context)
+    return await sync_to_async(render)(request, 'tasks/task_list.html', context)
+
 
 @login_required
+@query_budget(queries=7, time=100)
+def task_page_view(request):
+    '''AJAX view returning the next page of the task list for infinite scroll'''
+    try:
+        user_profile = request.user.userprofile
+    except UserProfile.DoesNotExist:
+        return JsonResponse({
+            'success': False,
+            'message': 'Please complete your profile first'
+        }, status=400)
+
+    tasks = filter_tasks(request.GET, user_profile)
+    sort = clean_sort(request.GET.get('sort'))
+    page_size = clean_page_size(request.GET.get('page_size'))
+    try:
+        page, next_cursor = paginate_tasks(tasks, sort, request.GET.get('cursor'), page_size)
+    except InvalidCursor as exc:
+        return JsonResponse({'success': False, 'message': str(exc)}, status=400)
+
+    data = {
+        'success': True,
+        'html': render_to_string('tasks/task_card.html', {'tasks': page}, request=request),
+        'count': len(page),
+        'next_cursor': next_cursor,
+    }
+    # ?stats=1: counters for the list's header, when the client has
+    # reloaded the list in place (new filters, live updates)
+    if request.GET.get('stats'):
+        stats = task_counters(tasks, timezone.localdate())
+        data['stats'] = {
+            'total': stats.total,
+            'completed': stats.completed,
+            'pending': stats.pending,
+            'high': stats.high,
+            'medium': stats.medium,
+            'low': stats.low,
+        }
+    return JsonResponse(data)
+
+@login_required
+@query_budget(queries=7, time=100)
 def task_detail_view(request, task_id):
     try:
         user_profile = request.user.userprofile
-    except:
+    except UserProfile.DoesNotExist:
         messages.error(request, 'Please complete your profile first.')
         return redirect('accounts:profile')
 
@@ -127,10 +187,11 @@ def task_detail_view(request, task_id):
 
 
 @login_required
+@query_budget(queries=6, time=100)
 def task_create_view(request):
     try:
         user_profile = request.user.userprofile
-    except:
+    except UserProfile.DoesNotExist:
         messages.error(request, 'Please complete your profile first.')
         return redirect('accounts:profile')
 
@@ -156,9 +217,7 @@ def task_create_view(request):
             return redirect('tasks:task_detail', task_id=task.id)
 
     # Get user's projects for dropdown
-    user_projects = Project.objects.filter(
-        Q(user=user_profile) | Q(members=user_profile) 
-    ).distinct()
+    user_projects = visible_projects(user_profile)
 
     context = {
         'user_projects': user_projects,
@@ -170,6 +229,7 @@ def task_create_view(request):
 
 
 @login_required
+@query_budget(queries=8, time=100)
 def task_edit_view(request, task_id):
     try:
         user_profile = request.user.userprofile
@@ -177,7 +237,7 @@ def task_edit_view(request, task_id):
     except Task.DoesNotExist:
         messages.error(request, 'Task not found or you do not have permission to edit it.')
         return redirect('tasks:task_list')
-    except:
+    except UserProfile.DoesNotExist:
         messages.error(request, 'Please complete your profile first.')
         return redirect('accounts:profile')
 
@@ -197,15 +257,13 @@ def task_edit_view(request, task_id):
             task.priority = priority
             task.due_date = due_date if due_date else None
             task.project_id = project_id if project_id else None
-            task.completed = completed
+            task.set_completed(completed)
             task.save()
 
             messages.success(request, f"Task '{task.title}' updated successfully!")
             return redirect('tasks:task_detail', task_id=task.id)
 
-    user_projects = Project.objects.filter(
-        Q(user=user_profile) | Q(members=user_profile)
-    ).distinct()
+    user_projects = visible_projects(user_profile)
 
     context = {
         'task': task,
@@ -226,7 +284,7 @@ def task_delete_view(request, task_id):
     except Task.DoesNotExist:
         messages.error(request, 'Task not found or you do not have the permission to delete this Task')
         return redirect('tasks:task_list')
-    except:
+    except UserProfile.DoesNotExist:
         messages.error(request, 'Please complete your profile first')
         return redirect('accounts:profile')
     
@@ -254,13 +312,13 @@ def task_toggle_complete(request, task_id):
             'success': False,
             'message': 'Task not found or you do not have permission'
         })
-    except:
+    except UserProfile.DoesNotExist:
         return JsonResponse({
             'success': False,
             'message': 'Please complete your profile first'
         })
 
-    task.completed = not task.completed
+    task.set_completed(not task.completed)
     task.save()
 
     return JsonResponse({
@@ -269,12 +327,100 @@ def task_toggle_complete(request, task_id):
         'message': f'Task marked as {"completed" if task.completed else "pending"}'
     })
 
+@login_required
+@require_http_methods(["POST"])
+def task_bulk_view(request):
+    '''
+    AJAX view applying one action to many tasks in a single request.
+
+    JSON body: {"action": ..., "ids": [...]} or {"action": ..., "filter":
+    {status, priority, project_id, search}, "after": ...}, plus "value" for
+    set_priority, reschedule and move. See tasks/bulk.py for the actions.
+    '''
+    try:
+        user_profile = request.user.userprofile
+    except UserProfile.DoesNotExist:
+        return JsonResponse({
+            'success': False,
+            'message': 'Please complete your profile first'
+        }, status=400)
+
+    try:
+        payload = json.loads(request.body or b'{}')
+    except ValueError:
+        payload = None
+    if not isinstance(payload, dict):
+        return JsonResponse({'success': False, 'message': 'Invalid request body'}, status=400)
+
+    ids = payload.get('ids')
+    filters = payload.get('filter')
+    if ids is not None:
+        tasks = Task.objects.all()
+    elif isinstance(filters, dict):
+        params = {key: str(value) for key, value in filters.items() if value not in (None, '')}
+        tasks = filter_tasks(params, user_profile)
+    else:
+        return JsonResponse({'success': False, 'message': 'Select tasks by ids or by filter'}, status=400)
+
+    try:
+        result = apply_bulk_action(user_profile, payload.get('action'), tasks, ids=ids,
+                                   value=payload.get('value'), after=payload.get('after'))
+    except BulkActionError as exc:
+        return JsonResponse({'success': False, 'message': str(exc)}, status=400)
+
+    return JsonResponse({'success': True, 'limit': MAX_BULK_TASKS, **result.as_dict()})
+
+@login_required
+def task_import_view(request):
+    '''Upload a CSV or JSON file of tasks; see tasks/importer.py'''
+    try:
+        user_profile = request.user.userprofile
+    except UserProfile.DoesNotExist:
+        messages.error(request, 'Please complete your profile first.')
+        return redirect('accounts:profile')
+
+    context = {'active_page': 'tasks'}
+
+    if request.method == 'POST':
+        upload = request.FILES.get('file')
+        file_format = guess_format(upload.name) if upload else None
+        try:
+            start_row = max(1, int(request.POST.get('start_row') or 1))
+        except ValueError:
+            start_row = 1
+        context['start_row'] = start_row
+
+        if upload is None:
+            messages.error(request, 'Choose a file to import')
+        elif file_format is None:
+            messages.error(request, 'Upload a .csv, .json or .ndjson file')
+        elif upload.size > settings.TASK_IMPORT_MAX_UPLOAD_SIZE:
+            messages.error(request, 'The file is too large to import')
+        else:
+            try:
+                report = import_tasks(
+                    user_profile,
+                    upload.file,
+                    file_format,
+                    start_row=start_row,
+                    create_projects=request.POST.get('create_projects') == 'on',
+                )
+            except ImportFileError as exc:
+                report = exc.report
+                context['file_error'] = str(exc)
+                messages.error(request, str(exc))
+            else:
+                messages.success(request, f"Imported {report.imported} task(s)")
+            context['report'] = report
+
+    return render(request, 'tasks/task_import.html', context)
+
 @login_required
 def my_task_view(request):
     '''Quick view of the user's tasks for Dashboard'''
     try:
         user_profile = request.user.userprofile
-    except:
+    except UserProfile.DoesNotExist:
         messages.error(request, 'Please complete your profile first.')
         return redirect('accounts:profile')
 
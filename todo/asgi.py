@@ -3,6 +3,29 @@ ASGI config for todo project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The dashboard, analytics and task list views are async: their independent
+queries run concurrently, each in a worker thread with its own database
+connection (dashboard/concurrency.py), so those pages take about as long as
+their slowest query. They work under WSGI too, but every request then gets
+an event loop of its own; under ASGI they share one per worker process.
+
+To deploy under ASGI, install an ASGI server and point it here, e.g.
+
+    WEB_CONCURRENCY=4 uvicorn todo.asgi:application
+    WEB_CONCURRENCY=4 gunicorn todo.asgi:application -k uvicorn.workers.UvicornWorker
+
+Set the worker count through WEB_CONCURRENCY rather than --workers/-w:
+settings.py reads it too, and with more than one worker requires a cache
+shared by all of them (CACHE_BACKEND 'file' or 'db'). A per-process cache
+would leave each worker serving its own stale pages after another one
+handled a change. Also set DB_CONN_MAX_AGE (e.g. 60) so query threads reuse
+their connections.
+Each worker process can hold up to min(32, CPUs + 4) of them, the size of
+the thread pool, on top of the one of its main thread: size the database's
+max_connections for that. Run collectstatic before starting: with DEBUG off
+assets.middleware.StaticFilesMiddleware serves STATIC_ROOT, precompressed
+and with long cache lifetimes, so a web server or CDN in front is optional.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
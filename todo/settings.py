@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 import os
 from pathlib import Path
 from dotenv import  load_dotenv
+from django.core.exceptions import ImproperlyConfigured
 
 load_dotenv()
 
@@ -40,12 +41,16 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     #My apps
     'accounts',
     'tasks',
     'projects',
     'dashboard',
+    'api',
+    'live',
+    'assets',
 
     #Third Party apps
     'tailwind',
@@ -58,6 +63,12 @@ INTERNAL_IPS = [
 
 
 MIDDLEWARE = [
+    # Collected static files, without DEBUG (assets/middleware.py)
+    'assets.middleware.StaticFilesMiddleware',
+    # Before the rest, so the queries of the other middleware count too
+    'dashboard.budgets.QueryBudgetMiddleware',
+    # Compresses the HTML and JSON returned by everything below
+    'assets.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -73,13 +84,20 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'theme' / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # Templates are compiled once per process. The development
+            # server's autoreloader resets the cache when a template changes.
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
@@ -98,8 +116,113 @@ DATABASES = {
         'PASSWORD': os.getenv('DB_PASSWORD'),
         'HOST': os.getenv('DB_HOST'),
         'PORT': os.getenv('DB_PORT'),
+        # Seconds a connection is kept for reuse, 0 to close it after every
+        # request. Async views run their independent queries in parallel
+        # worker threads with a connection each (dashboard/concurrency.py);
+        # under ASGI a positive value lets those threads keep theirs.
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 0)),
+        'CONN_HEALTH_CHECKS': True,
+    }
+}
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+#
+# Worker processes serving requests. uvicorn and gunicorn both read
+# WEB_CONCURRENCY for their worker count, so set it rather than --workers.
+WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', 1))
+
+# CACHE_BACKEND picks the backend: 'locmem' (per process), 'file' (shared by
+# workers on one host) or 'db' (shared by every host, run
+# `python manage.py createcachetable` once). Entries expire after
+# CACHE_TIMEOUT seconds and the oldest are culled past CACHE_MAX_ENTRIES.
+#
+# The cache must be shared by every worker: the per-user data versions in it
+# (dashboard/cache.py) are how a write in one worker retires the cached pages
+# of the others. 'locmem' is therefore only the default for a single worker,
+# and refused with more; run several hosts with 'db'.
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'locmem' if WEB_CONCURRENCY == 1 else 'file')
+if CACHE_BACKEND == 'locmem' and WEB_CONCURRENCY > 1:
+    raise ImproperlyConfigured(
+        f"CACHE_BACKEND 'locmem' isn't shared by the {WEB_CONCURRENCY} workers of WEB_CONCURRENCY; use 'file' or 'db'"
+    )
+
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'todo',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('CACHE_LOCATION', str(BASE_DIR / 'cache')),
+    },
+    'db': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': os.getenv('CACHE_LOCATION', 'todo_cache'),
+    },
+}
+
+CACHES = {
+    'default': {
+        **CACHE_BACKENDS[CACHE_BACKEND],
+        'TIMEOUT': int(os.getenv('CACHE_TIMEOUT', 300)),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', 5000)),
+        },
     }
 }
+
+# Per-user dashboard/analytics/reports/calendar contexts and {% usercache %}
+# template fragments (dashboard/cache.py)
+DASHBOARD_CACHE_ALIAS = 'default'
+DASHBOARD_CACHE_TIMEOUT = int(os.getenv('DASHBOARD_CACHE_TIMEOUT', 300))
+
+# Search-as-you-type suggestions (accounts/search.py)
+SEARCH_AUTOCOMPLETE_CACHE_TIMEOUT = int(os.getenv('SEARCH_AUTOCOMPLETE_CACHE_TIMEOUT', 30))
+
+# Generated reports (dashboard/reports.py). Rendered by
+# `python manage.py run_report_worker`; files are kept outside MEDIA_ROOT
+# and only served to their owner.
+REPORT_ARTIFACT_ROOT = Path(os.getenv('REPORT_ARTIFACT_ROOT', BASE_DIR / 'report_artifacts'))
+REPORT_WORKER_PROCESSES = int(os.getenv('REPORT_WORKER_PROCESSES', 2))
+
+# Task imports (tasks/importer.py): rows per bulk_create transaction and the
+# largest file accepted by the upload page. The import_tasks command has no
+# size limit.
+TASK_IMPORT_BATCH_SIZE = int(os.getenv('TASK_IMPORT_BATCH_SIZE', 1000))
+TASK_IMPORT_MAX_UPLOAD_SIZE = int(os.getenv('TASK_IMPORT_MAX_UPLOAD_SIZE', 50 * 1024 * 1024))
+
+# Per-view query budgets (dashboard/budgets.py): 'off', 'log' or 'raise'.
+# Defaults to 'log', and to 'raise' when running the tests, so a page going
+# over its budget fails a test rather than a developer's local site. Only
+# going over a query count raises; going over a time budget is just logged.
+QUERY_BUDGET_MODE = os.getenv('QUERY_BUDGET_MODE')
+TEST_RUNNER = 'dashboard.testing.BudgetTestRunner'
+
+# Live updates (live/). The in-process broker serves a single ASGI worker;
+# with several workers on one host use live.brokers.LocalSocketBroker, which
+# passes events between them through sockets in LIVE_SOCKET_DIR.
+LIVE_BROKER = os.getenv('LIVE_BROKER', 'live.brokers.InProcessBroker')
+LIVE_SOCKET_DIR = os.getenv('LIVE_SOCKET_DIR', '/tmp/todo-live')
+
+# Profile picture variants (accounts/pictures.py), rendered by
+# `python manage.py process_profile_pictures`. Their URLs change with the
+# picture, so browsers and CDNs may keep them for this many seconds.
+PROFILE_PICTURE_CACHE_MAX_AGE = int(os.getenv('PROFILE_PICTURE_CACHE_MAX_AGE', 365 * 24 * 60 * 60))
+
+# The session user is loaded together with their UserProfile (accounts/backends.py).
+# Sessions store the path of the backend that logged them in, and Django
+# logs a session out when that path is no longer listed. ModelBackend is
+# only here for the sessions started before ProfileBackend.
+# Deprecated: remove it once those have expired, SESSION_COOKIE_AGE (two
+# weeks) after ProfileBackend was deployed. Until then permission checks
+# ProfileBackend denies are repeated by it, against the same cached
+# permissions.
+AUTHENTICATION_BACKENDS = [
+    'accounts.backends.ProfileBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -146,6 +269,30 @@ STATICFILES_DIRS = [
 ]
 
 STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# `python manage.py collectstatic` minifies and bundles the JavaScript below,
+# hashes every file name and writes gzip/Brotli copies (assets/storage.py).
+# Templates include a bundle with {% javascript 'name' %}.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'assets.storage.PipelineStorage',
+    },
+}
+STATIC_BUNDLES = {
+    'main': ['js/main.js'],
+    'live': ['js/live.js'],
+    'tasks': ['js/tasks.js'],
+    'projects': ['js/projects.js'],
+    'project_detail': ['js/projects.js', 'js/tasks.js'],
+    'calendar': ['js/calendar.js'],
+}
+# Browser cache lifetime of static files without a hash in their name;
+# hashed names are cached for a year
+STATIC_MAX_AGE = int(os.getenv('STATIC_MAX_AGE', 60 * 60))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
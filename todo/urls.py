@@ -25,6 +25,8 @@ urlpatterns = [
     path('tasks/', include('tasks.urls')),
     path('projects/', include('projects.urls')),
     path('dashboard/', include('dashboard.urls')),
+    path('api/', include('api.urls')),
+    path('live/', include('live.urls')),
     path('', include('dashboard.urls')),  # Dashboard as home page
 ]
 